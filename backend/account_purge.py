@@ -0,0 +1,269 @@
+"""
+Account Deletion Purge Jobs
+
+Deleting an account removes the user row right away and records a job in
+account_deletions. A background worker then removes everything else the
+account owned, in small batches, so heavy users can't push the request past
+its timeout.
+
+Features:
+- Resumable: every batch commits on its own and deletes are idempotent, so a
+  restarted or crashed job just picks up what's left
+- Scans deleted with their labels and tags; their image assets released, and
+  unreferenced images handed to the image purge queue (R2 DeleteObjects in bulk)
+- Crash reports and debug breadcrumbs removed as well
+- Stale running jobs reclaimed (FOR UPDATE SKIP LOCKED, safe with replicas)
+- Per-job progress counters for the status endpoint and metrics
+
+Configuration:
+    ACCOUNT_PURGE_BATCH_SIZE     - Rows deleted per batch (default: 500)
+    ACCOUNT_PURGE_MAX_ATTEMPTS   - Attempts before a job is marked failed (default: 5)
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from r2_storage import scan_image_keys
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+ACCOUNT_PURGE_BATCH_SIZE = int(os.getenv("ACCOUNT_PURGE_BATCH_SIZE", "500"))
+ACCOUNT_PURGE_MAX_ATTEMPTS = int(os.getenv("ACCOUNT_PURGE_MAX_ATTEMPTS", "5"))
+
+# How often to look for pending or abandoned jobs when not woken
+ACCOUNT_PURGE_INTERVAL_SECONDS = 60
+# A running job not updated for this long is assumed dead and reclaimed
+ACCOUNT_PURGE_STALE_SECONDS = 600
+
+# Job states
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+# Debug tables written by the app's crash reporter, keyed by a client-sent user_id
+DEBUG_TABLES = ("crash_reports", "debug_breadcrumbs")
+
+
+# ============================================================================
+# PURGER
+# ============================================================================
+
+class AccountPurger:
+    """Claims account deletion jobs and purges the account's data in batches."""
+
+    def __init__(self, database, image_purger, image_assets):
+        self.database = database
+        self.image_purger = image_purger
+        self.image_assets = image_assets
+        self._wakeup = asyncio.Event()
+
+    def wake(self):
+        """Run pending jobs now instead of waiting for the next sweep."""
+        self._wakeup.set()
+
+    async def claim_job(self) -> Optional[Dict[str, Any]]:
+        """Claim the oldest pending job, or a running one whose worker went away."""
+        now = datetime.utcnow()
+        row = await self.database.fetch_one("""
+            UPDATE account_deletions
+            SET status = :running, attempts = attempts + 1,
+                started_at = COALESCE(started_at, :now), updated_at = :now
+            WHERE id = (
+                SELECT id FROM account_deletions
+                WHERE status = :pending
+                   OR (status = :running AND updated_at < :stale_before)
+                ORDER BY requested_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+        """, {
+            "running": STATUS_RUNNING,
+            "pending": STATUS_PENDING,
+            "now": now,
+            "stale_before": now - timedelta(seconds=ACCOUNT_PURGE_STALE_SECONDS),
+        })
+        return dict(row) if row else None
+
+    async def _add_progress(self, job_id: str, **counts: int):
+        """Bump a job's counters; doubles as its heartbeat."""
+        assignments = ", ".join(f"{name} = {name} + :{name}" for name in counts)
+        await self.database.execute(
+            f"UPDATE account_deletions SET {assignments}, updated_at = :now WHERE id = :id",
+            {**counts, "now": datetime.utcnow(), "id": job_id}
+        )
+
+    async def _purge_scan_batch(self, job: Dict[str, Any]) -> int:
+        """Delete one batch of the account's scans with their labels and tags."""
+        async with self.database.transaction():
+            rows = await self.database.fetch_all("""
+                WITH batch AS (
+                    SELECT id FROM scans WHERE user_id = :user_id LIMIT :batch_size
+                ), deleted AS (
+                    DELETE FROM scans WHERE id IN (SELECT id FROM batch)
+                    RETURNING id, image_asset_id, image_url, thumbnail_url, preview_url
+                ), labels AS (
+                    DELETE FROM scan_labels WHERE scan_id IN (SELECT id FROM deleted)
+                    RETURNING scan_id
+                ), tags AS (
+                    DELETE FROM scan_tags WHERE scan_id IN (SELECT id FROM deleted)
+                    RETURNING scan_id
+                )
+                SELECT deleted.*, (SELECT COUNT(*) FROM labels) AS labels_deleted
+                FROM deleted
+            """, {"user_id": job["user_id"], "batch_size": ACCOUNT_PURGE_BATCH_SIZE})
+            if not rows:
+                return 0
+
+            images_queued = await self.image_assets.release(row["image_asset_id"] for row in rows)
+            legacy_keys = [
+                key for row in rows if not row["image_asset_id"] for key in scan_image_keys(dict(row))
+            ]
+            await self.image_purger.enqueue(legacy_keys)
+            await self._add_progress(
+                job["id"],
+                scans_deleted=len(rows),
+                labels_deleted=rows[0]["labels_deleted"],
+                images_queued=images_queued + len(legacy_keys),
+            )
+        return len(rows)
+
+    async def _purge_debug_batch(self, job: Dict[str, Any], table: str) -> int:
+        """Delete one batch of the account's rows from a debug table."""
+        async with self.database.transaction():
+            deleted = await self.database.fetch_val(f"""
+                WITH deleted AS (
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT id FROM {table} WHERE user_id = :user_id LIMIT :batch_size
+                    )
+                    RETURNING 1
+                )
+                SELECT COUNT(*) FROM deleted
+            """, {"user_id": job["user_id"], "batch_size": ACCOUNT_PURGE_BATCH_SIZE})
+            if deleted:
+                await self._add_progress(job["id"], debug_rows_deleted=deleted)
+        return deleted
+
+    async def run_job(self, job: Dict[str, Any]):
+        """Purge everything the account owned, then mark the job completed."""
+        user_id = job["user_id"]
+
+        while await self._purge_scan_batch(job) == ACCOUNT_PURGE_BATCH_SIZE:
+            pass
+        for table in DEBUG_TABLES:
+            while await self._purge_debug_batch(job, table) == ACCOUNT_PURGE_BATCH_SIZE:
+                pass
+
+        # Small per-user rows, plus anything the batches raced with
+        async with self.database.transaction():
+            for sql in (
+                "DELETE FROM scan_tags WHERE user_id = :user_id",
+                "DELETE FROM scan_tombstones WHERE user_id = :user_id",
+                "DELETE FROM scan_change_counters WHERE user_id = :user_id",
+                "DELETE FROM user_scan_stats WHERE user_id = :user_id",
+            ):
+                await self.database.execute(sql, {"user_id": user_id})
+            await self.database.execute("""
+                UPDATE account_deletions
+                SET status = :completed, completed_at = :now, updated_at = :now, last_error = NULL
+                WHERE id = :id
+            """, {"completed": STATUS_COMPLETED, "now": datetime.utcnow(), "id": job["id"]})
+
+        self.image_purger.wake()
+
+    async def run_pending(self):
+        """Run jobs until none are left to claim."""
+        while True:
+            job = await self.claim_job()
+            if job is None:
+                return
+
+            started = datetime.utcnow()
+            try:
+                await self.run_job(job)
+                elapsed = (datetime.utcnow() - started).total_seconds()
+                logger.info(f"Account purge {job['id']} completed for user {job['user_id']} in {elapsed:.1f}s")
+            except Exception as e:
+                # Progress so far is committed - the next attempt resumes from there
+                status = STATUS_FAILED if job["attempts"] >= ACCOUNT_PURGE_MAX_ATTEMPTS else STATUS_PENDING
+                logger.error(f"Account purge {job['id']} attempt {job['attempts']} failed ({status}): {e}")
+                await self.database.execute("""
+                    UPDATE account_deletions SET status = :status, last_error = :error, updated_at = :now
+                    WHERE id = :id
+                """, {"status": status, "error": str(e)[:1000], "now": datetime.utcnow(), "id": job["id"]})
+                if status == STATUS_PENDING:
+                    return  # Retry on the next sweep rather than spinning
+
+    async def run_forever(self):
+        """Background task: run jobs on wake-up or every ACCOUNT_PURGE_INTERVAL_SECONDS."""
+        while True:
+            try:
+                await self.run_pending()
+            except Exception as e:
+                logger.warning(f"Account purge pass failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=ACCOUNT_PURGE_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+async def get_account_purge_metrics(database) -> Dict[str, Any]:
+    """Queue depth, throughput and totals for the account purge jobs."""
+    by_status = {
+        row["status"]: row["count"]
+        for row in await database.fetch_all(
+            "SELECT status, COUNT(*) AS count FROM account_deletions GROUP BY status"
+        )
+    }
+    now = datetime.utcnow()
+    row = await database.fetch_one("""
+        SELECT
+            EXTRACT(EPOCH FROM (:now - MIN(requested_at) FILTER (WHERE status IN (:pending, :running))))
+                AS oldest_open_seconds,
+            COUNT(*) FILTER (WHERE status = :completed AND completed_at >= :day_ago)
+                AS completed_last_24h,
+            AVG(EXTRACT(EPOCH FROM (completed_at - requested_at))) FILTER (WHERE status = :completed)
+                AS avg_completion_seconds,
+            COALESCE(SUM(scans_deleted), 0) AS scans_deleted,
+            COALESCE(SUM(labels_deleted), 0) AS labels_deleted,
+            COALESCE(SUM(images_queued), 0) AS images_queued,
+            COALESCE(SUM(debug_rows_deleted), 0) AS debug_rows_deleted
+        FROM account_deletions
+    """, {
+        "now": now,
+        "day_ago": now - timedelta(hours=24),
+        "pending": STATUS_PENDING,
+        "running": STATUS_RUNNING,
+        "completed": STATUS_COMPLETED,
+    })
+    image_queue_depth = await database.fetch_val("SELECT COUNT(*) FROM image_purge_queue")
+
+    return {
+        "jobs_by_status": {
+            status: by_status.get(status, 0)
+            for status in (STATUS_PENDING, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED)
+        },
+        "oldest_open_job_seconds": float(row["oldest_open_seconds"]) if row["oldest_open_seconds"] is not None else None,
+        "completed_last_24h": row["completed_last_24h"],
+        "avg_completion_seconds": float(row["avg_completion_seconds"]) if row["avg_completion_seconds"] is not None else None,
+        "totals": {
+            "scans_deleted": row["scans_deleted"],
+            "labels_deleted": row["labels_deleted"],
+            "images_queued": row["images_queued"],
+            "debug_rows_deleted": row["debug_rows_deleted"],
+        },
+        "image_purge_queue_depth": image_queue_depth,
+    }
@@ -0,0 +1,203 @@
+"""
+Sign in with Apple - Identity Token Verification
+
+Verifies Apple identity tokens (RS256 JWTs) locally against Apple's public
+signing keys, so sign-in needs no outbound call in the common path.
+
+Features:
+- JWKS cached in memory and on disk (survives restarts and cold starts)
+- Scheduled background refresh of the key set
+- On-demand refresh when a token carries an unknown `kid` (throttled)
+- Issuer, audience, expiry and subject checks
+
+Configuration:
+    APPLE_BUNDLE_IDS            - Accepted audiences, comma-separated
+                                  (default: io.asgardsolution.ironstag)
+    APPLE_JWKS_CACHE_PATH       - Disk cache location
+    APPLE_JWKS_REFRESH_HOURS    - Scheduled refresh interval (default: 24)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+
+import httpx
+import jwt
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+APPLE_ISSUER = "https://appleid.apple.com"
+APPLE_JWKS_URL = "https://appleid.apple.com/auth/keys"
+
+APPLE_BUNDLE_IDS = [
+    bundle_id.strip()
+    for bundle_id in os.getenv("APPLE_BUNDLE_IDS", "io.asgardsolution.ironstag").split(",")
+    if bundle_id.strip()
+]
+APPLE_JWKS_CACHE_PATH = os.getenv(
+    "APPLE_JWKS_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "iron_stag_apple_jwks.json")
+)
+APPLE_JWKS_REFRESH_SECONDS = int(os.getenv("APPLE_JWKS_REFRESH_HOURS", "24")) * 3600
+
+# Minimum gap between kid-miss refreshes, so forged kids can't make us hammer Apple
+KID_MISS_REFRESH_COOLDOWN_SECONDS = 60
+# Tolerated clock skew when checking exp/iat
+CLOCK_SKEW_SECONDS = 60
+
+
+class AppleTokenError(Exception):
+    """Raised when an Apple identity token cannot be verified."""
+
+
+# ============================================================================
+# JWKS CACHE
+# ============================================================================
+
+class AppleKeyCache:
+    """Apple's signing keys, keyed by `kid`, cached in memory and on disk."""
+
+    def __init__(self, cache_path: str = APPLE_JWKS_CACHE_PATH):
+        self.cache_path = cache_path
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at: float = 0.0
+        self._last_kid_miss_refresh: float = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() - self._fetched_at >= APPLE_JWKS_REFRESH_SECONDS
+
+    def _load_jwks(self, jwks: Dict[str, Any], fetched_at: float):
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            try:
+                keys[jwk["kid"]] = jwt.PyJWK(jwk)
+            except (KeyError, jwt.PyJWKError) as e:
+                logger.warning(f"Skipping unusable Apple JWK: {e}")
+        if keys:
+            self._keys = keys
+            self._fetched_at = fetched_at
+
+    def load_from_disk(self) -> bool:
+        """Warm the in-memory cache from disk. Returns True if keys were loaded."""
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+            self._load_jwks(cached["jwks"], cached["fetched_at"])
+            logger.info(f"Loaded {len(self._keys)} Apple signing keys from disk cache")
+            return bool(self._keys)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Apple JWKS cache: {e}")
+            return False
+
+    def _save_to_disk(self, jwks: Dict[str, Any], fetched_at: float):
+        try:
+            directory = os.path.dirname(self.cache_path) or "."
+            with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as f:
+                json.dump({"fetched_at": fetched_at, "jwks": jwks}, f)
+                tmp_path = f.name
+            os.replace(tmp_path, self.cache_path)  # Atomic swap
+        except Exception as e:
+            logger.warning(f"Failed to write Apple JWKS disk cache: {e}")
+
+    async def refresh(self):
+        """Fetch the current key set from Apple and update both caches."""
+        async with self._lock:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(APPLE_JWKS_URL)
+                response.raise_for_status()
+                jwks = response.json()
+            fetched_at = time.time()
+            self._load_jwks(jwks, fetched_at)
+            self._save_to_disk(jwks, fetched_at)
+            logger.info(f"Refreshed Apple signing keys ({len(self._keys)} keys)")
+
+    async def get_key(self, kid: str) -> jwt.PyJWK:
+        """Return the key for `kid`, refreshing once on a miss or stale cache."""
+        if not self._keys and not self.load_from_disk():
+            await self.refresh()
+
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        # Unknown kid - Apple may have rotated keys
+        now = time.time()
+        if now - self._last_kid_miss_refresh >= KID_MISS_REFRESH_COOLDOWN_SECONDS:
+            self._last_kid_miss_refresh = now
+            await self.refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise AppleTokenError(f"Unknown Apple signing key: {kid}")
+        return key
+
+    async def refresh_periodically(self):
+        """Background task: keep the key set fresh on a schedule."""
+        while True:
+            try:
+                if self.is_stale:
+                    await self.refresh()
+            except Exception as e:
+                logger.warning(f"Scheduled Apple JWKS refresh failed: {e}")
+            await asyncio.sleep(min(APPLE_JWKS_REFRESH_SECONDS, 3600))
+
+
+apple_key_cache = AppleKeyCache()
+
+
+# ============================================================================
+# VERIFICATION
+# ============================================================================
+
+async def verify_identity_token(identity_token: str, expected_subject: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Verify an Apple identity token and return its claims.
+
+    Checks signature, issuer, audience (our bundle IDs), expiry and,
+    if given, that `sub` matches the Apple user identifier sent by the app.
+
+    Raises:
+        AppleTokenError: If the token is invalid for any reason
+    """
+    try:
+        header = jwt.get_unverified_header(identity_token)
+    except jwt.InvalidTokenError as e:
+        raise AppleTokenError(f"Malformed identity token: {e}")
+
+    kid = header.get("kid")
+    if not kid:
+        raise AppleTokenError("Identity token has no key id")
+
+    try:
+        key = await apple_key_cache.get_key(kid)
+    except httpx.HTTPError as e:
+        raise AppleTokenError(f"Apple signing keys unavailable: {e}")
+
+    try:
+        claims = jwt.decode(
+            identity_token,
+            key=key.key,
+            algorithms=["RS256"],
+            audience=APPLE_BUNDLE_IDS,
+            issuer=APPLE_ISSUER,
+            leeway=CLOCK_SKEW_SECONDS,
+            options={"require": ["exp", "iat", "sub"]},
+        )
+    except jwt.InvalidTokenError as e:
+        raise AppleTokenError(f"Invalid identity token: {e}")
+
+    if expected_subject is not None and claims["sub"] != expected_subject:
+        raise AppleTokenError("Identity token subject does not match user")
+
+    return claims
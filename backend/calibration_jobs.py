@@ -13,7 +13,7 @@ Calibration Version: v2-curve-*
 import os
 import json
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from enum import Enum
@@ -607,7 +607,8 @@ async def recalibrate_scans(
     curve_version: Optional[str] = None,
     since: Optional[datetime] = None,
     region: Optional[str] = None,
-    dry_run: bool = False
+    dry_run: bool = False,
+    next_change_seq: Optional[Callable[[str], tuple]] = None
 ) -> RecalibrationResult:
     """
     Recalibrate existing scans using active curves.
@@ -625,6 +626,8 @@ async def recalibrate_scans(
         since: Only recalibrate scans created after this date
         region: Only recalibrate scans in this region
         dry_run: If True, don't update database
+        next_change_seq: server.next_change_seq - gives each updated scan a
+            change number so /scans/changes sends it to devices
         
     Returns:
         RecalibrationResult with statistics
@@ -775,8 +778,13 @@ async def recalibrate_scans(
                         age_uncertain=age_uncertain,
                         calibration_version=final_version,
                         calibration_strategy=age_strategy,
-                        calibration_fallback_reason=age_fallback_reason
+                        calibration_fallback_reason=age_fallback_reason,
+                        updated_at=datetime.utcnow()
                     )
+                    if next_change_seq:
+                        # /scans/changes pages by change_seq, not updated_at
+                        seq, change_seq = next_change_seq(scan["user_id"])
+                        update_query = update_query.values(change_seq=change_seq).add_cte(seq)
                     await database.execute(update_query)
                 
                 result.scans_updated += 1
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Database Performance Benchmark CLI
+
+Seeds a throwaway schema in a scratch PostgreSQL database and compares the
+latency of legacy query shapes against their indexed replacements.
+
+Features:
+- Synthetic data generated server-side (generate_series) for fast seeding
+- Runs in an isolated schema that is dropped afterwards (unless --keep)
+- Reports p50 / p95 / mean latency per query shape
+
+Usage:
+    python -m cli.benchmarks login --users 1000000
+    python -m cli.benchmarks scans --scans-per-user 20000
+    python -m cli.benchmarks serialize --page-size 100
+    python -m cli.benchmarks search --scans-per-user 5000
+
+Environment:
+    BENCH_DATABASE_URL - Scratch PostgreSQL database (NEVER point at production)
+                         Not needed by 'serialize', which runs in-process
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+try:
+    import psycopg2
+except ImportError:
+    print("❌ Error: 'psycopg2' library required. Install with: pip install psycopg2-binary")
+    sys.exit(1)
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+DATABASE_URL = os.environ.get("BENCH_DATABASE_URL", "")
+BENCH_SCHEMA = "iron_stag_bench"
+
+# ANSI color codes for terminal output
+class Colors:
+    HEADER = '\033[95m'
+    BLUE = '\033[94m'
+    CYAN = '\033[96m'
+    GREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+    DIM = '\033[2m'
+
+
+def color(text: str, color_code: str) -> str:
+    """Apply color to text if terminal supports it."""
+    if sys.stdout.isatty():
+        return f"{color_code}{text}{Colors.ENDC}"
+    return text
+
+
+def print_header(text: str):
+    """Print a formatted header."""
+    print(f"\n{color('═' * 60, Colors.CYAN)}")
+    print(color(f"  {text}", Colors.BOLD))
+    print(f"{color('═' * 60, Colors.CYAN)}\n")
+
+
+def print_error(text: str):
+    """Print an error message."""
+    print(color(f"❌ {text}", Colors.FAIL))
+
+
+def print_info(text: str):
+    """Print an info message."""
+    print(color(f"ℹ️  {text}", Colors.BLUE))
+
+
+# ============================================================================
+# HARNESS
+# ============================================================================
+
+def connect():
+    """Connect to the scratch database and switch to the benchmark schema."""
+    if not DATABASE_URL:
+        print_error("BENCH_DATABASE_URL is not set")
+        sys.exit(1)
+
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+        cur.execute(f"SET search_path TO {BENCH_SCHEMA}")
+    return conn
+
+
+def teardown(conn, keep: bool):
+    """Drop the benchmark schema unless asked to keep it."""
+    if not keep:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    conn.close()
+
+
+def time_queries(run: Callable[[], None], iterations: int) -> Dict[str, float]:
+    """Run a callable repeatedly and return latency stats in milliseconds."""
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def print_results(results: Dict[str, Dict[str, float]]):
+    """Print a latency table."""
+    print(f"  {'Query':<40} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}")
+    print(f"  {'-' * 40} {'-' * 9} {'-' * 9} {'-' * 9}")
+    for name, stats in results.items():
+        print(f"  {name:<40} {stats['p50']:>9.2f} {stats['p95']:>9.2f} {stats['mean']:>9.2f}")
+    print()
+
+
+def import_server():
+    """Import the API module (needs the API environment, e.g. backend/.env)."""
+    try:
+        import server
+    except Exception as e:
+        print_error(f"Could not import server (run from backend/ with its .env): {e}")
+        sys.exit(1)
+    return server
+
+
+# ============================================================================
+# COMMAND HANDLERS
+# ============================================================================
+
+def cmd_login(args):
+    """Handle 'login' command - legacy two-query login vs unified lookup."""
+    print_header(f"Login Lookup Benchmark ({args.users:,} users)")
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            print_info("Seeding users...")
+            cur.execute("""
+                CREATE TABLE users (
+                    id VARCHAR(36) PRIMARY KEY,
+                    email VARCHAR(255) UNIQUE NOT NULL,
+                    password TEXT NOT NULL,
+                    name VARCHAR(255),
+                    username VARCHAR(100) UNIQUE,
+                    apple_user_id VARCHAR(100),
+                    created_at TIMESTAMP DEFAULT NOW()
+                )
+            """)
+            cur.execute("""
+                INSERT INTO users (id, email, password, name, username)
+                SELECT md5(g::text), 'hunter' || g || '@example.com', 'x',
+                       'Hunter ' || g, 'Hunter' || g
+                FROM generate_series(1, %s) AS g
+            """, (args.users,))
+            cur.execute("ANALYZE users")
+
+            def pick() -> int:
+                return random.randint(1, args.users)
+
+            def legacy(identifier: str):
+                cur.execute("SELECT * FROM users WHERE email = %s", (identifier,))
+                if cur.fetchone() is None:
+                    cur.execute("SELECT * FROM users WHERE lower(username) = %s", (identifier,))
+                    cur.fetchone()
+
+            def unified(identifier: str):
+                cur.execute("""
+                    SELECT * FROM users
+                    WHERE lower(email) = %(i)s OR lower(username) = %(i)s
+                    ORDER BY CASE WHEN lower(email) = %(i)s THEN 0 ELSE 1 END
+                    LIMIT 1
+                """, {"i": identifier})
+                cur.fetchone()
+
+            results = {
+                "legacy: email login": time_queries(
+                    lambda: legacy(f"hunter{pick()}@example.com"), args.iterations),
+                "legacy: username login": time_queries(
+                    lambda: legacy(f"hunter{pick()}"), args.iterations),
+            }
+
+            print_info("Creating functional indexes...")
+            cur.execute("CREATE INDEX idx_users_email_lower ON users (lower(email))")
+            cur.execute("CREATE INDEX idx_users_username_lower ON users (lower(username))")
+            cur.execute("ANALYZE users")
+
+            results["unified: email login"] = time_queries(
+                lambda: unified(f"hunter{pick()}@example.com"), args.iterations)
+            results["unified: username login"] = time_queries(
+                lambda: unified(f"hunter{pick()}"), args.iterations)
+
+            print_results(results)
+    finally:
+        teardown(conn, args.keep)
+
+
+def cmd_scans(args):
+    """Handle 'scans' command - OFFSET paging vs keyset (cursor) paging."""
+    total = args.users * args.scans_per_user
+    print_header(f"Scan History Paging Benchmark ({args.scans_per_user:,} scans/user, {total:,} total)")
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            print_info("Seeding scans...")
+            cur.execute("""
+                CREATE TABLE scans (
+                    id VARCHAR(36) PRIMARY KEY,
+                    user_id VARCHAR(36) NOT NULL,
+                    deer_age FLOAT,
+                    recommendation VARCHAR(50),
+                    reasoning TEXT,
+                    raw_response JSON,
+                    created_at TIMESTAMP
+                )
+            """)
+            cur.execute("""
+                INSERT INTO scans (id, user_id, deer_age, recommendation, reasoning, raw_response, created_at)
+                SELECT md5(u::text || '-' || s::text), 'user-' || u, (s %% 8) + 0.5,
+                       CASE WHEN s %% 2 = 0 THEN 'HARVEST' ELSE 'PASS' END,
+                       repeat('Mature buck with heavy mass. ', 10),
+                       '{"deer_age": 4.5, "recommendation": "HARVEST"}'::json,
+                       TIMESTAMP '2025-01-01' + (s || ' minutes')::interval
+                FROM generate_series(1, %s) AS u, generate_series(1, %s) AS s
+            """, (args.users, args.scans_per_user))
+            cur.execute("ANALYZE scans")
+
+            user_id = "user-1"
+            pages = args.scans_per_user // args.page_size
+
+            def offset_page(page: int):
+                cur.execute("""
+                    SELECT * FROM scans WHERE user_id = %s
+                    ORDER BY created_at DESC LIMIT %s OFFSET %s
+                """, (user_id, args.page_size, page * args.page_size))
+                cur.fetchall()
+
+            # Precompute the cursor at each page boundary so keyset timings
+            # measure the page fetch alone
+            cur.execute("""
+                SELECT created_at, id FROM scans WHERE user_id = %s
+                ORDER BY created_at DESC, id DESC
+            """, (user_id,))
+            rows = cur.fetchall()
+            cursors = [None] + [rows[p * args.page_size - 1] for p in range(1, pages)]
+
+            def keyset_page(page: int):
+                if cursors[page] is None:
+                    cur.execute("""
+                        SELECT * FROM scans WHERE user_id = %s
+                        ORDER BY created_at DESC, id DESC LIMIT %s
+                    """, (user_id, args.page_size + 1))
+                else:
+                    cur.execute("""
+                        SELECT * FROM scans WHERE user_id = %s AND (created_at, id) < (%s, %s)
+                        ORDER BY created_at DESC, id DESC LIMIT %s
+                    """, (user_id, *cursors[page], args.page_size + 1))
+                cur.fetchall()
+
+            first, deep = 0, pages - 1
+            results = {
+                "offset, no index: first page": time_queries(lambda: offset_page(first), args.iterations),
+                "offset, no index: deepest page": time_queries(lambda: offset_page(deep), args.iterations),
+            }
+
+            print_info("Creating composite index...")
+            cur.execute("CREATE INDEX idx_scans_user_created_id ON scans(user_id, created_at DESC, id DESC)")
+            cur.execute("ANALYZE scans")
+
+            results["offset, indexed: first page"] = time_queries(lambda: offset_page(first), args.iterations)
+            results["offset, indexed: deepest page"] = time_queries(lambda: offset_page(deep), args.iterations)
+            results["keyset, indexed: first page"] = time_queries(lambda: keyset_page(first), args.iterations)
+            results["keyset, indexed: deepest page"] = time_queries(lambda: keyset_page(deep), args.iterations)
+
+            print_results(results)
+    finally:
+        teardown(conn, args.keep)
+
+
+def cmd_serialize(args):
+    """Handle 'serialize' command - pydantic response path vs lean one-pass encoder."""
+    print_header(f"Scan Page Serialization Benchmark ({args.page_size} scans/page)")
+
+    # Imported here so the database benchmarks don't need the API environment
+    import json
+    from datetime import datetime, timedelta
+    from pydantic import TypeAdapter
+    server = import_server()
+    from scan_serialization import ORJSON_AVAILABLE, dumps, scan_response_fields
+
+    now = datetime.utcnow()
+    rows = []
+    for i in range(args.page_size):
+        row = {column.name: None for column in server.scans_table.columns}
+        row.update({
+            "id": f"scan-{i:06d}",
+            "user_id": "user-1",
+            "local_image_id": f"local-{i}",
+            "deer_age": 4.5,
+            "deer_type": "Whitetail",
+            "deer_sex": "Buck",
+            "antler_points": 8,
+            "antler_points_left": 4,
+            "antler_points_right": 4,
+            "body_condition": "Good",
+            "confidence": 82,
+            "recommendation": "HARVEST" if i % 2 else "PASS",
+            "reasoning": "Heavy mass, deep chest and a sagging belly indicate a mature buck. " * 3,
+            "notes": "Trail cam 3",
+            "created_at": now - timedelta(minutes=i),
+            "age_confidence": 74,
+            "recommendation_confidence": 82,
+            "age_uncertain": False,
+            "calibration_version": "v2-region-heuristic",
+            "is_favorite": i % 5 == 0,
+            "tags": ["food plot", "rut"],
+            "raw_response": {"deer_age": 4.5, "reasoning": "x" * 2000},
+            "quality_factors": {"blur_score": 0.1, "lighting": "good"},
+        })
+        rows.append(row)
+
+    adapter = TypeAdapter(List[server.DeerAnalysisResponse])
+    lean_rows = [{name: row[name] for name in server.SCAN_RESPONSE_COLUMNS} for row in rows]
+
+    def pydantic_path():
+        # What the routes did before: build models, then FastAPI re-validates
+        # them against response_model and encodes with json.dumps
+        models = [server.build_scan_response(row) for row in rows]
+        validated = adapter.validate_python([m.model_dump() for m in models])
+        json.dumps(adapter.dump_python(validated, mode="json")).encode("utf-8")
+
+    def lean_path():
+        dumps([scan_response_fields(row) for row in lean_rows])
+
+    print_info(f"Encoder: {'orjson' if ORJSON_AVAILABLE else 'stdlib json'}")
+    results = {
+        "pydantic models + response_model": time_queries(pydantic_path, args.iterations),
+        "lean projection + one-pass encode": time_queries(lean_path, args.iterations),
+    }
+    print_results(results)
+
+
+def plan_nodes(plan: dict):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def cmd_search(args):
+    """Handle 'search' command - check /scans/search query plans and latency."""
+    total = args.users * args.scans_per_user
+    print_header(f"Scan Search Plan Check ({args.scans_per_user:,} scans/user, {total:,} total)")
+
+    # The real table definitions and query builder, so schema or query drift
+    # shows up here as a plan regression
+    from datetime import datetime
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateTable
+    server = import_server()
+    dialect = postgresql.psycopg2.dialect()
+
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            print_info("Seeding scans...")
+            for table in (server.scans_table, server.scan_tags_table):
+                cur.execute(str(CreateTable(table).compile(dialect=dialect)))
+            cur.execute("""
+                INSERT INTO scans (id, user_id, local_image_id, deer_age, deer_sex, deer_type,
+                                   antler_points, recommendation, region_key, notes, reasoning,
+                                   is_favorite, created_at, updated_at)
+                SELECT md5(u::text || '-' || s::text), 'user-' || u, 'local-' || s,
+                       CASE WHEN s %% 10 = 0 THEN NULL WHEN s %% 40 = 1 THEN 7.5 ELSE (s %% 6) + 0.5 END,
+                       CASE WHEN s %% 3 = 0 THEN 'Doe' ELSE 'Buck' END,
+                       CASE WHEN s %% 7 = 0 THEN 'Mule Deer' ELSE 'Whitetail' END,
+                       s %% 12,
+                       CASE WHEN s %% 4 = 0 THEN 'HARVEST' ELSE 'PASS' END,
+                       (ARRAY['midwest', 'southeast', 'northeast', 'plains', 'south_texas', 'northern'])[s %% 6 + 1],
+                       CASE WHEN s %% 97 = 0 THEN 'Chasing does along the creek bottom' ELSE 'Trail cam 3' END,
+                       'Heavy mass, deep chest and a sagging belly indicate a mature buck.',
+                       s %% 50 = 0,
+                       TIMESTAMP '2025-01-01' + (s || ' minutes')::interval,
+                       TIMESTAMP '2025-01-01' + (s || ' minutes')::interval
+                FROM generate_series(1, %s) AS u, generate_series(1, %s) AS s
+            """, (args.users, args.scans_per_user))
+            cur.execute("""
+                INSERT INTO scan_tags (scan_id, tag, user_id)
+                SELECT id, 'rut', user_id FROM scans WHERE antler_points % 5 = 0
+                UNION ALL
+                SELECT id, 'scrape', user_id FROM scans WHERE antler_points % 2 = 0
+            """)
+
+            print_info("Creating indexes...")
+            # The statements the API runs at startup, so the check can't drift from them
+            for index_sql in [
+                server.SCAN_HISTORY_INDEX, server.SCAN_TAGS_INDEX, server.SCAN_FAVORITES_INDEX,
+                *server.SCAN_SEARCH_INDEXES,
+            ]:
+                cur.execute(index_sql)
+            cur.execute("ANALYZE")
+
+            user_id = "user-1"
+            # The query shapes the app sends, each with the index its plan
+            # must use - losing it is a regression even without a Seq Scan
+            cases = {
+                "newest first": ({}, "idx_scans_user_created_id"),
+                "recommendation": ({"recommendation": "HARVEST"}, "idx_scans_user_reco_created"),
+                "region": ({"region_key": "plains"}, "idx_scans_user_region_created"),
+                "mature age": ({"min_age": 7, "max_age": 8}, "idx_scans_user_age"),
+                "sex + points": ({"deer_sex": "buck", "min_points": 8}, "idx_scans_user_created_id"),
+                "date range": ({"date_from": datetime(2025, 1, 2), "date_to": datetime(2025, 1, 3)},
+                               "idx_scans_user_created_id"),
+                "tag": ({"tags": ["rut"]}, "idx_scan_tags_user_tag"),
+                "two tags": ({"tags": ["rut", "scrape"]}, "idx_scan_tags_user_tag"),
+                "favorites": ({"favorite": True}, "idx_scans_user_favorite_created"),
+                "text": ({"text": "creek"}, "idx_scans_search_document"),
+                "text + recommendation": ({"text": "creek", "recommendation": "PASS"},
+                                          "idx_scans_search_document"),
+                "deep page": ({"after": (datetime(2025, 1, 1, 1), "0")}, "idx_scans_user_created_id"),
+            }
+
+            regressions = []
+            results = {}
+            for name, (filters, expected) in cases.items():
+                compiled = server.build_scan_search_query(
+                    user_id, limit=args.page_size, **filters
+                ).compile(dialect=dialect)
+                sql, params = str(compiled), compiled.params
+
+                cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                nodes = list(plan_nodes(cur.fetchone()[0][0]["Plan"]))
+                seq_scans = [n for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") == "scans"]
+                indexes = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+                if seq_scans:
+                    regressions.append(name)
+                    print(color(f"  ✗ {name:<24} Seq Scan on scans", Colors.FAIL))
+                elif expected not in indexes:
+                    regressions.append(name)
+                    print(color(f"  ✗ {name:<24} {expected} not used ({', '.join(indexes)})", Colors.FAIL))
+                else:
+                    print(color(f"  ✓ {name:<24} {', '.join(indexes)}", Colors.GREEN))
+
+                def run(sql=sql, params=params):
+                    cur.execute(sql, params)
+                    cur.fetchall()
+                results[name] = time_queries(run, args.iterations)
+
+            print()
+            print_results(results)
+
+            if regressions:
+                print_error(f"Plan regression: {', '.join(regressions)}")
+                sys.exit(1)
+    finally:
+        teardown(conn, args.keep)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Database Performance Benchmark CLI",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  BENCH_DATABASE_URL=postgresql://localhost/bench python -m cli.benchmarks login
+  python -m cli.benchmarks login --users 1000000 --iterations 500
+  python -m cli.benchmarks scans --users 50 --scans-per-user 20000
+  python -m cli.benchmarks search --users 100 --scans-per-user 5000
+        """
+    )
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schema afterwards")
+
+    subparsers = parser.add_subparsers(dest="command", help="Available benchmarks")
+
+    # Login command
+    login_parser = subparsers.add_parser("login", help="Login identity lookup latency")
+    login_parser.add_argument("--users", type=int, default=1_000_000, help="Number of users to seed")
+    login_parser.add_argument("--iterations", type=int, default=200, help="Lookups per query shape")
+    login_parser.set_defaults(func=cmd_login)
+
+    # Scans command
+    scans_parser = subparsers.add_parser("scans", help="Scan history paging latency")
+    scans_parser.add_argument("--users", type=int, default=50, help="Number of users to seed")
+    scans_parser.add_argument("--scans-per-user", type=int, default=10_000, help="Scans seeded per user")
+    scans_parser.add_argument("--page-size", type=int, default=50, help="Scans per page")
+    scans_parser.add_argument("--iterations", type=int, default=100, help="Fetches per query shape")
+    scans_parser.set_defaults(func=cmd_scans)
+
+    # Serialize command
+    serialize_parser = subparsers.add_parser("serialize", help="Scan page JSON serialization cost")
+    serialize_parser.add_argument("--page-size", type=int, default=100, help="Scans per page")
+    serialize_parser.add_argument("--iterations", type=int, default=500, help="Pages serialized per path")
+    serialize_parser.set_defaults(func=cmd_serialize)
+
+    # Search command
+    search_parser = subparsers.add_parser("search", help="Scan search query plans and latency")
+    search_parser.add_argument("--users", type=int, default=100, help="Number of users to seed")
+    search_parser.add_argument("--scans-per-user", type=int, default=5_000, help="Scans seeded per user")
+    search_parser.add_argument("--page-size", type=int, default=50, help="Scans per page")
+    search_parser.add_argument("--iterations", type=int, default=50, help="Fetches per query shape")
+    search_parser.set_defaults(func=cmd_search)
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(0)
+
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Content-Addressed Scan Image Assets
+
+Scan images are stored once per distinct upload. image_assets has a row per
+stored image, found by the SHA-256 of the uploaded bytes, counting the scans
+that point at it (scans.image_asset_id).
+
+Features:
+- Identical uploads (scanning the same photo again, re-uploads from another
+  device) reuse the stored objects - no encode, no put_object
+- Reference counted: releasing the last scan deletes the row and queues its
+  objects for the image purge worker, in the caller's transaction
+- Object keys are recorded on the row, so deletes never probe extensions
+- Keys are per row (images/<asset_id>[_<rendition>].<ext>), not the bare hash,
+  so content purged and later uploaded again never reuses keys that may still
+  be in the purge queue
+"""
+
+import json
+import uuid
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from image_processing import process_image_async
+from r2_storage import EXTENSIONS, R2_ENABLED, object_url, put_image_objects, run_in_r2_executor
+
+logger = logging.getLogger(__name__)
+
+# Object key columns -> the scans URL column each one backs
+ASSET_KEY_COLUMNS = {
+    "object_key": "image_url",
+    "thumbnail_key": "thumbnail_url",
+    "preview_key": "preview_url",
+}
+
+
+def content_hash(image_bytes: bytes) -> str:
+    """SHA-256 of the uploaded bytes (hex) - the asset's identity."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def asset_keys(asset: Dict[str, Any]) -> List[str]:
+    """Every object key stored for an asset."""
+    return [asset[column] for column in ASSET_KEY_COLUMNS if asset.get(column)]
+
+
+def asset_urls(asset: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """The scans image URL columns for an asset."""
+    return {
+        url_column: object_url(asset[key_column]) if asset.get(key_column) else None
+        for key_column, url_column in ASSET_KEY_COLUMNS.items()
+    }
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class ImageAssetStore:
+    """Stores scan images by content and tracks the scans referencing them."""
+
+    def __init__(self, database, table, image_purger):
+        self.database = database
+        self.table = table
+        self.image_purger = image_purger
+        self.reused = 0
+        self.stored = 0
+
+    async def acquire(self, image_bytes: bytes, content_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Take a reference to the asset for these bytes, storing it if new.
+
+        The caller owns the reference: point a scan at the asset, or hand it
+        back with release() if the scan isn't saved.
+
+        Returns:
+            The image_assets row, or None if the image couldn't be stored
+        """
+        table = self.table
+        # hashlib releases the GIL on large inputs
+        digest = await asyncio.to_thread(content_hash, image_bytes)
+
+        # Rows only exist while referenced (release deletes them at zero),
+        # so a match here is safe to reuse
+        row = await self.database.fetch_one(
+            table.update().where(table.c.content_hash == digest)
+            .values(ref_count=table.c.ref_count + 1)
+            .returning(*table.c)
+        )
+        if row:
+            self.reused += 1
+            logger.info(f"Image asset {row['id']} reused ({row['ref_count']} references)")
+            return dict(row)
+
+        if not R2_ENABLED:
+            return None
+
+        renditions, stats = await process_image_async(image_bytes, content_type)
+        asset_id = str(uuid.uuid4())
+        keys = await run_in_r2_executor(put_image_objects, f"images/{asset_id}", renditions)
+        if not keys:
+            return None
+
+        full_type = renditions["full"][1]
+        row = await self.database.fetch_one(
+            pg_insert(table).values(
+                id=asset_id,
+                content_hash=digest,
+                object_key=keys["full"],
+                thumbnail_key=keys.get("thumbnail"),
+                preview_key=keys.get("preview"),
+                extension=EXTENSIONS.get(full_type, "jpg"),
+                content_type=full_type,
+                byte_size=len(renditions["full"][0]),
+                width=stats.get("width"),
+                height=stats.get("height"),
+                blurhash=stats.get("blurhash"),
+                ref_count=1,
+                created_at=datetime.utcnow(),
+            ).on_conflict_do_update(
+                index_elements=["content_hash"],
+                set_={"ref_count": table.c.ref_count + 1},
+            ).returning(*table.c)
+        )
+        if row["id"] != asset_id:
+            # A concurrent upload of the same bytes got there first - drop our copy
+            logger.info(f"Image asset {row['id']} stored concurrently, discarding duplicate objects")
+            await self.image_purger.enqueue(keys.values())
+            self.image_purger.wake()
+        else:
+            self.stored += 1
+        return dict(row)
+
+    async def release(self, asset_ids: Iterable[Optional[str]]) -> int:
+        """
+        Drop one reference per id (repeat an id to drop several). Assets left
+        unreferenced are deleted and their objects queued for purging.
+
+        Must run inside the transaction that removes the references - call
+        image_purger.wake() once it commits.
+
+        Returns:
+            Number of object keys queued
+        """
+        counts = Counter(asset_id for asset_id in asset_ids if asset_id)
+        if not counts:
+            return 0
+
+        name = self.table.name
+        params = {"counts": json.dumps(counts)}
+        await self.database.execute(f"""
+            UPDATE {name} SET ref_count = {name}.ref_count - released.n
+            FROM (
+                SELECT key AS id, value::int AS n FROM jsonb_each_text(CAST(:counts AS jsonb))
+            ) AS released
+            WHERE {name}.id = released.id
+        """, params)
+        purged = await self.database.fetch_all(f"""
+            DELETE FROM {name}
+            WHERE id IN (SELECT jsonb_object_keys(CAST(:counts AS jsonb))) AND ref_count <= 0
+            RETURNING {", ".join(ASSET_KEY_COLUMNS)}
+        """, params)
+
+        keys = [key for row in purged for key in asset_keys(dict(row))]
+        await self.image_purger.enqueue(keys)
+        return len(keys)
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Stored assets, references and upload dedupe counts since startup."""
+        row = await self.database.fetch_one(f"""
+            SELECT COUNT(*) AS assets,
+                   COALESCE(SUM(ref_count), 0) AS scan_references,
+                   COALESCE(SUM(byte_size), 0) AS stored_bytes,
+                   COALESCE(SUM(byte_size * (ref_count - 1)), 0) AS deduplicated_bytes
+            FROM {self.table.name}
+        """)
+        return {
+            **dict(row),
+            "uploads_stored": self.stored,
+            "uploads_reused": self.reused,
+        }
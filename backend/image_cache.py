@@ -0,0 +1,261 @@
+"""
+Stored Scan Image Cache
+
+Re-analysis reads a scan's stored image back from R2 instead of making the
+app upload it again. Recently read images are kept locally, so repeated
+edits of the same scan don't repeat the GET.
+
+Features:
+- Two tiers: an in-memory LRU, then an LRU directory on local disk
+- Both bounded by bytes; least recently used entries are evicted first
+- Keyed by object key - stored objects are never rewritten in place, so
+  entries can't go stale (deleted scans simply stop asking for them)
+- Concurrent misses for the same key share one R2 read, run as its own
+  task - a cancelled request never strands the others waiting on it
+- Disk entries survive restarts; the disk index is rebuilt from file mtimes
+- Metrics: hits per tier, misses, and bytes held
+
+Configuration:
+    IMAGE_CACHE_DIR        - Disk cache directory
+    IMAGE_CACHE_MEMORY_MB  - Memory tier size (default: 32)
+    IMAGE_CACHE_DISK_MB    - Disk tier size, 0 to disable it (default: 512)
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from r2_storage import EXTENSIONS, read_object_async
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+IMAGE_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "iron_stag_image_cache")
+)
+IMAGE_CACHE_MEMORY_BYTES = int(float(os.getenv("IMAGE_CACHE_MEMORY_MB", "32")) * 1024 * 1024)
+IMAGE_CACHE_DISK_BYTES = int(float(os.getenv("IMAGE_CACHE_DISK_MB", "512")) * 1024 * 1024)
+
+# File extension -> content type (the key's extension is the stored format)
+CONTENT_TYPES = {ext: content_type for content_type, ext in EXTENSIONS.items()}
+
+
+def content_type_for_key(object_key: str) -> str:
+    """Content type of a stored object, from its key's extension."""
+    return CONTENT_TYPES.get(object_key.rsplit(".", 1)[-1].lower(), "image/jpeg")
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class ImageCache:
+    """Memory and disk LRU of stored images, read through from R2."""
+
+    def __init__(
+        self,
+        directory: str = IMAGE_CACHE_DIR,
+        memory_bytes: int = IMAGE_CACHE_MEMORY_BYTES,
+        disk_bytes: int = IMAGE_CACHE_DISK_BYTES,
+    ):
+        self.directory = directory
+        self.memory_limit = memory_bytes
+        self.disk_limit = disk_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # file name -> size
+        self._disk_bytes = 0
+        self._disk_loaded = False
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ---------------------------------------------------------------- memory
+
+    def _memory_get(self, object_key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(object_key)
+            if data is not None:
+                self._memory.move_to_end(object_key)
+            return data
+
+    def _memory_put(self, object_key: str, data: bytes):
+        if len(data) > self.memory_limit:
+            return
+        with self._lock:
+            previous = self._memory.pop(object_key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[object_key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.memory_limit:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    # ------------------------------------------------------------------ disk
+
+    @staticmethod
+    def _file_name(object_key: str) -> str:
+        return hashlib.sha256(object_key.encode()).hexdigest()
+
+    def _load_disk_index(self):
+        """Index the cache directory, oldest use first (called with the lock held)."""
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        except OSError as e:
+            logger.warning(f"Image disk cache unavailable, using memory only: {e}")
+            self.disk_limit = 0
+            return
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self._disk_bytes += size
+        if entries:
+            logger.info(f"Image disk cache: {len(entries)} file(s), {self._disk_bytes / 1024 / 1024:.1f}MB")
+
+    def _disk_get(self, object_key: str) -> Optional[bytes]:
+        if self.disk_limit <= 0:
+            return None
+        name = self._file_name(object_key)
+        with self._lock:
+            self._load_disk_index()
+            if name not in self._disk:
+                return None
+            self._disk.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mtime orders the index after a restart
+            return data
+        except OSError:
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(name, 0)
+            return None
+
+    def _disk_put(self, object_key: str, data: bytes):
+        if len(data) > self.disk_limit:
+            return
+        name = self._file_name(object_key)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            self._load_disk_index()
+            if self.disk_limit <= 0 or name in self._disk:
+                return
+        try:
+            with tempfile.NamedTemporaryFile("wb", dir=self.directory, suffix=".tmp", delete=False) as f:
+                f.write(data)
+                tmp_path = f.name
+            os.replace(tmp_path, path)  # Atomic swap - readers never see a partial file
+        except OSError as e:
+            logger.warning(f"Failed to write image disk cache: {e}")
+            return
+
+        evicted = []
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(name, 0)
+            self._disk[name] = len(data)
+            self._disk_bytes += len(data)
+            while self._disk_bytes > self.disk_limit:
+                old_name, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old_name))
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------- api
+
+    def _read_local(self, object_key: str) -> Optional[bytes]:
+        """Disk lookup, promoting a hit into memory (runs in a thread)."""
+        data = self._disk_get(object_key)
+        if data is not None:
+            self._memory_put(object_key, data)
+        return data
+
+    def _store(self, object_key: str, data: bytes):
+        """Add a freshly read object to both tiers (runs in a thread)."""
+        self._memory_put(object_key, data)
+        self._disk_put(object_key, data)
+
+    async def _fetch(self, object_key: str) -> Optional[bytes]:
+        data = await asyncio.to_thread(self._read_local, object_key)
+        if data is not None:
+            self.disk_hits += 1
+            return data
+
+        self.misses += 1
+        stored = await read_object_async(object_key)
+        if stored is None:
+            return None
+        data = stored[0]
+        await asyncio.to_thread(self._store, object_key, data)
+        return data
+
+    async def get(self, object_key: str) -> Optional[Tuple[bytes, str]]:
+        """
+        A stored object's bytes, from memory, disk, or R2 (caching the read).
+
+        Returns:
+            Tuple of (bytes, content_type), or None if the object doesn't exist
+        """
+        data = self._memory_get(object_key)
+        if data is not None:
+            self.memory_hits += 1
+        else:
+            task = self._inflight.get(object_key)
+            if task is None:
+                task = asyncio.create_task(self._fetch(object_key))
+                self._inflight[object_key] = task
+                task.add_done_callback(lambda done: self._fetch_done(object_key, done))
+            # Shielded: cancelling one caller leaves the read running for the rest
+            data = await asyncio.shield(task)
+        if data is None:
+            return None
+        return data, content_type_for_key(object_key)
+
+    def _fetch_done(self, object_key: str, task: asyncio.Task):
+        if self._inflight.get(object_key) is task:
+            del self._inflight[object_key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved - callers (if any are left) re-raise it
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Hit rates and bytes held per tier since startup."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_limit_bytes": self.memory_limit,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "disk_limit_bytes": self.disk_limit,
+            }
+
+
+scan_image_cache = ImageCache()
@@ -0,0 +1,493 @@
+"""
+Scan Image Processing
+
+Decodes uploaded scan images and encodes the set of renditions we store.
+Encoding is CPU-bound, so uploads run it in a process pool - on the event
+loop it would stall every request, and in a thread it would hold the GIL.
+
+Features:
+- EXIF orientation applied before resizing (phone photos are stored upright)
+- Full image encoded to a size target: the highest quality that fits
+  IMAGE_MAX_FILE_SIZE_KB, found by binary search, trying each format in turn
+- JPEG, WebP and AVIF (when this Pillow build supports them)
+- Thumbnail and preview renditions from the same decode
+- BlurHash placeholder string (~28 chars) from the thumbnail, so lists can
+  paint a blurred preview before any image downloads
+- Untrusted images are only ever decoded in worker processes: a job whose
+  worker dies is retried once in a worker of its own, then fails
+- Metrics: CPU time and bytes saved per image
+
+Configuration:
+    IMAGE_FORMATS          - Formats tried for the full image, in order (default: jpeg)
+    IMAGE_MAX_FILE_SIZE_KB - Size target for the full image (default: 500)
+    IMAGE_PROCESS_WORKERS  - Process pool size (default: CPU count, at most 4)
+    R2_RENDITION_FORMAT    - Format for thumbnail/preview renditions (default: jpeg)
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+from io import BytesIO
+
+import numpy as np
+
+# Image processing for compression
+try:
+    from PIL import Image, ImageOps, features
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logging.warning("PIL not available - image compression disabled")
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+MAX_IMAGE_DIMENSION = 1920  # Max width or height
+JPEG_QUALITY = 85  # Starting (highest) quality for the full image (1-100)
+MIN_QUALITY = 50  # Never go below this to hit the size target
+QUALITY_SEARCH_STEPS = 4  # Encodes spent searching between MIN_QUALITY and JPEG_QUALITY
+AVIF_SPEED = 8  # libavif speed (0-10) - the default is several times slower for little gain
+MAX_FILE_SIZE_KB = int(os.getenv("IMAGE_MAX_FILE_SIZE_KB", "500"))  # Target max file size in KB
+
+# Smaller renditions stored next to the full image: (name, max dimension).
+# History lists load the thumbnail, the detail view the full image.
+SCAN_IMAGE_RENDITIONS = (
+    ("thumbnail", 256),
+    ("preview", 768),
+)
+RENDITION_QUALITY = 80
+
+# BlurHash: the thumbnail is reduced to at most this size before the
+# transform, and encoded with this many components along its long/short side
+BLURHASH_SIZE = 32
+BLURHASH_COMPONENTS = (4, 3)
+
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Pillow format name -> content type
+FORMAT_CONTENT_TYPES = {
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+
+
+def _supported(fmt: str) -> bool:
+    if fmt not in FORMAT_CONTENT_TYPES:
+        return False
+    return fmt == "jpeg" or (PIL_AVAILABLE and features.check(fmt))
+
+
+def _formats_from_env(name: str, default: str) -> Tuple[str, ...]:
+    """Parse a comma-separated format list, dropping what this Pillow can't encode."""
+    requested = [fmt.strip().lower() for fmt in os.getenv(name, default).split(",") if fmt.strip()]
+    formats = tuple(fmt for fmt in requested if _supported(fmt))
+    for fmt in requested:
+        if fmt not in formats:
+            logger.warning(f"{name}: '{fmt}' is not supported here, skipping")
+    return formats or ("jpeg",)
+
+
+IMAGE_FORMATS = _formats_from_env("IMAGE_FORMATS", "jpeg")
+R2_RENDITION_FORMAT = _formats_from_env("R2_RENDITION_FORMAT", "jpeg")[0]
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+def decode_image(image_bytes: bytes) -> "Image.Image":
+    """
+    Decode image bytes to an upright RGB image no larger than MAX_IMAGE_DIMENSION.
+
+    EXIF orientation is applied (and EXIF dropped with it, GPS included).
+    Transparent images are flattened onto white (for JPEG compatibility).
+    """
+    img = Image.open(BytesIO(image_bytes))
+    # Let JPEG decode at a reduced scale when the result is downsized anyway
+    img.draft('RGB', (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+    img = ImageOps.exif_transpose(img)
+
+    # Convert RGBA to RGB (for JPEG compatibility)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Create white background
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    # Resize if too large
+    width, height = img.size
+    if width > MAX_IMAGE_DIMENSION or height > MAX_IMAGE_DIMENSION:
+        # Calculate new size maintaining aspect ratio
+        if width > height:
+            new_width = MAX_IMAGE_DIMENSION
+            new_height = int(height * (MAX_IMAGE_DIMENSION / width))
+        else:
+            new_height = MAX_IMAGE_DIMENSION
+            new_width = int(width * (MAX_IMAGE_DIMENSION / height))
+
+        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        logger.debug(f"Resized image from {width}x{height} to {new_width}x{new_height}")
+
+    return img
+
+
+def encode(img: "Image.Image", fmt: str, quality: int) -> bytes:
+    """Encode an image in one of FORMAT_CONTENT_TYPES at the given quality."""
+    output = BytesIO()
+    if fmt == "jpeg":
+        img.save(output, format='JPEG', quality=quality, optimize=True)
+    elif fmt == "avif":
+        img.save(output, format='AVIF', quality=quality, speed=AVIF_SPEED)
+    else:
+        img.save(output, format=fmt.upper(), quality=quality)
+    return output.getvalue()
+
+
+def encode_to_target(img: "Image.Image") -> Tuple[bytes, str, int]:
+    """
+    Encode the full image within MAX_FILE_SIZE_KB at the highest quality that fits.
+
+    Each format in IMAGE_FORMATS is tried in order: at JPEG_QUALITY, then at
+    MIN_QUALITY, then by binary search between the two (QUALITY_SEARCH_STEPS
+    encodes at most). The first format that fits wins; if none does, the
+    smallest encoding found is used.
+
+    Returns:
+        Tuple of (bytes, format, quality)
+    """
+    target = MAX_FILE_SIZE_KB * 1024
+    smallest = None
+
+    for fmt in IMAGE_FORMATS:
+        data = encode(img, fmt, JPEG_QUALITY)
+        if len(data) <= target:
+            return data, fmt, JPEG_QUALITY
+
+        # Most photos fit at the top quality; those that don't often can't fit at all
+        best = (encode(img, fmt, MIN_QUALITY), fmt, MIN_QUALITY)
+        if len(best[0]) > target:
+            if smallest is None or len(best[0]) < len(smallest[0]):
+                smallest = best
+            continue
+
+        low, high = MIN_QUALITY + 1, JPEG_QUALITY - 1
+        for _ in range(QUALITY_SEARCH_STEPS):
+            if low > high:
+                break
+            quality = (low + high) // 2
+            data = encode(img, fmt, quality)
+            if len(data) <= target:
+                best = (data, fmt, quality)
+                low = quality + 1
+            else:
+                high = quality - 1
+        return best
+
+    logger.info(f"Image exceeds {MAX_FILE_SIZE_KB}KB even at quality {MIN_QUALITY}")
+    return smallest
+
+
+def compress_image(image_bytes: bytes, content_type: str) -> Tuple[bytes, str]:
+    """
+    Compress an image to reduce file size while maintaining quality.
+
+    - Applies EXIF orientation
+    - Resizes if larger than MAX_IMAGE_DIMENSION
+    - Encodes within MAX_FILE_SIZE_KB (see encode_to_target)
+
+    Args:
+        image_bytes: Original image bytes
+        content_type: Original content type
+
+    Returns:
+        Tuple of (compressed_bytes, new_content_type)
+    """
+    if not PIL_AVAILABLE:
+        logger.debug("PIL not available, skipping compression")
+        return image_bytes, content_type
+
+    try:
+        data, fmt, _ = encode_to_target(decode_image(image_bytes))
+        return data, FORMAT_CONTENT_TYPES[fmt]
+    except Exception as e:
+        logger.warning(f"Image compression failed, using original: {e}")
+        return image_bytes, content_type
+
+
+# ============================================================================
+# PLACEHOLDERS
+# ============================================================================
+
+BASE83_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(BASE83_CHARS[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _linear_to_srgb(value: float) -> int:
+    value = min(1.0, max(0.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash(img: "Image.Image") -> str:
+    """
+    BlurHash of an image (https://blurha.sh) - a few DCT components of the
+    image in base83, which clients decode into a blurred placeholder.
+    """
+    small = img.copy()
+    small.thumbnail((BLURHASH_SIZE, BLURHASH_SIZE), Image.Resampling.BILINEAR)
+    width, height = small.size
+    x_components, y_components = BLURHASH_COMPONENTS if width >= height else BLURHASH_COMPONENTS[::-1]
+
+    srgb = np.asarray(small, dtype=np.float64) / 255
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+
+    # factors[j, i] = normalisation * mean(cos(pi*i*x/w) * cos(pi*j*y/h) * pixel)
+    basis_x = np.cos(np.pi * np.outer(np.arange(x_components), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(y_components), np.arange(height)) / height)
+    factors = np.einsum("jy,ix,yxc->jic", basis_y, basis_x, linear) / (width * height)
+    factors[1:, :] *= 2
+    factors[0, 1:] *= 2
+    factors = factors.reshape(-1, 3)
+    dc, ac = factors[0], factors[1:]
+
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    quantised_max = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+    max_value = (quantised_max + 1) / 166
+    result += _base83(quantised_max, 1)
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+
+    # Each AC component: sign-preserving sqrt, quantised to 19 levels per channel
+    quantised = np.clip(np.floor(np.sign(ac) * np.sqrt(np.abs(ac / max_value)) * 9 + 9.5), 0, 18).astype(int)
+    for r, g, b in quantised:
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def to_jpeg(image_bytes: bytes) -> bytes:
+    """Re-encode an image as JPEG, for consumers that don't read our stored format (AVIF)."""
+    return encode(decode_image(image_bytes), "jpeg", JPEG_QUALITY)
+
+
+def process_image(image_bytes: bytes, content_type: str) -> Tuple[Dict[str, Tuple[bytes, str]], Dict[str, Any]]:
+    """
+    Encode the stored rendition set from a single decode.
+
+    Runs in the process pool (see process_image_async). The thumbnail and
+    preview are downscaled from the decoded full image, not the original.
+
+    Returns:
+        Tuple of (renditions, stats). renditions maps "full", "thumbnail" and
+        "preview" to (bytes, content_type) - only "full", with the original
+        bytes, when the image can't be decoded. stats holds the CPU time,
+        sizes, dimensions, chosen format/quality and the BlurHash.
+    """
+    started = time.process_time()
+    stats = {
+        "original_bytes": len(image_bytes), "format": None, "quality": None,
+        "width": None, "height": None, "blurhash": None,
+    }
+
+    if not PIL_AVAILABLE:
+        renditions = {"full": (image_bytes, content_type)}
+    else:
+        try:
+            img = decode_image(image_bytes)
+        except Exception as e:
+            logger.warning(f"Image decode failed, storing original without renditions: {e}")
+            img = None
+
+        if img is None:
+            renditions = {"full": (image_bytes, content_type)}
+        else:
+            data, stats["format"], stats["quality"] = encode_to_target(img)
+            stats["width"], stats["height"] = img.size
+            renditions = {"full": (data, FORMAT_CONTENT_TYPES[stats["format"]])}
+            for name, max_dimension in SCAN_IMAGE_RENDITIONS:
+                rendition = img.copy()
+                rendition.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+                renditions[name] = (
+                    encode(rendition, R2_RENDITION_FORMAT, RENDITION_QUALITY),
+                    FORMAT_CONTENT_TYPES[R2_RENDITION_FORMAT],
+                )
+                if name == SCAN_IMAGE_RENDITIONS[0][0]:
+                    # Placeholder from the smallest rendition - cheaper to reduce than the full image
+                    try:
+                        stats["blurhash"] = blurhash(rendition)
+                    except Exception as e:
+                        logger.warning(f"BlurHash failed: {e}")
+
+    stats["stored_bytes"] = len(renditions["full"][0])
+    stats["cpu_ms"] = (time.process_time() - started) * 1000
+    return renditions, stats
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class ImageMetrics:
+    """CPU time and bytes saved across processed images (thread-safe)."""
+
+    SAMPLE_SIZE = 1000  # Recent CPU times kept for percentiles
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.images = 0
+        self.undecodable = 0
+        self.cpu_ms = 0.0
+        self.original_bytes = 0
+        self.stored_bytes = 0
+        self.over_target = 0
+        self.formats = Counter()
+        self._cpu_samples = deque(maxlen=self.SAMPLE_SIZE)
+
+    def record(self, stats: Dict[str, Any]):
+        with self._lock:
+            self.images += 1
+            self.cpu_ms += stats["cpu_ms"]
+            self._cpu_samples.append(stats["cpu_ms"])
+            self.original_bytes += stats["original_bytes"]
+            self.stored_bytes += stats["stored_bytes"]
+            if stats["format"] is None:
+                self.undecodable += 1
+            else:
+                self.formats[stats["format"]] += 1
+            if stats["stored_bytes"] > MAX_FILE_SIZE_KB * 1024:
+                self.over_target += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._cpu_samples)
+            return {
+                "images": self.images,
+                "undecodable": self.undecodable,
+                "over_target": self.over_target,
+                "formats": dict(self.formats),
+                "cpu_ms": {
+                    "mean": round(self.cpu_ms / self.images, 2) if self.images else None,
+                    "p50": round(samples[len(samples) // 2], 2) if samples else None,
+                    "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2) if samples else None,
+                },
+                "original_bytes": self.original_bytes,
+                "stored_bytes": self.stored_bytes,
+                "bytes_saved": self.original_bytes - self.stored_bytes,
+                "avg_bytes_saved": (self.original_bytes - self.stored_bytes) // self.images if self.images else None,
+            }
+
+
+image_metrics = ImageMetrics()
+
+
+def get_image_metrics() -> Dict[str, Any]:
+    """Encoder settings and per-image metrics since startup."""
+    return {
+        "formats": list(IMAGE_FORMATS),
+        "rendition_format": R2_RENDITION_FORMAT,
+        "max_file_size_kb": MAX_FILE_SIZE_KB,
+        "workers": IMAGE_PROCESS_WORKERS,
+        **image_metrics.snapshot(),
+    }
+
+
+# ============================================================================
+# PROCESS POOL
+# ============================================================================
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """The shared process pool, started on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork - the server process has threads and an event loop
+                _pool = ProcessPoolExecutor(
+                    max_workers=IMAGE_PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+class ImageWorkerError(RuntimeError):
+    """An image job killed its worker process twice (e.g. OOM on a huge image)."""
+
+
+def _replace_pool(broken: ProcessPoolExecutor):
+    """Drop a broken pool - unless a concurrent job already replaced it."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_image_pool():
+    """Stop the worker processes (server shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def run_in_image_pool(func, *args):
+    """
+    Run a CPU-bound image function in the process pool.
+
+    When a worker dies (e.g. OOM on a huge image) every job in the pool
+    fails with it. The pool is replaced and each of those jobs is retried
+    once in a single-use worker of its own, so the job that caused it can't
+    take the innocent ones down again; if that worker dies too, the job
+    raises ImageWorkerError. Never falls back to the server process.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_image_pool()
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        logger.error(f"Image process pool broke running {func.__name__} - restarting it")
+        _replace_pool(pool)
+
+    isolated = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        return await loop.run_in_executor(isolated, func, *args)
+    except BrokenProcessPool:
+        raise ImageWorkerError(f"{func.__name__} crashed its worker process twice")
+    finally:
+        isolated.shutdown(wait=False)
+
+
+async def process_image_async(
+    image_bytes: bytes, content_type: str
+) -> Tuple[Dict[str, Tuple[bytes, str]], Dict[str, Any]]:
+    """process_image in the process pool, recording its metrics."""
+    renditions, stats = await run_in_image_pool(process_image, image_bytes, content_type)
+
+    image_metrics.record(stats)
+    logger.info(
+        f"Image processed: {stats['original_bytes'] / 1024:.1f}KB -> {stats['stored_bytes'] / 1024:.1f}KB "
+        f"({stats['format']} q{stats['quality']}, {stats['cpu_ms']:.0f}ms CPU)"
+    )
+    return renditions, stats
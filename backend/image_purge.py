@@ -0,0 +1,136 @@
+"""
+Scan Image Purge Queue
+
+Deleting scans only queues their R2 object keys. A background worker removes
+the objects in bulk, so delete requests never wait on object storage.
+
+Features:
+- Durable queue (image_purge_queue) written in the same transaction as the
+  scan delete - a crash can't lose keys or purge images of a rolled-back delete
+- S3 DeleteObjects batches of up to 1000 keys per request
+- Failed keys stay queued and are retried on a later pass
+- Each pass claims its batch with a short lease (FOR UPDATE SKIP LOCKED), so
+  replicas and overlapping wake-ups delete disjoint keys; a batch whose
+  worker died is picked up again once the lease runs out
+- Woken right after a delete, with a periodic sweep as a fallback
+
+Configuration:
+    IMAGE_PURGE_INTERVAL_SECONDS - Sweep interval (default: 60)
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, List
+
+import sqlalchemy
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from r2_storage import DELETE_OBJECTS_BATCH_SIZE, R2_ENABLED, delete_image_objects_async
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+IMAGE_PURGE_INTERVAL_SECONDS = int(os.getenv("IMAGE_PURGE_INTERVAL_SECONDS", "60"))
+
+# Keys claimed per pass - one DeleteObjects request's worth
+IMAGE_PURGE_BATCH_SIZE = DELETE_OBJECTS_BATCH_SIZE
+
+# How long a claimed batch is reserved for its worker
+IMAGE_PURGE_LEASE_SECONDS = 300
+
+
+# ============================================================================
+# PURGER
+# ============================================================================
+
+class ImagePurger:
+    """Queue of R2 object keys awaiting deletion, and the worker that drains it."""
+
+    def __init__(self, database, queue_table):
+        self.database = database
+        self.queue_table = queue_table
+        self._wakeup = asyncio.Event()
+
+    async def enqueue(self, object_keys: Iterable[str]):
+        """
+        Queue object keys for deletion. Call inside the transaction that deletes
+        the rows referencing them, then call wake() once it has committed.
+        """
+        keys = sorted({key for key in object_keys if key})
+        if not keys:
+            return
+        queued_at = datetime.utcnow()
+        query = pg_insert(self.queue_table).values(
+            [{"object_key": key, "queued_at": queued_at, "attempts": 0} for key in keys]
+        ).on_conflict_do_nothing(index_elements=["object_key"])
+        await self.database.execute(query)
+
+    def wake(self):
+        """Start a purge pass now instead of waiting for the next sweep."""
+        self._wakeup.set()
+
+    async def claim_batch(self) -> List[str]:
+        """Lease up to IMAGE_PURGE_BATCH_SIZE unclaimed (or expired) keys to this worker."""
+        table = self.queue_table
+        now = datetime.utcnow()
+        # Keys that keep failing sink behind fresh ones instead of blocking them
+        batch = sqlalchemy.select(table.c.object_key).where(
+            table.c.claimed_until.is_(None) | (table.c.claimed_until < now)
+        ).order_by(
+            table.c.attempts, table.c.queued_at
+        ).limit(IMAGE_PURGE_BATCH_SIZE).with_for_update(skip_locked=True)
+        rows = await self.database.fetch_all(
+            table.update().where(table.c.object_key.in_(batch.scalar_subquery())).values(
+                claimed_until=now + timedelta(seconds=IMAGE_PURGE_LEASE_SECONDS)
+            ).returning(table.c.object_key)
+        )
+        return [row["object_key"] for row in rows]
+
+    async def purge_batch(self) -> int:
+        """
+        Delete one batch of queued objects. Returns how many keys were removed
+        from the queue (0 when it's empty or nothing could be deleted).
+        """
+        table = self.queue_table
+        keys = await self.claim_batch()
+        if not keys:
+            return 0
+
+        deleted, failed = await delete_image_objects_async(keys)
+        if deleted:
+            await self.database.execute(table.delete().where(table.c.object_key.in_(deleted)))
+        if failed:
+            await self.database.execute(
+                table.update().where(table.c.object_key.in_(failed)).values(
+                    attempts=table.c.attempts + 1, claimed_until=None
+                )
+            )
+            logger.warning(f"Image purge: {len(failed)} object(s) failed, will retry")
+
+        logger.info(f"Image purge: deleted {len(deleted)} object(s)")
+        return len(deleted)
+
+    async def purge_pending(self):
+        """Purge batches until one comes back short (queue drained or keys failing)."""
+        while await self.purge_batch() == IMAGE_PURGE_BATCH_SIZE:
+            pass
+
+    async def run_forever(self):
+        """Background task: purge on wake-up or every IMAGE_PURGE_INTERVAL_SECONDS."""
+        if not R2_ENABLED:
+            logger.info("R2 not configured - queued image keys will be dropped without deleting")
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=IMAGE_PURGE_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.purge_pending()
+            except Exception as e:
+                logger.warning(f"Image purge pass failed: {e}")
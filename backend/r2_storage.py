@@ -5,32 +5,48 @@ Handles image upload and retrieval for deer scan images.
 Uses S3-compatible API via boto3.
 
 Features:
-- Upload base64 images to R2
+- Upload encoded images and their renditions to R2 (see image_assets)
 - Generate public URLs for cross-device access
 - Automatic content-type detection
 - UUID-based file naming for security through obscurity
-- Image compression to reduce storage costs
+- Bulk deletion via DeleteObjects (up to 1000 keys per request)
+- Resumable key-ordered listing (ListObjectsV2 with StartAfter) for storage GC
+- One shared, thread-safe client (pooled connections, adaptive retries, timeouts)
+- Async wrappers on a dedicated thread pool, with per-operation latency metrics
+- Presigned PUT URLs (signed locally) so the app uploads straight to the bucket
+- Signed read URLs for a private bucket: SigV4 query signing done here (one
+  HMAC per URL, signing key derived once a day), cached per scan
+
+Configuration:
+    R2_UPLOAD_URL_EXPIRES_SECONDS - Lifetime of presigned upload URLs (default: 900)
+    R2_MAX_UPLOAD_BYTES           - Largest direct upload accepted for analysis (default: 15MB)
+    R2_SIGNED_URLS                - Return signed, expiring image URLs (default: false)
+    R2_READ_URL_EXPIRES_SECONDS   - Lifetime of signed image URLs (default: 86400, max 604800)
+    R2_SIGNED_URL_CACHE_SIZE      - Scans whose signed URLs are kept in memory (default: 10000)
 """
 
 import os
+import hmac
 import base64
+import hashlib
 import uuid
+import time
+import asyncio
 import logging
-from typing import Optional, Tuple
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
 from io import BytesIO
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
-# Image processing for compression
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    logging.warning("PIL not available - image compression disabled")
-
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -42,10 +58,30 @@ R2_SECRET_ACCESS_KEY = os.getenv("R2_SECRET_ACCESS_KEY")
 R2_BUCKET_NAME = os.getenv("R2_BUCKET_NAME", "ironstag-images")
 R2_PUBLIC_URL = os.getenv("R2_PUBLIC_URL")
 
-# Compression settings
-MAX_IMAGE_DIMENSION = 1920  # Max width or height
-JPEG_QUALITY = 85  # Quality for JPEG compression (1-100)
-MAX_FILE_SIZE_KB = 500  # Target max file size in KB
+# scans columns holding stored image URLs - every one has an object to purge
+SCAN_IMAGE_URL_COLUMNS = ("image_url", "thumbnail_url", "preview_url")
+
+# Direct uploads are staged under uploads/<user_id>/ until analyzed
+UPLOAD_PREFIX = "uploads"
+R2_UPLOAD_URL_EXPIRES_SECONDS = int(os.getenv("R2_UPLOAD_URL_EXPIRES_SECONDS", "900"))
+R2_MAX_UPLOAD_BYTES = int(os.getenv("R2_MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+UPLOAD_READ_CHUNK_BYTES = 256 * 1024
+
+# Signed read URLs (private bucket). SigV4 caps presigned URLs at 7 days.
+R2_SIGNED_URLS = os.getenv("R2_SIGNED_URLS", "false").lower() == "true"
+R2_READ_URL_EXPIRES_SECONDS = min(int(os.getenv("R2_READ_URL_EXPIRES_SECONDS", "86400")), 604800)
+R2_SIGNED_URL_CACHE_SIZE = int(os.getenv("R2_SIGNED_URL_CACHE_SIZE", "10000"))
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_OBJECTS_BATCH_SIZE = 1000
+# ...and ListObjectsV2 returns at most 1000 per page
+LIST_OBJECTS_PAGE_SIZE = 1000
+
+# Client tuning - the pool also sizes the executor the async wrappers run on
+R2_MAX_POOL_CONNECTIONS = int(os.getenv("R2_MAX_POOL_CONNECTIONS", "32"))
+R2_CONNECT_TIMEOUT_SECONDS = float(os.getenv("R2_CONNECT_TIMEOUT_SECONDS", "5"))
+R2_READ_TIMEOUT_SECONDS = float(os.getenv("R2_READ_TIMEOUT_SECONDS", "30"))
+R2_MAX_ATTEMPTS = int(os.getenv("R2_MAX_ATTEMPTS", "5"))
 
 # Check if R2 is configured
 R2_ENABLED = all([R2_ENDPOINT_URL, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, R2_BUCKET_NAME])
@@ -55,19 +91,134 @@ if R2_ENABLED:
 else:
     logger.warning("R2 Storage not configured - images will not be stored in cloud")
 
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/avif": "avif",
+}
+
+# What clients may upload directly - formats the analysis model accepts
+UPLOAD_CONTENT_TYPES = ("image/jpeg", "image/png", "image/webp", "image/gif")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+# Blocking boto3 calls from async code run here, never on the event loop
+_executor = ThreadPoolExecutor(max_workers=R2_MAX_POOL_CONNECTIONS, thread_name_prefix="r2")
+
 
 def get_r2_client():
-    """Get a configured boto3 S3 client for R2."""
+    """
+    Get the shared boto3 S3 client for R2.
+    
+    Built once, on first use. boto3 clients are thread-safe, so every
+    request and worker shares its connection pool.
+    """
+    global _client
     if not R2_ENABLED:
         return None
     
-    return boto3.client(
-        's3',
-        endpoint_url=R2_ENDPOINT_URL,
-        aws_access_key_id=R2_ACCESS_KEY_ID,
-        aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-        region_name='auto',  # R2 uses 'auto' for region
-    )
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Sessions aren't thread-safe - build the client from a private one
+                _client = boto3.session.Session().client(
+                    's3',
+                    endpoint_url=R2_ENDPOINT_URL,
+                    aws_access_key_id=R2_ACCESS_KEY_ID,
+                    aws_secret_access_key=R2_SECRET_ACCESS_KEY,
+                    region_name='auto',  # R2 uses 'auto' for region
+                    config=Config(
+                        signature_version="s3v4",  # Presigned URLs are computed locally
+                        max_pool_connections=R2_MAX_POOL_CONNECTIONS,
+                        connect_timeout=R2_CONNECT_TIMEOUT_SECONDS,
+                        read_timeout=R2_READ_TIMEOUT_SECONDS,
+                        retries={"mode": "adaptive", "total_max_attempts": R2_MAX_ATTEMPTS},
+                    ),
+                )
+    return _client
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class R2Metrics:
+    """Per-operation call counts, errors and latency (thread-safe)."""
+    
+    SAMPLE_SIZE = 1000  # Recent latencies kept per operation for percentiles
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, Any]] = {}
+    
+    def record(self, operation: str, elapsed_ms: float, error: bool = False):
+        with self._lock:
+            stats = self._operations.setdefault(operation, {
+                "count": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "samples": deque(maxlen=self.SAMPLE_SIZE),
+            })
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["samples"].append(elapsed_ms)
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for operation, stats in self._operations.items():
+                samples = sorted(stats["samples"])
+                result[operation] = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "mean_ms": round(stats["total_ms"] / stats["count"], 2),
+                    "p50_ms": round(samples[len(samples) // 2], 2),
+                    "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+                    "max_ms": round(stats["max_ms"], 2),
+                }
+            return result
+
+
+r2_metrics = R2Metrics()
+
+
+@contextmanager
+def timed(operation: str):
+    """Record the latency of an R2 call under `operation`, counting raised errors."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        r2_metrics.record(operation, (time.perf_counter() - start) * 1000, error)
+
+
+def get_r2_metrics() -> Dict[str, Any]:
+    """Client settings and per-operation metrics since startup."""
+    return {
+        "enabled": R2_ENABLED,
+        "max_pool_connections": R2_MAX_POOL_CONNECTIONS,
+        "retry_mode": "adaptive",
+        "max_attempts": R2_MAX_ATTEMPTS,
+        "operations": r2_metrics.snapshot(),
+        "signed_urls": signed_url_cache.snapshot(),
+    }
+
+
+async def run_in_r2_executor(func, *args):
+    """Run a blocking R2 helper on the dedicated R2 thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, func, *args)
 
 
 def parse_base64_image(base64_string: str) -> Tuple[bytes, str]:
@@ -98,86 +249,36 @@ def parse_base64_image(base64_string: str) -> Tuple[bytes, str]:
     return image_bytes, content_type
 
 
-def compress_image(image_bytes: bytes, content_type: str) -> Tuple[bytes, str]:
-    """
-    Compress an image to reduce file size while maintaining quality.
-    
-    - Resizes if larger than MAX_IMAGE_DIMENSION
-    - Converts to JPEG for better compression
-    - Applies quality setting
-    
-    Args:
-        image_bytes: Original image bytes
-        content_type: Original content type
-        
-    Returns:
-        Tuple of (compressed_bytes, new_content_type)
-    """
-    if not PIL_AVAILABLE:
-        logger.debug("PIL not available, skipping compression")
-        return image_bytes, content_type
-    
-    try:
-        original_size = len(image_bytes) / 1024  # KB
-        
-        # Open image
-        img = Image.open(BytesIO(image_bytes))
-        
-        # Convert RGBA to RGB (for JPEG compatibility)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            # Create white background
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Resize if too large
-        width, height = img.size
-        if width > MAX_IMAGE_DIMENSION or height > MAX_IMAGE_DIMENSION:
-            # Calculate new size maintaining aspect ratio
-            if width > height:
-                new_width = MAX_IMAGE_DIMENSION
-                new_height = int(height * (MAX_IMAGE_DIMENSION / width))
-            else:
-                new_height = MAX_IMAGE_DIMENSION
-                new_width = int(width * (MAX_IMAGE_DIMENSION / height))
-            
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            logger.debug(f"Resized image from {width}x{height} to {new_width}x{new_height}")
-        
-        # Compress to JPEG
-        output = BytesIO()
-        img.save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
-        compressed_bytes = output.getvalue()
-        
-        compressed_size = len(compressed_bytes) / 1024  # KB
-        savings = ((original_size - compressed_size) / original_size) * 100 if original_size > 0 else 0
-        
-        logger.info(f"Image compressed: {original_size:.1f}KB -> {compressed_size:.1f}KB ({savings:.1f}% reduction)")
-        
-        return compressed_bytes, "image/jpeg"
-        
-    except Exception as e:
-        logger.warning(f"Image compression failed, using original: {e}")
-        return image_bytes, content_type
+def object_url(object_key: str) -> str:
+    """URL clients load an object from."""
+    # R2 public URLs format: https://<bucket>.<account-id>.r2.dev/<key>
+    # Or custom domain if configured
+    if R2_PUBLIC_URL:
+        return f"{R2_PUBLIC_URL}/{object_key}"
+    # Fallback to S3-style URL (requires bucket to be public)
+    return f"{R2_ENDPOINT_URL}/{R2_BUCKET_NAME}/{object_key}"
+
+
+def object_key_from_url(url: Optional[str]) -> Optional[str]:
+    """Object key behind a stored image URL (images/... or legacy scans/...)."""
+    if not url:
+        return None
+    marker = max(url.rfind("/images/"), url.rfind("/scans/"))
+    if marker == -1:
+        return None
+    return url[marker + 1:]
 
 
-def upload_scan_image(scan_id: str, base64_image: str) -> Optional[str]:
+def put_image_objects(key_base: str, renditions: Dict[str, Tuple[bytes, str]]) -> Optional[Dict[str, str]]:
     """
-    Upload a scan image to R2 storage.
+    Upload an image's encoded renditions (see image_processing.process_image).
     
-    - Compresses image before upload to reduce storage costs
-    - Uses scan_id as filename for easy retrieval
+    The full image is stored at <key_base>.<ext>, the others at
+    <key_base>_<rendition>.<ext>.
     
-    Args:
-        scan_id: The scan's UUID (used as filename)
-        base64_image: Base64 encoded image string
-        
     Returns:
-        Public URL of the uploaded image, or None if upload failed
+        Dict of rendition name -> object key (a rendition that failed to
+        upload is left out), or None if the full image upload failed
     """
     if not R2_ENABLED:
         logger.debug("R2 not enabled, skipping image upload")
@@ -188,43 +289,30 @@ def upload_scan_image(scan_id: str, base64_image: str) -> Optional[str]:
         if not client:
             return None
         
-        # Parse the base64 image
-        image_bytes, content_type = parse_base64_image(base64_image)
-        
-        # Compress image to reduce storage costs
-        image_bytes, content_type = compress_image(image_bytes, content_type)
-        
-        # Determine file extension from content type (always jpg after compression)
-        ext_map = {
-            "image/jpeg": "jpg",
-            "image/png": "png",
-            "image/webp": "webp",
-            "image/gif": "gif",
-        }
-        ext = ext_map.get(content_type, "jpg")
-        
-        # Use scan_id as filename for easy retrieval
-        object_key = f"scans/{scan_id}.{ext}"
-        
-        # Upload to R2
-        client.put_object(
-            Bucket=R2_BUCKET_NAME,
-            Key=object_key,
-            Body=image_bytes,
-            ContentType=content_type,
-        )
-        
-        # Generate public URL
-        # R2 public URLs format: https://<bucket>.<account-id>.r2.dev/<key>
-        # Or custom domain if configured
-        if R2_PUBLIC_URL:
-            image_url = f"{R2_PUBLIC_URL}/{object_key}"
-        else:
-            # Fallback to S3-style URL (requires bucket to be public)
-            image_url = f"{R2_ENDPOINT_URL}/{R2_BUCKET_NAME}/{object_key}"
+        keys = {}
+        for name, (data, rendition_type) in renditions.items():
+            ext = EXTENSIONS.get(rendition_type, "jpg")
+            object_key = f"{key_base}.{ext}" if name == "full" else f"{key_base}_{name}.{ext}"
+            
+            try:
+                with timed("put_object"):
+                    client.put_object(
+                        Bucket=R2_BUCKET_NAME,
+                        Key=object_key,
+                        Body=data,
+                        ContentType=rendition_type,
+                    )
+            except ClientError as e:
+                if name == "full":
+                    raise
+                # Lists fall back to the full image
+                logger.warning(f"Failed to upload {name} rendition {object_key}: {e}")
+                continue
+            
+            keys[name] = object_key
         
-        logger.info(f"Uploaded image for scan {scan_id}: {object_key}")
-        return image_url
+        logger.info(f"Uploaded image {key_base}: {len(keys)} rendition(s)")
+        return keys
         
     except ClientError as e:
         logger.error(f"Failed to upload image to R2: {e}")
@@ -234,86 +322,311 @@ def upload_scan_image(scan_id: str, base64_image: str) -> Optional[str]:
         return None
 
 
-def delete_scan_image(scan_id: str) -> bool:
+# ============================================================================
+# DIRECT UPLOADS
+# ============================================================================
+
+def create_upload_url(user_id: str, content_type: str) -> Dict[str, Any]:
     """
-    Delete a scan image from R2 storage.
+    Presign a PUT for a new staged upload.
+    
+    Signing is local (no request to R2). The signature covers Content-Type,
+    so the client must send the same header with the PUT.
     
-    Args:
-        scan_id: The scan's UUID
-        
     Returns:
-        True if deleted successfully, False otherwise
+        Dict with image_key, upload_url, headers and expires_in
     """
-    if not R2_ENABLED:
-        return True  # Nothing to delete
+    object_key = f"{UPLOAD_PREFIX}/{user_id}/{uuid.uuid4()}.{EXTENSIONS[content_type]}"
+    with timed("presign_put_object"):
+        upload_url = get_r2_client().generate_presigned_url(
+            "put_object",
+            Params={"Bucket": R2_BUCKET_NAME, "Key": object_key, "ContentType": content_type},
+            ExpiresIn=R2_UPLOAD_URL_EXPIRES_SECONDS,
+        )
+    return {
+        "image_key": object_key,
+        "upload_url": upload_url,
+        "method": "PUT",
+        "headers": {"Content-Type": content_type},
+        "expires_in": R2_UPLOAD_URL_EXPIRES_SECONDS,
+    }
+
+
+def is_user_upload_key(user_id: str, object_key: str) -> bool:
+    """Whether object_key is a staged upload issued to this user."""
+    prefix = f"{UPLOAD_PREFIX}/{user_id}/"
+    return object_key.startswith(prefix) and "/" not in object_key[len(prefix):]
+
+
+def read_upload(object_key: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Read a staged upload, streaming the body in chunks.
     
+    Returns:
+        Tuple of (image_bytes, content_type), or None if the object doesn't exist
+    
+    Raises:
+        ValueError: If the object is larger than R2_MAX_UPLOAD_BYTES
+    """
+    return read_object(object_key, R2_MAX_UPLOAD_BYTES)
+
+
+def read_object(object_key: str, max_bytes: Optional[int] = None) -> Optional[Tuple[bytes, str]]:
+    """
+    Read an object, streaming the body in chunks.
+    
+    Returns:
+        Tuple of (bytes, content_type), or None if the object doesn't exist
+    
+    Raises:
+        ValueError: If max_bytes is given and the object is larger
+    """
+    client = get_r2_client()
     try:
-        client = get_r2_client()
-        if not client:
-            return False
-        
-        # Try common extensions
-        for ext in ["jpg", "png", "webp"]:
-            object_key = f"scans/{scan_id}.{ext}"
-            try:
-                client.delete_object(Bucket=R2_BUCKET_NAME, Key=object_key)
-                logger.info(f"Deleted image from R2: {object_key}")
-                return True
-            except ClientError:
-                continue
+        with timed("get_object"):
+            response = client.get_object(Bucket=R2_BUCKET_NAME, Key=object_key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            return None
+        raise
+    
+    # A presigned PUT can't cap the size - check it before reading
+    if max_bytes is not None and response["ContentLength"] > max_bytes:
+        response["Body"].close()
+        raise ValueError(f"Image is {response['ContentLength']} bytes (max {max_bytes})")
+    
+    output = BytesIO()
+    with timed("read_object"):
+        for chunk in response["Body"].iter_chunks(UPLOAD_READ_CHUNK_BYTES):
+            output.write(chunk)
+    return output.getvalue(), response.get("ContentType") or "image/jpeg"
+
+
+# ============================================================================
+# SIGNED READ URLS
+# ============================================================================
+
+# URLs are signed as of the start of a window half their lifetime long, so
+# every URL handed out in a window - by any replica - is identical and still
+# has at least half its lifetime left when the window ends
+SIGNED_URL_WINDOW_SECONDS = max(1, R2_READ_URL_EXPIRES_SECONDS // 2)
+
+
+def signed_url_window() -> Optional[int]:
+    """
+    The current signing window, or None when URLs aren't signed.
+    
+    Part of the ETag of any response carrying image URLs, so a revalidation
+    after the window turns over returns fresh URLs instead of a 304.
+    """
+    if not R2_SIGNED_URLS:
+        return None
+    return int(time.time()) // SIGNED_URL_WINDOW_SECONDS
+
+
+@lru_cache(maxsize=4)
+def _signing_key(date_stamp: str) -> bytes:
+    """SigV4 signing key for a day (four chained HMACs - derived once per date)."""
+    key = ("AWS4" + R2_SECRET_ACCESS_KEY).encode()
+    for part in (date_stamp, "auto", "s3", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    return key
+
+
+def signed_object_url(object_key: str, window: int) -> str:
+    """
+    Presigned GET URL for an object, signed as of the start of `window`.
+    
+    Computed locally - the same query-string SigV4 botocore produces for
+    generate_presigned_url("get_object"), without building a request per URL.
+    """
+    endpoint = urlsplit(R2_ENDPOINT_URL)
+    signed_at = time.gmtime(window * SIGNED_URL_WINDOW_SECONDS)
+    amz_date = time.strftime("%Y%m%dT%H%M%SZ", signed_at)
+    date_stamp = amz_date[:8]
+    
+    path = quote(f"{endpoint.path.rstrip('/')}/{R2_BUCKET_NAME}/{object_key}", safe="/~")
+    query = "&".join([
+        "X-Amz-Algorithm=AWS4-HMAC-SHA256",
+        "X-Amz-Credential=" + quote(f"{R2_ACCESS_KEY_ID}/{date_stamp}/auto/s3/aws4_request", safe="~"),
+        f"X-Amz-Date={amz_date}",
+        f"X-Amz-Expires={R2_READ_URL_EXPIRES_SECONDS}",
+        "X-Amz-SignedHeaders=host",
+    ])
+    canonical_request = f"GET\n{path}\n{query}\nhost:{endpoint.netloc}\n\nhost\nUNSIGNED-PAYLOAD"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256",
+        amz_date,
+        f"{date_stamp}/auto/s3/aws4_request",
+        hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+    signature = hmac.new(_signing_key(date_stamp), string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return f"{endpoint.scheme}://{endpoint.netloc}{path}?{query}&X-Amz-Signature={signature}"
+
+
+class SignedURLCache:
+    """A scan's signed image URLs for the current window, LRU-bounded (thread-safe)."""
+    
+    def __init__(self, max_entries: int = R2_SIGNED_URL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, scan_id: str, urls: Dict[str, Optional[str]], window: int) -> Dict[str, Optional[str]]:
+        sources = tuple(urls.values())
+        with self._lock:
+            entry = self._entries.get(scan_id)
+            if entry and entry[0] == window and entry[1] == sources:
+                self._entries.move_to_end(scan_id)
+                self.hits += 1
+                return entry[2]
         
-        return True  # No image found is okay
+        signed = {}
+        for column, url in urls.items():
+            object_key = object_key_from_url(url)
+            signed[column] = signed_object_url(object_key, window) if object_key else url
         
-    except Exception as e:
-        logger.error(f"Failed to delete image from R2: {e}")
-        return False
+        with self._lock:
+            self.misses += 1
+            self._entries[scan_id] = (window, sources, signed)
+            self._entries.move_to_end(scan_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return signed
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": R2_SIGNED_URLS,
+                "expires_seconds": R2_READ_URL_EXPIRES_SECONDS,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
 
+signed_url_cache = SignedURLCache()
 
-def get_image_url(scan_id: str, ext: str = "jpg") -> Optional[str]:
+
+def scan_image_urls(scan: Dict[str, Any]) -> Dict[str, Optional[str]]:
     """
-    Get the public URL for a scan image.
+    A scan's image URLs as returned to clients (see SCAN_IMAGE_URL_COLUMNS).
+    
+    The stored public URLs, or with R2_SIGNED_URLS, signed URLs for the
+    same objects - so the bucket can be private.
+    """
+    urls = {column: scan.get(column) for column in SCAN_IMAGE_URL_COLUMNS}
+    window = signed_url_window()
+    if window is None or not R2_ENABLED or not any(urls.values()):
+        return urls
+    return signed_url_cache.get(scan["id"], urls, window)
+
+
+def scan_image_key(image_url: Optional[str]) -> Optional[str]:
+    """
+    Get the object key for a legacy scan image URL.
+    
+    Before image assets, uploads were keyed scans/<scan_id>[_<rendition>].<ext>,
+    so the key is the URL's trailing path whichever base URL it was built
+    with. Asset images (images/...) are freed through image_assets instead.
     
-    Args:
-        scan_id: The scan's UUID
-        ext: File extension (default: jpg)
-        
     Returns:
-        Public URL or None
+        Object key, or None if the URL isn't one of ours
     """
-    if not R2_ENABLED or not R2_PUBLIC_URL:
+    if not image_url:
         return None
     
-    object_key = f"scans/{scan_id}.{ext}"
-    return f"{R2_PUBLIC_URL}/{object_key}"
+    marker = image_url.rfind("/scans/")
+    if marker == -1:
+        return None
+    return image_url[marker + 1:]
+
+
+def scan_image_keys(scan: Dict[str, Any]) -> List[str]:
+    """Object keys of a legacy scan row's images (see SCAN_IMAGE_URL_COLUMNS)."""
+    keys = (scan_image_key(scan.get(column)) for column in SCAN_IMAGE_URL_COLUMNS)
+    return [key for key in keys if key]
 
 
-def check_image_exists(scan_id: str) -> Tuple[bool, Optional[str]]:
+def list_objects_page(start_after: str = "", max_keys: int = LIST_OBJECTS_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], bool]:
     """
-    Check if an image exists in R2 for a given scan.
+    List one page of the bucket in key order, after `start_after`.
+    
+    StartAfter (not a continuation token) so a listing can be resumed from
+    the last key handled, any time later.
     
     Returns:
-        Tuple of (exists, url_if_exists)
+        Tuple of (objects with Key, Size and LastModified, whether more follow)
     """
-    if not R2_ENABLED:
-        return False, None
+    with timed("list_objects_v2"):
+        response = get_r2_client().list_objects_v2(
+            Bucket=R2_BUCKET_NAME, StartAfter=start_after, MaxKeys=max_keys,
+        )
+    return response.get("Contents", []), response.get("IsTruncated", False)
+
+
+def delete_image_objects(object_keys: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Delete objects from R2 in DeleteObjects batches.
     
-    try:
-        client = get_r2_client()
-        if not client:
-            return False, None
-        
-        # Try common extensions
-        for ext in ["jpg", "png", "webp"]:
-            object_key = f"scans/{scan_id}.{ext}"
-            try:
-                client.head_object(Bucket=R2_BUCKET_NAME, Key=object_key)
-                url = f"{R2_PUBLIC_URL}/{object_key}" if R2_PUBLIC_URL else None
-                return True, url
-            except ClientError:
-                continue
+    Keys that don't exist count as deleted (S3 delete is idempotent).
+    
+    Args:
+        object_keys: Keys to delete
         
-        return False, None
+    Returns:
+        Tuple of (deleted_keys, failed_keys)
+    """
+    if not R2_ENABLED:
+        return list(object_keys), []  # Nothing to delete
+    
+    client = get_r2_client()
+    deleted, failed = [], []
+    
+    for start in range(0, len(object_keys), DELETE_OBJECTS_BATCH_SIZE):
+        batch = object_keys[start:start + DELETE_OBJECTS_BATCH_SIZE]
+        try:
+            # Quiet mode: the response lists only the keys that failed
+            with timed("delete_objects"):
+                response = client.delete_objects(
+                    Bucket=R2_BUCKET_NAME,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+        except ClientError as e:
+            logger.error(f"Failed to delete {len(batch)} images from R2: {e}")
+            failed.extend(batch)
+            continue
         
-    except Exception as e:
-        logger.error(f"Error checking image existence: {e}")
-        return False, None
+        errors = {error["Key"]: error.get("Code") for error in response.get("Errors", [])}
+        for key, code in errors.items():
+            logger.warning(f"Failed to delete image from R2: {key} ({code})")
+        deleted.extend(key for key in batch if key not in errors)
+        failed.extend(key for key in batch if key in errors)
+    
+    return deleted, failed
+
+
+# ============================================================================
+# ASYNC WRAPPERS
+# ============================================================================
+
+async def delete_image_objects_async(object_keys: List[str]) -> Tuple[List[str], List[str]]:
+    """delete_image_objects off the event loop."""
+    return await run_in_r2_executor(delete_image_objects, object_keys)
+
+
+async def list_objects_page_async(start_after: str = "") -> Tuple[List[Dict[str, Any]], bool]:
+    """list_objects_page off the event loop."""
+    return await run_in_r2_executor(list_objects_page, start_after)
+
+
+async def read_upload_async(object_key: str) -> Optional[Tuple[bytes, str]]:
+    """read_upload off the event loop."""
+    return await run_in_r2_executor(read_upload, object_key)
+
+
+async def read_object_async(object_key: str) -> Optional[Tuple[bytes, str]]:
+    """read_object off the event loop."""
+    return await run_in_r2_executor(read_object, object_key)
@@ -0,0 +1,303 @@
+"""
+Rate Limiting Module - Token Bucket
+
+Throttles expensive endpoints (AI analysis, re-analysis, password reset
+emails, debug ingestion) so a single client cannot exhaust shared upstream
+quotas such as the OpenAI rate limit.
+
+Features:
+- Token bucket per (route, identity) - identities are user ids, IPs or emails
+- Configurable budgets per route via environment variables
+- In-memory backend (single worker) and PostgreSQL backend (shared across
+  uvicorn workers and replicas)
+- A request is charged against all of its buckets or none of them
+- Standard RateLimit-* and Retry-After response headers
+- Fails open: a backend error never blocks a request
+
+Configuration:
+    RATE_LIMIT_ENABLED   - 'false' disables all limits (default: true)
+    RATE_LIMIT_BACKEND   - 'memory' or 'postgres' (default: memory)
+    RATE_LIMIT_<ROUTE>   - Budget as '<capacity>/<period_seconds>', e.g.
+                           RATE_LIMIT_ANALYZE=10/60
+    TRUSTED_PROXY_HOPS   - Proxies in front of the API that append to
+                           X-Forwarded-For (default: 1, Railway's edge);
+                           0 uses the socket peer address
+"""
+
+import math
+import os
+import hashlib
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Longer identities are hashed into their bucket key (see bucket_key)
+BUCKET_KEY_MAX_IDENTITY = 128
+
+@dataclass
+class RateLimitRule:
+    """Token bucket budget: `capacity` requests, refilled over `period_seconds`."""
+    capacity: int
+    period_seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period_seconds
+
+
+def _parse_rule(value: str, default: RateLimitRule) -> RateLimitRule:
+    """Parse a '<capacity>/<period_seconds>' budget string."""
+    try:
+        capacity, period = value.split("/", 1)
+        rule = RateLimitRule(capacity=int(capacity), period_seconds=float(period))
+        if rule.capacity <= 0 or rule.period_seconds <= 0:
+            raise ValueError("capacity and period must be positive")
+        return rule
+    except ValueError as e:
+        logger.warning(f"Invalid rate limit budget '{value}', using default: {e}")
+        return default
+
+
+class RateLimitConfig:
+    """Configuration for rate limiting."""
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+
+    BACKEND: str = os.environ.get('RATE_LIMIT_BACKEND', 'memory').lower()
+
+    # Default budgets per route
+    DEFAULT_RULES: Dict[str, RateLimitRule] = {
+        "analyze": RateLimitRule(capacity=10, period_seconds=60),
+        "reanalyze": RateLimitRule(capacity=5, period_seconds=60),
+        "password_reset": RateLimitRule(capacity=3, period_seconds=900),
+        "debug_ingest": RateLimitRule(capacity=60, period_seconds=60),
+        "upload_session": RateLimitRule(capacity=10, period_seconds=60),
+        "upload_chunk": RateLimitRule(capacity=300, period_seconds=60),
+    }
+
+    # Reverse proxies that append the client address to X-Forwarded-For.
+    # Only entries they appended are trusted - the rest is client-supplied.
+    TRUSTED_PROXY_HOPS: int = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+    # Bound on in-memory buckets before idle (full) buckets are pruned
+    MEMORY_MAX_KEYS: int = int(os.environ.get('RATE_LIMIT_MEMORY_MAX_KEYS', '100000'))
+    
+    # PostgreSQL backend: prune idle rows every N charges
+    POSTGRES_PRUNE_EVERY: int = int(os.environ.get('RATE_LIMIT_POSTGRES_PRUNE_EVERY', '1000'))
+    POSTGRES_PRUNE_AFTER_HOURS: int = 24
+
+    @classmethod
+    def get_rule(cls, route: str) -> RateLimitRule:
+        default = cls.DEFAULT_RULES.get(route, RateLimitRule(capacity=60, period_seconds=60))
+        override = os.environ.get(f"RATE_LIMIT_{route.upper()}")
+        return _parse_rule(override, default) if override else default
+
+
+# ============================================================================
+# DATA STRUCTURES
+# ============================================================================
+
+@dataclass
+class RateLimitResult:
+    """Outcome of charging one request against a bucket."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_seconds: int  # Seconds until the bucket is full again
+    retry_after_seconds: int  # Seconds until a denied request may succeed (0 if allowed)
+
+    def headers(self) -> Dict[str, str]:
+        """Standard rate limit response headers."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset_seconds),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after_seconds)
+        return headers
+
+
+def _build_result(rule: RateLimitRule, tokens: float, allowed: bool, cost: float) -> RateLimitResult:
+    rate = rule.refill_per_second
+    return RateLimitResult(
+        allowed=allowed,
+        limit=rule.capacity,
+        remaining=max(0, int(tokens)),
+        reset_seconds=math.ceil(max(0.0, rule.capacity - tokens) / rate),
+        retry_after_seconds=0 if allowed else max(1, math.ceil((cost - tokens) / rate)),
+    )
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class InMemoryBackend:
+    """
+    Token buckets held in process memory.
+    Only correct for a single worker - use PostgresBackend with several.
+    """
+
+    def __init__(self, max_keys: int = RateLimitConfig.MEMORY_MAX_KEYS):
+        # key -> (tokens, updated_at, period_seconds of the bucket's rule)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._max_keys = max_keys
+
+    async def take(self, keys: List[str], rule: RateLimitRule, cost: float = 1) -> List[RateLimitResult]:
+        now = time.monotonic()
+        levels = []
+        for key in keys:
+            tokens, updated_at, _ = self._buckets.get(key, (float(rule.capacity), now, rule.period_seconds))
+            levels.append(min(float(rule.capacity), tokens + (now - updated_at) * rule.refill_per_second))
+
+        allowed = all(tokens >= cost for tokens in levels)
+        if allowed:
+            levels = [tokens - cost for tokens in levels]
+
+        if len(self._buckets) + len(keys) > self._max_keys:
+            self._prune(now)
+        for key, tokens in zip(keys, levels):
+            self._buckets[key] = (tokens, now, rule.period_seconds)
+        return [_build_result(rule, tokens, allowed, cost) for tokens in levels]
+
+    def _prune(self, now: float):
+        """Drop buckets idle long enough to have refilled completely."""
+        stale = [k for k, (_, updated_at, period) in self._buckets.items()
+                 if now - updated_at >= period]
+        for k in stale:
+            del self._buckets[k]
+
+
+class PostgresBackend:
+    """
+    Token buckets stored in the rate_limit_buckets table, so limits hold across
+    uvicorn workers and replicas. A request's buckets are locked, checked and
+    charged in one transaction.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self._calls = 0
+
+    async def take(self, keys: List[str], rule: RateLimitRule, cost: float = 1) -> List[RateLimitResult]:
+        self._calls += 1
+        if self._calls % RateLimitConfig.POSTGRES_PRUNE_EVERY == 0:
+            await self._prune()
+
+        # now() is fixed for the transaction, so the SELECT and the UPDATE
+        # compute the same refill from the locked rows.
+        refilled = """LEAST(
+                    CAST(:capacity AS DOUBLE PRECISION),
+                    tokens + EXTRACT(EPOCH FROM (now() - updated_at))
+                        * CAST(:rate AS DOUBLE PRECISION)
+                )"""
+        params = {
+            "keys": sorted(keys),  # One lock order for every caller - no deadlocks
+            "capacity": float(rule.capacity),
+            "rate": rule.refill_per_second,
+        }
+        async with self.database.transaction():
+            await self.database.execute(
+                """
+                INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+                SELECT key, CAST(:capacity AS DOUBLE PRECISION), now()
+                FROM unnest(CAST(:keys AS TEXT[])) AS key
+                ON CONFLICT (key) DO NOTHING
+                """,
+                {"keys": params["keys"], "capacity": params["capacity"]}
+            )
+            rows = await self.database.fetch_all(
+                f"""
+                SELECT key, {refilled} AS tokens FROM rate_limit_buckets
+                WHERE key = ANY(:keys) ORDER BY key FOR UPDATE
+                """,
+                params
+            )
+            allowed = all(float(row["tokens"]) >= cost for row in rows)
+            rows = await self.database.fetch_all(
+                f"""
+                UPDATE rate_limit_buckets SET
+                    tokens = {refilled} - CAST(:charge AS DOUBLE PRECISION),
+                    updated_at = now()
+                WHERE key = ANY(:keys)
+                RETURNING key, tokens
+                """,
+                {**params, "charge": float(cost) if allowed else 0.0}
+            )
+        levels = {row["key"]: float(row["tokens"]) for row in rows}
+        return [_build_result(rule, levels[key], allowed, cost) for key in keys]
+
+    async def _prune(self):
+        """Delete buckets idle long enough to have refilled under any budget."""
+        await self.database.execute(
+            "DELETE FROM rate_limit_buckets WHERE updated_at < now() - make_interval(hours => :hours)",
+            {"hours": RateLimitConfig.POSTGRES_PRUNE_AFTER_HOURS}
+        )
+
+
+# ============================================================================
+# LIMITER
+# ============================================================================
+
+def bucket_key(route: str, identity: str) -> str:
+    """
+    Backend key for a route and identity. Identities longer than
+    BUCKET_KEY_MAX_IDENTITY (e.g. a 254-character email) are hashed, so keys
+    stay short in the table and in memory.
+    """
+    if len(identity) > BUCKET_KEY_MAX_IDENTITY:
+        identity = "sha256:" + hashlib.sha256(identity.encode()).hexdigest()
+    return f"{route}:{identity}"
+
+
+class RateLimiter:
+    """Charges requests against per-route, per-identity token buckets."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def hit(self, route: str, identities: List[str], cost: float = 1) -> Optional[RateLimitResult]:
+        """
+        Charge one request for every identity (e.g. 'user:<id>', 'ip:<addr>').
+
+        Returns the most restrictive result, or None when limiting is disabled
+        or unavailable. If any bucket denies the request, none is charged.
+        """
+        if not RateLimitConfig.is_enabled() or not identities:
+            return None
+
+        rule = RateLimitConfig.get_rule(route)
+        identities = list(dict.fromkeys(identities))
+        try:
+            results = await self.backend.take([bucket_key(route, identity) for identity in identities], rule, cost)
+        except Exception as e:
+            # Fail open - throttling must never take the API down
+            logger.error(f"Rate limiter backend error for {route}: {e}")
+            return None
+
+        if not results[0].allowed:
+            denied = [identity for identity, result in zip(identities, results) if result.remaining < cost]
+            logger.warning(f"Rate limit exceeded: route={route} identities={denied}")
+            return max(results, key=lambda result: result.retry_after_seconds)
+        return min(results, key=lambda result: result.remaining)
+
+
+def create_rate_limiter(database=None) -> RateLimiter:
+    """Build a limiter for the configured backend."""
+    if RateLimitConfig.BACKEND == "postgres":
+        if database is None:
+            raise ValueError("PostgreSQL rate limit backend requires a database")
+        logger.info("Rate limiting enabled: backend=postgres")
+        return RateLimiter(PostgresBackend(database))
+    logger.info("Rate limiting enabled: backend=memory")
+    return RateLimiter(InMemoryBackend())
@@ -0,0 +1,190 @@
+"""
+Scan Response Serialization
+
+Fast path for the scan history endpoints. Rows are read with a lean column
+projection and turned into JSON in a single pass, without building and then
+re-validating pydantic models.
+
+Features:
+- Column list limited to what the API actually returns (no raw_response,
+  quality_factors or other internal-only JSON)
+- One-pass row -> dict conversion shared with build_scan_response, so the
+  fast and model-based paths can't drift apart
+- Optional ground-truth label, read with the scan in the same query
+- Image URLs signed per scan when the bucket is private (cached per window)
+- orjson encoding when installed, stdlib json otherwise
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from starlette.responses import Response
+
+from region_calibration import RegionCalibrationConfig
+from r2_storage import scan_image_urls
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logging.warning("orjson not available - scan responses use stdlib json")
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# PROJECTION
+# ============================================================================
+
+# Columns needed to build a DeerAnalysisResponse - select these instead of
+# scans_table.select() on read paths
+SCAN_RESPONSE_COLUMNS = (
+    "id",
+    "user_id",
+    "local_image_id",
+    "deer_age",
+    "deer_type",
+    "deer_sex",
+    "antler_points",
+    "antler_points_left",
+    "antler_points_right",
+    "body_condition",
+    "confidence",
+    "recommendation",
+    "reasoning",
+    "notes",
+    "created_at",
+    "age_uncertain",
+    "age_confidence",
+    "recommendation_confidence",
+    "calibration_version",
+    "region_key",
+    "calibration_strategy",
+    "calibration_fallback_reason",
+    "image_url",
+    "thumbnail_url",
+    "preview_url",
+    "blurhash",
+    "is_favorite",
+    "tags",
+    "updated_at",
+)
+
+# scan_labels columns behind ScanLabelResponse. Selected as label_<name>
+# alongside the scan columns for include=label.
+SCAN_LABEL_COLUMNS = (
+    "id",
+    "scan_id",
+    "label_type",
+    "label_weight",
+    "effective_weight",
+    "reported_age",
+    "accuracy_category",
+    "error_bucket",
+    "prediction_error",
+    "harvest_confirmed",
+    "created_at",
+)
+
+
+# ============================================================================
+# SERIALIZATION
+# ============================================================================
+
+def _decode_tags(tags: Any) -> List[str]:
+    """Tags were historically stored JSON-encoded twice; accept either form."""
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags)
+        except ValueError:
+            return []
+    return tags or []
+
+
+def scan_response_fields(scan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a scan row to the DeerAnalysisResponse fields.
+
+    Handles both new scans (with calibration data) and legacy scans (without).
+    Region fields are feature-flagged in the response but always persisted.
+    """
+    config = RegionCalibrationConfig
+
+    # Build confidence breakdown if we have calibration data
+    confidence_breakdown = None
+    if scan.get("age_confidence") is not None or scan.get("recommendation_confidence") is not None:
+        confidence_breakdown = {
+            "age": scan.get("age_confidence") or 0,
+            "recommendation": scan.get("recommendation_confidence") or scan.get("confidence") or 0
+        }
+
+    return {
+        "id": scan["id"],
+        "user_id": scan["user_id"],
+        "local_image_id": scan["local_image_id"],
+        "deer_age": scan["deer_age"],
+        "deer_type": scan["deer_type"],
+        "deer_sex": scan["deer_sex"],
+        "antler_points": scan["antler_points"],
+        "antler_points_left": scan.get("antler_points_left"),
+        "antler_points_right": scan.get("antler_points_right"),
+        "body_condition": scan["body_condition"],
+        "confidence": scan["confidence"],
+        "recommendation": scan["recommendation"],
+        "reasoning": scan["reasoning"],
+        "notes": scan["notes"],
+        "created_at": scan["created_at"],
+        # Calibration fields
+        "age_uncertain": scan.get("age_uncertain"),
+        "confidence_breakdown": confidence_breakdown,
+        "calibration_version": scan.get("calibration_version"),
+        # Region fields (feature-flagged)
+        "region_key": scan.get("region_key") if config.CALIBRATION_SHOW_REGION else None,
+        "calibration_strategy": scan.get("calibration_strategy") if config.CALIBRATION_SHOW_STRATEGY else None,
+        "calibration_fallback_reason": scan.get("calibration_fallback_reason") if config.CALIBRATION_SHOW_STRATEGY else None,
+        # Cloud image storage (R2) - for cross-device image access
+        **scan_image_urls(scan),
+        "blurhash": scan.get("blurhash"),
+        # Favorites and Tags
+        "is_favorite": scan.get("is_favorite") or False,
+        "tags": _decode_tags(scan.get("tags")),
+        "updated_at": scan.get("updated_at"),
+    }
+
+
+def scan_label_fields(row: Dict[str, Any], prefix: str = "label_") -> Optional[Dict[str, Any]]:
+    """Map a row's label columns to the ScanLabelResponse fields (None when unlabeled)."""
+    if row.get(f"{prefix}id") is None:
+        return None
+
+    label = {name: row.get(f"{prefix}{name}") for name in SCAN_LABEL_COLUMNS}
+    label["label_type"] = label["label_type"] or "unknown"
+    label["label_weight"] = label["label_weight"] or 0
+    label["effective_weight"] = label["effective_weight"] or 0
+    label["harvest_confirmed"] = label["harvest_confirmed"] or False
+    return label
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode to JSON bytes, matching FastAPI's output for our scan payloads."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_json_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class ScanJSONResponse(Response):
+    """JSON response for pre-serialized scan payloads (skips response_model validation)."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,13 +1,17 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, UploadFile, File, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, UploadFile, File, Request, Response, Query
+from starlette.requests import ClientDisconnect
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
-from datetime import datetime, timedelta
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
 import jwt
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
@@ -22,6 +26,7 @@ import msal
 from databases import Database
 import sqlalchemy
 from sqlalchemy import MetaData, Table, Column, String, Integer, Float, Boolean, DateTime, Text, JSON
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 # Import region-aware confidence calibration module (replaces basic calibration)
 from region_calibration import (
@@ -47,8 +52,31 @@ from calibration_jobs import (
     CalibrationJobConfig
 )
 
+# Import local Apple identity token verification (cached JWKS)
+from apple_auth import verify_identity_token, apple_key_cache, AppleTokenError
+
+# Import token-bucket rate limiting for expensive endpoints
+from rate_limit import create_rate_limiter, RateLimitConfig
+
+# Import lean scan projection and fast response serialization
+from scan_serialization import (
+    SCAN_RESPONSE_COLUMNS, SCAN_LABEL_COLUMNS, scan_response_fields, scan_label_fields, ScanJSONResponse
+)
+
 # Import R2 storage for cloud image storage
-from r2_storage import upload_scan_image, delete_scan_image, R2_ENABLED
+from r2_storage import (
+    parse_base64_image, read_upload_async, create_upload_url, is_user_upload_key, scan_image_key, scan_image_keys, get_r2_metrics, scan_image_urls, signed_url_window, R2_ENABLED, R2_MAX_UPLOAD_BYTES, SCAN_IMAGE_URL_COLUMNS, UPLOAD_CONTENT_TYPES
+)
+from image_processing import get_image_metrics, shutdown_image_pool, run_in_image_pool, to_jpeg, ImageWorkerError
+from image_cache import scan_image_cache
+from image_purge import ImagePurger
+from image_assets import ImageAssetStore, asset_urls
+from storage_gc import StorageCollector, STORAGE_GC_ADMIN_TOKEN, STORAGE_GC_MAX_PAGES_LIMIT
+from upload_sessions import (
+    UploadSessionStore, UploadSessionError, parse_content_range,
+    UPLOAD_SESSION_CHUNK_BYTES, UPLOAD_SESSION_MAX_CHUNK_BYTES,
+)
+from account_purge import AccountPurger, get_account_purge_metrics, STATUS_PENDING
 
 # Import Phase 3 adaptive calibration module
 from adaptive_calibration import (
@@ -111,6 +139,10 @@ scans_table = Table(
     Column("user_id", String(36), nullable=False),
     Column("local_image_id", String(100)),
     Column("image_url", String, nullable=True),  # Cloud image URL (R2)
+    Column("thumbnail_url", String, nullable=True),  # 256px rendition for history lists
+    Column("preview_url", String, nullable=True),  # 768px rendition
+    Column("image_asset_id", String(36), nullable=True),  # image_assets row behind the URLs (null for legacy scans/ images)
+    Column("blurhash", String(64), nullable=True),  # Placeholder for lists, copied from the image asset
     Column("deer_age", Float),
     Column("deer_type", String(100)),
     Column("deer_sex", String(50)),
@@ -145,6 +177,38 @@ scans_table = Table(
     Column("is_favorite", Boolean, default=False),  # User favorite
     Column("tags", JSON, nullable=True),  # User tags for organization
     Column("posture_bucket", String(20), nullable=True),  # Future: posture analysis
+    Column("updated_at", DateTime, nullable=True),  # Bumped on every edit
+    Column("change_seq", sqlalchemy.BigInteger, nullable=True),  # Delta sync order (see next_change_seq)
+)
+
+# One row per (scan, tag) - the queryable copy of scans.tags
+scan_tags_table = Table(
+    "scan_tags",
+    metadata,
+    Column("scan_id", String(36), primary_key=True),
+    Column("tag", String(30), primary_key=True),
+    Column("user_id", String(36), nullable=False),
+)
+
+# Deleted scans, kept so other devices can learn about deletes via /scans/changes
+scan_tombstones_table = Table(
+    "scan_tombstones",
+    metadata,
+    Column("scan_id", String(36), primary_key=True),
+    Column("user_id", String(36), nullable=False),
+    Column("local_image_id", String(100)),
+    Column("deleted_at", DateTime, default=datetime.utcnow),
+    Column("change_seq", sqlalchemy.BigInteger, nullable=True),
+)
+
+# Per-user delta sync counter: every scan write and tombstone takes the next
+# number. pruned_seq is the newest tombstone pruned - cursors below it reset.
+scan_change_counters_table = Table(
+    "scan_change_counters",
+    metadata,
+    Column("user_id", String(36), primary_key=True),
+    Column("last_seq", sqlalchemy.BigInteger, nullable=False, server_default="0"),
+    Column("pruned_seq", sqlalchemy.BigInteger, nullable=False, server_default="0"),
 )
 
 # Scan labels table for empirical calibration (Phase 2) and trust weighting (Phase 3)
@@ -163,6 +227,119 @@ scan_labels_table = Table(
     Column("trust_weight", Float),  # 0-1 trust weight
 )
 
+# Per-user scan statistics rollup, maintained alongside every scan mutation
+user_scan_stats_table = Table(
+    "user_scan_stats",
+    metadata,
+    Column("user_id", String(36), primary_key=True),
+    Column("total_scans", Integer, default=0),
+    Column("harvest_count", Integer, default=0),
+    Column("pass_count", Integer, default=0),
+    Column("favorite_count", Integer, default=0),
+    Column("labeled_count", Integer, default=0),  # Scans with a scan_labels row
+    Column("last_scan_at", DateTime, nullable=True),
+    Column("updated_at", DateTime, default=datetime.utcnow),
+)
+
+# R2 object keys of deleted scans, drained in bulk by the image purge worker
+image_purge_queue_table = Table(
+    "image_purge_queue",
+    metadata,
+    Column("object_key", String(255), primary_key=True),
+    Column("queued_at", DateTime, default=datetime.utcnow),
+    Column("attempts", Integer, default=0),  # Failed DeleteObjects attempts
+    Column("claimed_until", DateTime, nullable=True),  # Lease held by the worker deleting it
+)
+
+image_purger = ImagePurger(database, image_purge_queue_table)
+
+# Stored scan images, one row per distinct upload (by SHA-256), shared by
+# every scan pointing at it through scans.image_asset_id
+image_assets_table = Table(
+    "image_assets",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("content_hash", String(64), nullable=False, unique=True),  # SHA-256 of the uploaded bytes
+    Column("object_key", String(255), nullable=False),  # Full image
+    Column("thumbnail_key", String(255), nullable=True),
+    Column("preview_key", String(255), nullable=True),
+    Column("extension", String(10)),
+    Column("content_type", String(50)),
+    Column("byte_size", Integer),  # Full image, as stored
+    Column("width", Integer),
+    Column("height", Integer),
+    Column("blurhash", String(64), nullable=True),
+    Column("ref_count", Integer, nullable=False, default=0),  # Scans pointing at it - deleted at 0
+    Column("created_at", DateTime, default=datetime.utcnow),
+)
+
+image_assets = ImageAssetStore(database, image_assets_table, image_purger)
+
+# Account deletion jobs - the user row goes immediately, the rest is purged
+# in the background by account_purger
+account_deletions_table = Table(
+    "account_deletions",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("user_id", String(36), nullable=False),
+    Column("status", String(20), default="pending"),  # pending, running, completed, failed
+    Column("attempts", Integer, default=0),
+    Column("requested_at", DateTime, default=datetime.utcnow),
+    Column("started_at", DateTime, nullable=True),
+    Column("updated_at", DateTime, default=datetime.utcnow),  # Heartbeat while running
+    Column("completed_at", DateTime, nullable=True),
+    Column("scans_deleted", Integer, default=0),
+    Column("labels_deleted", Integer, default=0),
+    Column("images_queued", Integer, default=0),
+    Column("debug_rows_deleted", Integer, default=0),  # crash_reports + debug_breadcrumbs
+    Column("last_error", Text, nullable=True),
+)
+
+account_purger = AccountPurger(database, image_purger, image_assets)
+
+# Orphaned R2 object collection runs - progress saved per listing page so a
+# run can be resumed (see storage_gc)
+storage_gc_runs_table = Table(
+    "storage_gc_runs",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("dry_run", Boolean, nullable=False),
+    Column("status", String(20), nullable=False),  # running, paused, completed, failed
+    Column("cutoff", DateTime, nullable=False),  # Only objects modified before this are collected
+    Column("start_after", Text, default=""),  # Last key handled - the listing resumes after it
+    Column("pages", Integer, default=0),
+    Column("objects_scanned", Integer, default=0),
+    Column("bytes_scanned", sqlalchemy.BigInteger, default=0),
+    Column("orphans_found", Integer, default=0),
+    Column("orphan_bytes", sqlalchemy.BigInteger, default=0),
+    Column("objects_deleted", Integer, default=0),
+    Column("bytes_deleted", sqlalchemy.BigInteger, default=0),
+    Column("delete_failures", Integer, default=0),
+    Column("started_at", DateTime, default=datetime.utcnow),
+    Column("updated_at", DateTime, default=datetime.utcnow),
+    Column("finished_at", DateTime, nullable=True),
+    Column("error", Text, nullable=True),
+)
+
+storage_collector = StorageCollector(database, storage_gc_runs_table)
+
+# Resumable chunked uploads - bytes staged on local disk (see upload_sessions)
+upload_sessions_table = Table(
+    "upload_sessions",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("user_id", String(36), nullable=False),
+    Column("content_type", String(50), nullable=False),
+    Column("total_bytes", Integer, nullable=False),
+    Column("committed_bytes", Integer, nullable=False, default=0),  # Durably staged prefix
+    Column("sha256", String(64), nullable=True),
+    Column("created_at", DateTime, default=datetime.utcnow),
+    Column("updated_at", DateTime, default=datetime.utcnow),
+    Column("expires_at", DateTime, nullable=False),
+)
+
+upload_sessions = UploadSessionStore(database, upload_sessions_table)
+
 # Calibration curves table for future empirical calibration (Phase 2)
 calibration_curves_table = Table(
     "calibration_curves",
@@ -235,6 +412,19 @@ password_reset_codes_table = Table(
     Column("used", Boolean, default=False),
 )
 
+# Scan read-path indexes, created at startup. `python -m cli.benchmarks search`
+# builds them from these same statements (with SCAN_SEARCH_INDEXES).
+# Scan history is always read per user, newest first - this index serves
+# both the user_id filter and keyset (cursor) pagination
+SCAN_HISTORY_INDEX = "CREATE INDEX IF NOT EXISTS idx_scans_user_created_id ON scans(user_id, created_at DESC, id DESC)"
+# Tag filters and per-tag counts
+SCAN_TAGS_INDEX = "CREATE INDEX IF NOT EXISTS idx_scan_tags_user_tag ON scan_tags(user_id, tag, scan_id)"
+# Favorites filter on the history list
+SCAN_FAVORITES_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_scans_user_favorite_created ON scans(user_id, created_at DESC, id DESC) "
+    "WHERE is_favorite IS TRUE"
+)
+
 # API Keys
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
@@ -256,6 +446,9 @@ stripe.api_key = STRIPE_SECRET_KEY
 # Password hasher
 ph = PasswordHasher()
 
+# Rate limiter (RATE_LIMIT_BACKEND=postgres shares budgets across workers)
+rate_limiter = create_rate_limiter(database)
+
 # Create the main app
 app = FastAPI(title="Iron Stag API", version="1.0.0")
 
@@ -329,12 +522,40 @@ class CheckoutRequest(BaseModel):
     plan: str = "monthly"
 
 class DeerAnalysisRequest(BaseModel):
-    image_base64: str
+    # Exactly one of: the image inline, the image_key of a direct upload (POST /uploads),
+    # or a completed resumable upload session (POST /uploads/sessions)
+    image_base64: Optional[str] = None
+    image_key: Optional[str] = None
+    upload_session_id: Optional[str] = None
     local_image_id: str
     notes: Optional[str] = None
     # Optional state for region-specific calibration (two-letter code)
     state: Optional[str] = None  # e.g., "TX", "IA", "GA"
 
+class UploadURLRequest(BaseModel):
+    content_type: str = "image/jpeg"
+
+class UploadURLResponse(BaseModel):
+    image_key: str
+    upload_url: str
+    method: str
+    headers: Dict[str, str]
+    expires_in: int
+
+class UploadSessionRequest(BaseModel):
+    content_type: str = "image/jpeg"
+    total_bytes: int
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")  # Hex digest of the whole image, checked before analysis
+
+class UploadSessionResponse(BaseModel):
+    session_id: str
+    content_type: str
+    total_bytes: int
+    committed_bytes: int  # Resume from here
+    complete: bool
+    chunk_bytes: int  # Suggested chunk size
+    expires_at: datetime
+
 class DeerAnalysisResponse(BaseModel):
     id: str
     user_id: str
@@ -361,9 +582,13 @@ class DeerAnalysisResponse(BaseModel):
     calibration_fallback_reason: Optional[str] = None
     # Cloud image storage (R2) - for cross-device image access
     image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None  # Small rendition for lists - full image_url on the detail view
+    preview_url: Optional[str] = None
+    blurhash: Optional[str] = None  # BlurHash placeholder to paint while the image loads
     # Favorites and Tags
     is_favorite: Optional[bool] = False
     tags: Optional[List[str]] = None
+    updated_at: Optional[datetime] = None
 
 class ScanUpdate(BaseModel):
     notes: Optional[str] = None
@@ -374,7 +599,8 @@ class ScanEditRequest(BaseModel):
     deer_type: Optional[str] = None
     antler_points_left: Optional[int] = None
     antler_points_right: Optional[int] = None
-    image_base64: Optional[str] = None  # Required if re-analyzing with LLM
+    image_base64: Optional[str] = None  # Re-analyze with LLM on this image
+    reanalyze: bool = False  # Re-analyze with LLM on the stored image (no image_base64 needed)
 
 
 # ============ SCAN LABEL MODELS (Phase 2 Empirical Calibration) ============
@@ -535,12 +761,20 @@ async def startup():
         
         # Cloud image storage (R2) - for cross-device image access
         await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS image_url VARCHAR(500)")  # R2 public URL
+        await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS thumbnail_url VARCHAR(500)")  # R2 renditions
+        await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS preview_url VARCHAR(500)")
+        await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS image_asset_id VARCHAR(36)")  # image_assets
+        await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS blurhash VARCHAR(64)")  # Placeholder
+        await database.execute("ALTER TABLE image_assets ADD COLUMN IF NOT EXISTS blurhash VARCHAR(64)")
         
         # Favorites and Tags for organizing scans
         await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS is_favorite BOOLEAN DEFAULT FALSE")
         await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS tags JSON")  # Array of tag strings
         await database.execute("CREATE INDEX IF NOT EXISTS idx_scans_is_favorite ON scans(is_favorite)")
-        
+
+        # Per-user history, newest first (list and keyset pagination)
+        await database.execute(SCAN_HISTORY_INDEX)
+
         # Label versioning for safe weight recomputation in future
         await database.execute("ALTER TABLE scan_labels ADD COLUMN IF NOT EXISTS label_version INTEGER DEFAULT 1")
         
@@ -624,14 +858,149 @@ async def startup():
         await database.execute("CREATE INDEX IF NOT EXISTS idx_recommendations_type ON model_action_recommendations(recommendation_type)")
         await database.execute("CREATE INDEX IF NOT EXISTS idx_recommendations_created ON model_action_recommendations(created_at)")
         
+        # Delta sync: edit timestamps and delete tombstones for /scans/changes
+        await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP")
+        await database.execute("UPDATE scans SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL")
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_scans_user_updated_id ON scans(user_id, updated_at, id)")
+        await database.execute("""
+            CREATE TABLE IF NOT EXISTS scan_tombstones (
+                scan_id VARCHAR(36) PRIMARY KEY,
+                user_id VARCHAR(36) NOT NULL,
+                local_image_id VARCHAR(100),
+                deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_scan_tombstones_user_deleted ON scan_tombstones(user_id, deleted_at, scan_id)")
+        # Change sequence numbers - /scans/changes pages by these, not timestamps
+        await database.execute("ALTER TABLE scans ADD COLUMN IF NOT EXISTS change_seq BIGINT")
+        await database.execute("ALTER TABLE scan_tombstones ADD COLUMN IF NOT EXISTS change_seq BIGINT")
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_scans_user_change_seq ON scans(user_id, change_seq)")
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_scan_tombstones_user_change_seq ON scan_tombstones(user_id, change_seq)")
+        await database.execute(SCAN_CHANGE_SEQ_BACKFILL_SQL)
+        await prune_scan_tombstones()
+
+        # Normalized tags: scan_tags is the filterable copy of scans.tags
+        await database.execute("""
+            CREATE TABLE IF NOT EXISTS scan_tags (
+                scan_id VARCHAR(36) NOT NULL,
+                tag VARCHAR(30) NOT NULL,
+                user_id VARCHAR(36) NOT NULL,
+                PRIMARY KEY (scan_id, tag)
+            )
+        """)
+        await database.execute(SCAN_TAGS_INDEX)
+        # Multi-attribute scan search (/scans/search)
+        for index_sql in SCAN_SEARCH_INDEXES:
+            await database.execute(index_sql)
+
+        # Favorites filter on the history list
+        await database.execute(SCAN_FAVORITES_INDEX)
+
+        # Per-user scan stats rollup (dashboard summary reads one row)
+        await database.execute("""
+            CREATE TABLE IF NOT EXISTS user_scan_stats (
+                user_id VARCHAR(36) PRIMARY KEY,
+                total_scans INTEGER DEFAULT 0,
+                harvest_count INTEGER DEFAULT 0,
+                pass_count INTEGER DEFAULT 0,
+                favorite_count INTEGER DEFAULT 0,
+                labeled_count INTEGER DEFAULT 0,
+                last_scan_at TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Backfill users with scans but no rollup row (first deploy, or scans
+        # written by a replica still on the old code). Rows that exist but
+        # drifted are fixed by POST /admin/scan-stats/reconcile.
+        await database.execute("""
+            INSERT INTO user_scan_stats (
+                user_id, total_scans, harvest_count, pass_count,
+                favorite_count, labeled_count, last_scan_at, updated_at
+            )
+            SELECT
+                s.user_id,
+                COUNT(*),
+                COUNT(*) FILTER (WHERE s.recommendation = 'HARVEST'),
+                COUNT(*) FILTER (WHERE s.recommendation = 'PASS'),
+                COUNT(*) FILTER (WHERE s.is_favorite),
+                COUNT(l.scan_id),
+                MAX(s.created_at),
+                CURRENT_TIMESTAMP
+            FROM scans s
+            LEFT JOIN (SELECT DISTINCT scan_id FROM scan_labels) l ON l.scan_id = s.id
+            WHERE NOT EXISTS (SELECT 1 FROM user_scan_stats st WHERE st.user_id = s.user_id)
+            GROUP BY s.user_id
+            ON CONFLICT (user_id) DO NOTHING
+        """)
+
+        # Debug tables (also created on first write) and the account purge jobs
+        # that clear them by user_id
+        await database.execute(CRASH_REPORTS_TABLE_SQL)
+        await database.execute(DEBUG_BREADCRUMBS_TABLE_SQL)
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_crash_reports_user_id ON crash_reports(user_id)")
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_debug_breadcrumbs_user_id ON debug_breadcrumbs(user_id)")
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_account_deletions_status ON account_deletions(status, requested_at)")
+        # Image purge batches are leased to one worker at a time
+        await database.execute("ALTER TABLE image_purge_queue ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMP")
+
+        # Identity lookups (login, registration, Apple sign-in, profile updates)
+        # compare case-insensitively, so they need functional indexes
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users (lower(email))")
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users (lower(username))")
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_users_apple_user_id ON users (apple_user_id)")
+        
+        # Token buckets for the PostgreSQL rate limit backend
+        await database.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                tokens DOUBLE PRECISION NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+        # Tables created before keys were TEXT, with an unused allowed column
+        await database.execute("ALTER TABLE rate_limit_buckets ALTER COLUMN key TYPE TEXT")
+        await database.execute("ALTER TABLE rate_limit_buckets DROP COLUMN IF EXISTS allowed")
+        await database.execute("CREATE INDEX IF NOT EXISTS idx_rate_limit_buckets_updated ON rate_limit_buckets(updated_at)")
+        
         logger.info("Database migrations completed")
     except Exception as e:
         logger.warning(f"Migration note: {e}")
+
+    # Own block: legacy tag data must not be able to skip the migrations above
+    try:
+        await normalize_legacy_scan_tags()
+        # Per scan, so tags written by a replica on older code are picked up on
+        # the next boot. Edits to already-normalized scans are repaired by
+        # POST /admin/scan-tags/reconcile.
+        await database.execute(f"""
+            INSERT INTO scan_tags (scan_id, tag, user_id)
+            {SCAN_TAGS_SOURCE_SQL}
+              AND NOT EXISTS (SELECT 1 FROM scan_tags st WHERE st.scan_id = s.id)
+            ON CONFLICT DO NOTHING
+        """)
+    except Exception as e:
+        logger.warning(f"Scan tags backfill failed: {e}")
     
     logger.info("Database connected and tables created")
+    
+    # Warm Apple's signing keys from disk and keep them fresh in the background
+    apple_key_cache.load_from_disk()
+    app.state.apple_jwks_refresh_task = asyncio.create_task(apple_key_cache.refresh_periodically())
+    
+    # Delete images of deleted scans from R2 in the background
+    app.state.image_purge_task = asyncio.create_task(image_purger.run_forever())
+    # Finish account deletions, including any interrupted by a restart
+    app.state.account_purge_task = asyncio.create_task(account_purger.run_forever())
+    # Drop resumable uploads that were never finished
+    app.state.upload_session_purge_task = asyncio.create_task(upload_sessions.run_forever())
 
 @app.on_event("shutdown")
 async def shutdown():
+    app.state.apple_jwks_refresh_task.cancel()
+    app.state.image_purge_task.cancel()
+    app.state.account_purge_task.cancel()
+    app.state.upload_session_purge_task.cancel()
+    shutdown_image_pool()
     await database.disconnect()
     logger.info("Database disconnected")
 
@@ -656,55 +1025,82 @@ def verify_token(token: str) -> str:
 def build_scan_response(scan: dict) -> DeerAnalysisResponse:
     """
     Helper to build DeerAnalysisResponse with calibration and region fields.
-    Handles both new scans (with calibration data) and legacy scans (without).
-    
-    Region fields are feature-flagged in response but always persisted internally.
+    Read-only routes skip the model and return ScanJSONResponse directly.
     """
-    config = RegionCalibrationConfig
-    
-    # Build confidence breakdown if we have calibration data
-    confidence_breakdown = None
-    if scan.get("age_confidence") is not None or scan.get("recommendation_confidence") is not None:
-        confidence_breakdown = {
-            "age": scan.get("age_confidence") or 0,
-            "recommendation": scan.get("recommendation_confidence") or scan.get("confidence") or 0
-        }
-    
-    # Region fields (feature-flagged)
-    region_key = scan.get("region_key") if config.CALIBRATION_SHOW_REGION else None
-    calibration_strategy = scan.get("calibration_strategy") if config.CALIBRATION_SHOW_STRATEGY else None
-    calibration_fallback_reason = scan.get("calibration_fallback_reason") if config.CALIBRATION_SHOW_STRATEGY else None
-    
-    return DeerAnalysisResponse(
-        id=scan["id"],
-        user_id=scan["user_id"],
-        local_image_id=scan["local_image_id"],
-        deer_age=scan["deer_age"],
-        deer_type=scan["deer_type"],
-        deer_sex=scan["deer_sex"],
-        antler_points=scan["antler_points"],
-        antler_points_left=scan.get("antler_points_left"),
-        antler_points_right=scan.get("antler_points_right"),
-        body_condition=scan["body_condition"],
-        confidence=scan["confidence"],
-        recommendation=scan["recommendation"],
-        reasoning=scan["reasoning"],
-        notes=scan["notes"],
-        created_at=scan["created_at"],
-        # Calibration fields
-        age_uncertain=scan.get("age_uncertain"),
-        confidence_breakdown=confidence_breakdown,
-        calibration_version=scan.get("calibration_version"),
-        # Region fields (feature-flagged)
-        region_key=region_key,
-        calibration_strategy=calibration_strategy,
-        calibration_fallback_reason=calibration_fallback_reason,
-        # Cloud image storage (R2) - for cross-device image access
-        image_url=scan.get("image_url"),
-        # Favorites and Tags
-        is_favorite=scan.get("is_favorite") or False,
-        tags=scan.get("tags") or [],
-    )
+    return DeerAnalysisResponse(**scan_response_fields(scan))
+
+def select_scan_responses():
+    """SELECT of only the scan columns the API returns (no raw_response etc.)."""
+    return sqlalchemy.select(*[scans_table.c[name] for name in SCAN_RESPONSE_COLUMNS])
+
+# Optional relations a scan read can embed via ?include=
+SCAN_INCLUDES = {"label"}
+
+def parse_scan_include(include: Optional[str]) -> bool:
+    """Whether `include` asks for the scan's label. 400 on anything unsupported."""
+    requested = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unsupported = requested - SCAN_INCLUDES
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported include: {', '.join(sorted(unsupported))}")
+    return "label" in requested
+
+def with_scan_label(query):
+    """
+    Add each scan's label (if any) to a scan SELECT as label_* columns, with a
+    LEFT JOIN LATERAL on idx_scan_labels_scan_id - scans and labels in one query.
+    """
+    # Most label columns were added by migration, so they're not on scan_labels_table
+    labels = sqlalchemy.table("scan_labels", *[sqlalchemy.column(name) for name in SCAN_LABEL_COLUMNS])
+    label = sqlalchemy.select(
+        *[labels.c[name].label(f"label_{name}") for name in SCAN_LABEL_COLUMNS]
+    ).where(
+        labels.c.scan_id == scans_table.c.id
+    ).order_by(labels.c.created_at.desc()).limit(1).lateral("label")
+    return query.add_columns(*label.c).select_from(scans_table.outerjoin(label, sqlalchemy.true()))
+
+def scan_payload(scan: dict, include_label: bool = False) -> dict:
+    """Response fields for a scan row, plus its label when requested."""
+    fields = scan_response_fields(scan)
+    if include_label:
+        fields["label"] = scan_label_fields(scan)
+    return fields
+
+async def update_owned_scan(scan_id: str, user_id: str, values: dict, if_changed: bool = False) -> Optional[dict]:
+    """
+    Update one of the user's scans and return it, in a single round trip:
+    UPDATE ... WHERE id AND user_id RETURNING the response columns.
+    Raises 404 if the scan doesn't exist or isn't the user's.
+
+    Bumps updated_at and change_seq. With no values the scan is only read.
+
+    With if_changed, the UPDATE only matches if some value differs from the
+    row, and None is returned when nothing differs. The check is part of the
+    WHERE clause, so Postgres re-evaluates it against the latest row version
+    when a concurrent write got there first - a returned row means this call
+    really changed the values (for rollup deltas).
+    """
+    owned = (scans_table.c.id == scan_id) & (scans_table.c.user_id == user_id)
+    returning = [scans_table.c[name] for name in SCAN_RESPONSE_COLUMNS]
+
+    if not values:
+        query = sqlalchemy.select(*returning).where(owned)
+    else:
+        seq, change_seq = next_change_seq(user_id)
+        query = scans_table.update().where(owned).values(
+            updated_at=datetime.utcnow(), change_seq=change_seq, **values
+        ).add_cte(seq)
+        if if_changed:
+            query = query.where(sqlalchemy.or_(
+                *(scans_table.c[name].is_distinct_from(value) for name, value in values.items())
+            ))
+        query = query.returning(*returning)
+
+    scan = await database.fetch_one(query)
+    if not scan:
+        if if_changed and await database.fetch_one(sqlalchemy.select(scans_table.c.id).where(owned)):
+            return None
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return dict(scan)
 
 async def get_current_user(authorization: str = Header(None)) -> dict:
     if not authorization or not authorization.startswith("Bearer "):
@@ -734,22 +1130,203 @@ async def get_optional_user(authorization: str = Header(None)) -> Optional[dict]
     except Exception:
         return None
 
+# ============ IDENTITY LOOKUP ============
+
+# Every identity lookup below is a single round trip, served by the functional
+# indexes on lower(email), lower(username) and apple_user_id.
+
+async def find_user_by_identifier(identifier: str) -> Optional[dict]:
+    """
+    Resolve a login identifier (email or username) to a user.
+    An email match takes precedence over a username match.
+    """
+    identifier = identifier.lower().strip()
+    email_match = sqlalchemy.func.lower(users_table.c.email) == identifier
+    username_match = sqlalchemy.func.lower(users_table.c.username) == identifier
+
+    query = users_table.select().where(
+        email_match | username_match
+    ).order_by(
+        sqlalchemy.case((email_match, sqlalchemy.literal_column("0")), else_=sqlalchemy.literal_column("1"))
+    ).limit(1)
+    user = await database.fetch_one(query)
+    return dict(user) if user else None
+
+async def find_identity_conflicts(
+    email: Optional[str] = None,
+    username: Optional[str] = None,
+    exclude_user_id: Optional[str] = None
+) -> Dict[str, bool]:
+    """
+    Check email and username uniqueness in one query.
+    Returns {"email": bool, "username": bool} - True means already taken.
+    """
+    checks = {}
+    if email:
+        checks["email"] = sqlalchemy.func.lower(users_table.c.email) == email.lower().strip()
+    if username:
+        checks["username"] = sqlalchemy.func.lower(users_table.c.username) == username.lower().strip()
+
+    conflicts = {"email": False, "username": False}
+    if not checks:
+        return conflicts
+
+    query = sqlalchemy.select(*[
+        sqlalchemy.func.coalesce(sqlalchemy.func.bool_or(condition), False).label(field)
+        for field, condition in checks.items()
+    ]).select_from(users_table).where(sqlalchemy.or_(*checks.values()))
+    if exclude_user_id:
+        query = query.where(users_table.c.id != exclude_user_id)
+
+    row = await database.fetch_one(query)
+    if row:
+        row = dict(row)
+        for field in checks:
+            conflicts[field] = bool(row.get(field))
+    return conflicts
+
+async def find_user_for_apple_sign_in(apple_user_id: str, email: Optional[str] = None) -> Optional[dict]:
+    """
+    Resolve an Apple sign-in to a user in one query.
+    A user already linked to the Apple ID wins over an email match.
+    """
+    apple_match = users_table.c.apple_user_id == apple_user_id
+    condition = apple_match
+    if email:
+        condition = apple_match | (sqlalchemy.func.lower(users_table.c.email) == email.lower())
+
+    query = users_table.select().where(condition).order_by(
+        sqlalchemy.case((apple_match, sqlalchemy.literal_column("0")), else_=sqlalchemy.literal_column("1"))
+    ).limit(1)
+    user = await database.fetch_one(query)
+    return dict(user) if user else None
+
+# ============ CONDITIONAL REQUESTS ============
+
+# Per-user GETs send a weak ETag; the app echoes it in If-None-Match and gets
+# an empty 304 when nothing changed. Responses are private to the user and
+# must be revalidated on every use.
+CACHE_CONTROL_PRIVATE = "private, no-cache"
+
+# Deployment-level settings that change response bodies without touching rows
+ETAG_SALT = f"v1:{RegionCalibrationConfig.CALIBRATION_SHOW_REGION}:{RegionCalibrationConfig.CALIBRATION_SHOW_STRATEGY}"
+
+def make_etag(*parts) -> str:
+    """Weak ETag over the given version components."""
+    digest = hashlib.sha1("|".join(str(part) for part in (ETAG_SALT, *parts)).encode()).hexdigest()
+    return f'W/"{digest[:24]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of If-None-Match against `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL_PRIVATE, "Vary": "Authorization"}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+async def scan_history_version(user_id: str) -> tuple:
+    """
+    Cheap version of a user's whole scan history: the user's last change
+    number. Every scan write (create, edit, label, delete, recalibration)
+    takes a new one (see next_change_seq), and it is a primary key probe.
+    Unlike app-clock timestamps it can't go backwards between replicas.
+    """
+    last_seq = await database.fetch_val(
+        sqlalchemy.select(scan_change_counters_table.c.last_seq)
+        .where(scan_change_counters_table.c.user_id == user_id)
+    )
+    return (last_seq or 0,)
+
+# ============ RATE LIMITING ============
+
+def get_client_ip(request: Request) -> str:
+    """
+    Client IP for rate limiting.
+    
+    Behind TRUSTED_PROXY_HOPS proxies (Railway's edge), the client address is
+    the entry the outermost trusted proxy appended to X-Forwarded-For -
+    counting from the right. Entries left of it are whatever the client sent.
+    """
+    hops = RateLimitConfig.TRUSTED_PROXY_HOPS
+    forwarded = request.headers.get("x-forwarded-for")
+    if hops > 0 and forwarded:
+        entries = [entry.strip() for entry in forwarded.split(",") if entry.strip()]
+        if entries:
+            return entries[-min(hops, len(entries))]
+    return request.client.host if request.client else "unknown"
+
+async def enforce_rate_limit(
+    route: str,
+    request: Request,
+    response: Response,
+    user_id: Optional[str] = None,
+    extra_identities: Optional[List[str]] = None
+):
+    """
+    Charge a request against the route's token buckets.
+    Authenticated requests are keyed by user (so carrier NAT doesn't pool
+    users together), anonymous ones by client IP. Raises 429 when exhausted.
+    """
+    identities = [f"user:{user_id}" if user_id else f"ip:{get_client_ip(request)}"]
+    identities.extend(extra_identities or [])
+    
+    result = await rate_limiter.hit(route, identities)
+    if result is None:
+        return
+    
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "code": "RATE_LIMITED",
+                "message": "Too many requests. Please wait a moment and try again.",
+                "retry_after": result.retry_after_seconds
+            },
+            headers=result.headers()
+        )
+    response.headers.update(result.headers())
+
+def rate_limited(route: str, authenticated: bool = False):
+    """
+    Route dependency applying enforce_rate_limit.
+    
+    With authenticated=True it keys by the user from get_current_user, which
+    FastAPI resolves once per request and shares with the route. Otherwise
+    it keys by the bearer token's user if present, else the client IP.
+    """
+    if authenticated:
+        async def dependency(request: Request, response: Response, user: dict = Depends(get_current_user)):
+            await enforce_rate_limit(route, request, response, user_id=user["id"])
+        return dependency
+    
+    async def dependency(request: Request, response: Response, authorization: str = Header(None)):
+        user_id = None
+        if authorization and authorization.startswith("Bearer "):
+            try:
+                user_id = verify_token(authorization.split(" ")[1])
+            except HTTPException:
+                pass
+        await enforce_rate_limit(route, request, response, user_id=user_id)
+    return dependency
+
 # ============ AUTH ROUTES ============
 
 @api_router.post("/auth/register", response_model=TokenResponse)
 async def register(data: UserRegister):
-    # Check if email exists
-    query = users_table.select().where(users_table.c.email == data.email.lower())
-    existing = await database.fetch_one(query)
-    if existing:
+    # Check email and username uniqueness in one round trip
+    conflicts = await find_identity_conflicts(email=data.email, username=data.username)
+    if conflicts["email"]:
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Check if username exists
-    if data.username:
-        query = users_table.select().where(users_table.c.username == data.username.lower())
-        existing = await database.fetch_one(query)
-        if existing:
-            raise HTTPException(status_code=400, detail="Username already taken")
+    if conflicts["username"]:
+        raise HTTPException(status_code=400, detail="Username already taken")
     
     user_id = str(uuid.uuid4())
     hashed_password = ph.hash(data.password)
@@ -798,22 +1375,12 @@ async def register(data: UserRegister):
 
 @api_router.post("/auth/login", response_model=TokenResponse)
 async def login(data: UserLogin):
-    identifier = data.email.lower().strip()
-    
-    # Try email first
-    query = users_table.select().where(users_table.c.email == identifier)
-    user = await database.fetch_one(query)
-    
-    # Try username if email not found
-    if not user:
-        query = users_table.select().where(sqlalchemy.func.lower(users_table.c.username) == identifier)
-        user = await database.fetch_one(query)
+    # Email or username, resolved in a single query (email wins)
+    user = await find_user_by_identifier(data.email)
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    user = dict(user)
-    
     try:
         ph.verify(user["password"], data.password)
     except VerifyMismatchError:
@@ -841,13 +1408,23 @@ async def login(data: UserLogin):
 @api_router.post("/auth/apple", response_model=TokenResponse)
 async def apple_sign_in(data: AppleSignInRequest):
     """Sign in with Apple - creates account if not exists"""
-    # Check if user already exists by apple_user_id
-    query = users_table.select().where(users_table.c.apple_user_id == data.user)
-    user = await database.fetch_one(query)
+    # Verify the identity token locally against Apple's cached signing keys
+    try:
+        claims = await verify_identity_token(data.identity_token, expected_subject=data.user)
+    except AppleTokenError as e:
+        logger.warning(f"Apple sign-in rejected: {e}")
+        raise HTTPException(status_code=401, detail="Invalid Apple identity token")
     
-    if user:
+    # Only an email Apple has verified may link to or create an account
+    verified_email = None
+    if claims.get("email") and str(claims.get("email_verified", "")).lower() == "true":
+        verified_email = claims["email"].lower()
+    
+    # Look up by apple_user_id, falling back to email, in one query
+    user = await find_user_for_apple_sign_in(data.user, verified_email)
+    
+    if user and user.get("apple_user_id") == data.user:
         # Existing user - return token
-        user = dict(user)
         token = create_token(user["id"])
         return TokenResponse(
             access_token=token,
@@ -866,42 +1443,38 @@ async def apple_sign_in(data: AppleSignInRequest):
             )
         )
     
-    # Check if email already exists (but not linked to Apple)
-    if data.email:
-        query = users_table.select().where(users_table.c.email == data.email.lower())
-        existing_user = await database.fetch_one(query)
-        if existing_user:
-            # Link Apple ID to existing account
-            existing_user = dict(existing_user)
-            update_query = users_table.update().where(
-                users_table.c.id == existing_user["id"]
-            ).values(apple_user_id=data.user)
-            await database.execute(update_query)
-            
-            token = create_token(existing_user["id"])
-            return TokenResponse(
-                access_token=token,
-                user=UserResponse(
-                    id=existing_user["id"],
-                    email=existing_user["email"],
-                    name=existing_user["name"] or existing_user.get("email", "Apple User"),
-                    username=existing_user.get("username"),
-                    created_at=existing_user["created_at"],
-                    subscription_tier=existing_user.get("subscription_tier", "tracker"),
-                    scans_remaining=existing_user.get("scans_remaining", 3),
-                    total_scans_used=existing_user.get("total_scans_used", 0),
-                    disclaimer_accepted=existing_user.get("disclaimer_accepted", False),
-                    disclaimer_accepted_at=existing_user.get("disclaimer_accepted_at"),
-                    state=existing_user.get("state")
-                )
+    # Email already exists (but not linked to Apple)
+    if user:
+        # Link Apple ID to existing account
+        update_query = users_table.update().where(
+            users_table.c.id == user["id"]
+        ).values(apple_user_id=data.user)
+        await database.execute(update_query)
+        
+        token = create_token(user["id"])
+        return TokenResponse(
+            access_token=token,
+            user=UserResponse(
+                id=user["id"],
+                email=user["email"],
+                name=user["name"] or user.get("email", "Apple User"),
+                username=user.get("username"),
+                created_at=user["created_at"],
+                subscription_tier=user.get("subscription_tier", "tracker"),
+                scans_remaining=user.get("scans_remaining", 3),
+                total_scans_used=user.get("total_scans_used", 0),
+                disclaimer_accepted=user.get("disclaimer_accepted", False),
+                disclaimer_accepted_at=user.get("disclaimer_accepted_at"),
+                state=user.get("state")
             )
+        )
     
     # Create new user
     user_id = str(uuid.uuid4())
     now = datetime.utcnow()
     
-    # Use email from Apple or generate placeholder for private relay
-    email = data.email.lower() if data.email else f"{data.user}@privaterelay.appleid.com"
+    # Use verified email from Apple or generate placeholder for private relay
+    email = verified_email or f"{data.user}@privaterelay.appleid.com"
     name = data.full_name or "Apple User"
     
     insert_query = users_table.insert().values(
@@ -938,8 +1511,8 @@ async def apple_sign_in(data: AppleSignInRequest):
     )
 
 @api_router.get("/auth/me", response_model=UserResponse)
-async def get_me(user: dict = Depends(get_current_user)):
-    return UserResponse(
+async def get_me(request: Request, response: Response, user: dict = Depends(get_current_user)):
+    me = UserResponse(
         id=user["id"],
         email=user["email"],
         name=user["name"] or user["email"],
@@ -953,6 +1526,13 @@ async def get_me(user: dict = Depends(get_current_user)):
         state=user.get("state")
     )
 
+    # The user row is already loaded for auth, so hashing the body is free
+    etag = make_etag(me.model_dump_json())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    return me
+
 @api_router.put("/auth/profile", response_model=UserResponse)
 async def update_profile(data: ProfileUpdate, user: dict = Depends(get_current_user)):
     updates = {}
@@ -960,24 +1540,21 @@ async def update_profile(data: ProfileUpdate, user: dict = Depends(get_current_u
     if data.name is not None:
         updates["name"] = data.name
     
-    if data.username is not None:
-        query = users_table.select().where(
-            (users_table.c.username == data.username) & 
-            (users_table.c.id != user["id"])
+    if data.username is not None or data.email is not None:
+        conflicts = await find_identity_conflicts(
+            email=data.email,
+            username=data.username,
+            exclude_user_id=user["id"]
         )
-        existing = await database.fetch_one(query)
-        if existing:
+        if conflicts["username"]:
             raise HTTPException(status_code=400, detail="Username already taken")
+        if conflicts["email"]:
+            raise HTTPException(status_code=400, detail="Email already in use")
+    
+    if data.username is not None:
         updates["username"] = data.username
     
     if data.email is not None:
-        query = users_table.select().where(
-            (users_table.c.email == data.email.lower()) & 
-            (users_table.c.id != user["id"])
-        )
-        existing = await database.fetch_one(query)
-        if existing:
-            raise HTTPException(status_code=400, detail="Email already in use")
         updates["email"] = data.email.lower()
     
     if data.new_password:
@@ -1025,33 +1602,162 @@ async def delete_account(user: dict = Depends(get_current_user)):
     """
     Permanently delete user account and all associated data.
     This action cannot be undone.
+    
+    The account is gone (and its token stops working) as soon as this returns;
+    scans, labels, images and debug data are purged by a background job whose
+    progress is at GET /auth/account/deletion/{deletion_id}.
     """
     user_id = user["id"]
     user_email = user["email"]
+    deletion_id = str(uuid.uuid4())
+    now = datetime.utcnow()
     
     try:
-        # Delete all user's scans first
-        delete_scans_query = scans_table.delete().where(scans_table.c.user_id == user_id)
-        await database.execute(delete_scans_query)
-        logger.info(f"Deleted all scans for user {user_id}")
-        
-        # Delete any password reset codes (uses email, not user_id)
-        delete_reset_codes_query = password_reset_codes_table.delete().where(
-            password_reset_codes_table.c.email == user_email
-        )
-        await database.execute(delete_reset_codes_query)
-        logger.info(f"Deleted password reset codes for {user_email}")
-        
-        # Delete the user account
-        delete_user_query = users_table.delete().where(users_table.c.id == user_id)
-        await database.execute(delete_user_query)
-        logger.info(f"Deleted user account {user_id}")
-        
-        return {"message": "Account deleted successfully"}
-    
+        async with database.transaction():
+            await database.execute(account_deletions_table.insert().values(
+                id=deletion_id,
+                user_id=user_id,
+                status=STATUS_PENDING,
+                attempts=0,
+                requested_at=now,
+                updated_at=now,
+                scans_deleted=0,
+                labels_deleted=0,
+                images_queued=0,
+                debug_rows_deleted=0,
+            ))
+            
+            # Delete any password reset codes (uses email, not user_id)
+            await database.execute(password_reset_codes_table.delete().where(
+                password_reset_codes_table.c.email == user_email
+            ))
+            
+            # Delete the user account
+            await database.execute(users_table.delete().where(users_table.c.id == user_id))
+        logger.info(f"Deleted user account {user_id}, purge job {deletion_id} queued")
     except Exception as e:
         logger.error(f"Failed to delete account for user {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete account")
+    
+    account_purger.wake()
+    
+    return {
+        "message": "Account deleted successfully",
+        "deletion_id": deletion_id,
+        "status": STATUS_PENDING,
+    }
+
+@api_router.get("/auth/account/deletion/{deletion_id}")
+async def get_account_deletion_status(deletion_id: str):
+    """
+    Progress of an account's background data purge.
+    No auth - the account no longer exists; the id is an unguessable UUID.
+    """
+    job = await database.fetch_one(
+        account_deletions_table.select().where(account_deletions_table.c.id == deletion_id)
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion not found")
+    
+    return {
+        "deletion_id": job["id"],
+        "status": job["status"],
+        "requested_at": job["requested_at"],
+        "completed_at": job["completed_at"],
+        "scans_deleted": job["scans_deleted"],
+        "labels_deleted": job["labels_deleted"],
+        "images_queued": job["images_queued"],
+        "debug_rows_deleted": job["debug_rows_deleted"],
+    }
+
+@api_router.get("/admin/account-deletions/metrics")
+async def get_account_deletion_metrics():
+    """
+    Account purge job metrics for monitoring.
+    Returns:
+    - Jobs by status and age of the oldest unfinished job
+    - Completions in the last 24h and average time to complete
+    - Rows deleted / images queued across all jobs
+    - Image purge queue depth
+    """
+    return await get_account_purge_metrics(database)
+
+@api_router.get("/admin/storage/metrics")
+async def get_storage_metrics():
+    """
+    R2 client and image encoding metrics for monitoring.
+    Returns:
+    - Client pool size and retry settings
+    - Per-operation call count, errors and latency (mean, p50, p95, max)
+    - Images encoded: CPU time, bytes saved, formats chosen, over-target count
+    - Image assets: stored count/bytes, references and bytes saved by dedupe
+    - Re-analysis image cache: hits per tier (memory/disk), misses, bytes held
+    - Signed image URLs: cache entries, hits and misses
+    """
+    return {
+        **get_r2_metrics(),
+        "images": get_image_metrics(),
+        "assets": await image_assets.get_metrics(),
+        "image_cache": scan_image_cache.get_metrics(),
+    }
+
+class StorageGCRequest(BaseModel):
+    dry_run: bool = True  # Default to dry run for safety
+    grace_hours: Optional[float] = None  # Minimum object age (default: STORAGE_GC_GRACE_HOURS)
+    resume: bool = True  # Continue the last unfinished run of the same mode
+    max_pages: Optional[int] = None  # Listing pages before pausing (default: STORAGE_GC_MAX_PAGES)
+
+@api_router.post("/admin/storage/gc")
+async def run_storage_gc(data: StorageGCRequest, x_storage_gc_token: Optional[str] = Header(None)):
+    """
+    Find and delete R2 objects no row references (failed uploads, images
+    left by old delete paths, abandoned direct uploads).
+    
+    Safety features:
+    - dry_run mode (default) only counts orphans
+    - Objects younger than the grace period are never touched
+    - One run at a time
+    - Deleting (dry_run=false) requires the X-Storage-GC-Token header to
+      match STORAGE_GC_ADMIN_TOKEN, and is refused if that isn't set
+    
+    Each call handles up to max_pages listing pages (1000 keys each). A run
+    that stops short comes back "paused"; call again to resume it.
+    """
+    if not R2_ENABLED:
+        raise HTTPException(status_code=503, detail="R2 is not configured")
+    if not data.dry_run:
+        if not STORAGE_GC_ADMIN_TOKEN:
+            raise HTTPException(status_code=403, detail="Deleting is disabled - set STORAGE_GC_ADMIN_TOKEN")
+        if not x_storage_gc_token or not hmac.compare_digest(x_storage_gc_token.encode(), STORAGE_GC_ADMIN_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="Invalid storage GC token")
+    if data.max_pages is not None and not 1 <= data.max_pages <= STORAGE_GC_MAX_PAGES_LIMIT:
+        raise HTTPException(status_code=400, detail=f"max_pages must be between 1 and {STORAGE_GC_MAX_PAGES_LIMIT}")
+    if storage_collector.is_running:
+        raise HTTPException(
+            status_code=409,
+            detail="A storage GC run is already in progress. Please wait for it to complete."
+        )
+    if data.grace_hours is not None and data.grace_hours < 1:
+        raise HTTPException(status_code=400, detail="grace_hours must be at least 1")
+    
+    run = await storage_collector.run(
+        dry_run=data.dry_run,
+        grace_hours=data.grace_hours,
+        resume=data.resume,
+        max_pages=data.max_pages,
+    )
+    if run["status"] == "paused":
+        message = "Paused at page budget - call again to resume"
+    elif run["dry_run"]:
+        message = f"Dry run - {run['orphans_found']} orphaned objects ({run['orphan_bytes']} bytes) would be deleted"
+    else:
+        message = f"Deleted {run['objects_deleted']} orphaned objects ({run['bytes_deleted']} bytes)"
+    return {"success": run["status"] != "failed", **run, "message": message}
+
+@api_router.get("/admin/storage/gc/runs")
+async def get_storage_gc_runs(limit: int = 10):
+    """Recent storage GC runs with their progress and counts, newest first."""
+    return {"runs": await storage_collector.get_runs(min(limit, 100))}
 
 # ============ PASSWORD RESET ============
 
@@ -1110,7 +1816,13 @@ async def send_email_via_graph(to_email: str, subject: str, body: str):
         raise
 
 @api_router.post("/auth/request-password-reset")
-async def request_password_reset(data: PasswordResetRequest):
+async def request_password_reset(data: PasswordResetRequest, request: Request, response: Response):
+    # Throttle per client IP and per target address to stop email bombing
+    await enforce_rate_limit(
+        "password_reset", request, response,
+        extra_identities=[f"email:{data.email.lower()}"]
+    )
+    
     query = users_table.select().where(users_table.c.email == data.email.lower())
     user = await database.fetch_one(query)
     
@@ -1205,6 +1917,8 @@ async def accept_disclaimer(data: DisclaimerAccept, user: dict = Depends(get_cur
 
 # ============ SUBSCRIPTION HELPERS ============
 
+FREE_LIMIT_MESSAGE = "You've used all your free scans. Upgrade to Master Stag for unlimited scans."
+
 async def check_scan_eligibility(user: dict) -> dict:
     """Check if user can scan. Free tier: 3 lifetime, Premium: unlimited"""
     if user.get("subscription_tier") == "master_stag":
@@ -1217,7 +1931,7 @@ async def check_scan_eligibility(user: dict) -> dict:
         return {
             "allowed": False,
             "reason": "free_limit_reached",
-            "message": "You've used all your free scans. Upgrade to Master Stag for unlimited scans.",
+            "message": FREE_LIMIT_MESSAGE,
             "scans_remaining": 0,
             "total_scans_used": total_used,
             "is_premium": False
@@ -1230,27 +1944,47 @@ async def check_scan_eligibility(user: dict) -> dict:
         "is_premium": False
     }
 
-async def use_scan(user: dict) -> dict:
-    """Decrement scan count after successful scan"""
-    if user.get("subscription_tier") == "master_stag":
-        query = users_table.update().where(
-            users_table.c.id == user["id"]
-        ).values(total_scans_used=users_table.c.total_scans_used + 1)
-        await database.execute(query)
-        return {"scans_remaining": -1, "total_scans_used": user.get("total_scans_used", 0) + 1}
+async def reserve_scan(user_id: str) -> Optional[dict]:
+    """
+    Atomically reserve one scan before inference.
     
-    query = users_table.update().where(
-        users_table.c.id == user["id"]
-    ).values(
-        scans_remaining=users_table.c.scans_remaining - 1,
-        total_scans_used=users_table.c.total_scans_used + 1
-    )
-    await database.execute(query)
+    The quota check and decrement happen in a single conditional UPDATE, so
+    concurrent requests from one free user cannot overspend the quota and the
+    decision never relies on a stale user dict. Premium users only have
+    total_scans_used incremented.
     
-    return {
-        "scans_remaining": max(0, user.get("scans_remaining", 3) - 1),
-        "total_scans_used": user.get("total_scans_used", 0) + 1
-    }
+    Returns the updated quota row, or None if the free limit is reached.
+    """
+    row = await database.fetch_one(
+        """
+        UPDATE users
+        SET scans_remaining = CASE
+                WHEN subscription_tier = 'master_stag' THEN scans_remaining
+                ELSE scans_remaining - 1
+            END,
+            total_scans_used = COALESCE(total_scans_used, 0) + 1
+        WHERE id = :user_id
+          AND (subscription_tier = 'master_stag' OR scans_remaining > 0)
+        RETURNING subscription_tier, scans_remaining, total_scans_used
+        """,
+        {"user_id": user_id}
+    )
+    return dict(row) if row else None
+
+async def refund_scan(user_id: str):
+    """Give back a scan reserved by reserve_scan when no scan was saved."""
+    await database.execute(
+        """
+        UPDATE users
+        SET scans_remaining = CASE
+                WHEN subscription_tier = 'master_stag' THEN scans_remaining
+                ELSE scans_remaining + 1
+            END,
+            total_scans_used = GREATEST(COALESCE(total_scans_used, 0) - 1, 0)
+        WHERE id = :user_id
+        """,
+        {"user_id": user_id}
+    )
 
 # ============ SUBSCRIPTION ROUTES ============
 
@@ -1671,26 +2405,199 @@ async def revenuecat_webhook(request: Request):
         # Always return 200 to prevent retries for errors we can't fix
         return {"status": "error", "message": str(e)}
 
+# ============ DIRECT UPLOADS ============
+
+@api_router.post("/uploads", response_model=UploadURLResponse)
+async def create_upload(data: UploadURLRequest, user: dict = Depends(get_current_user)):
+    """
+    Presigned PUT URL for uploading a scan image straight to R2.
+    
+    PUT the image to upload_url with the returned headers, then call
+    /analyze-deer with image_key instead of image_base64. The URL is signed
+    locally - no round trip to R2.
+    """
+    if not R2_ENABLED:
+        raise HTTPException(status_code=503, detail="Direct uploads are not available - send image_base64")
+    if data.content_type not in UPLOAD_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported content type: {data.content_type}")
+    return create_upload_url(user["id"], data.content_type)
+
+async def load_upload(user_id: str, image_key: str) -> Tuple[bytes, str]:
+    """Read a user's staged upload for analysis, or raise the matching HTTP error."""
+    if not R2_ENABLED:
+        raise HTTPException(status_code=503, detail="Direct uploads are not available - send image_base64")
+    if not is_user_upload_key(user_id, image_key):
+        raise HTTPException(status_code=400, detail="Invalid image_key")
+    try:
+        upload = await read_upload_async(image_key)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found - PUT the image before analyzing")
+    return upload
+
+# ============ RESUMABLE UPLOADS ============
+
+def upload_session_response(session: dict) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        session_id=session["id"],
+        content_type=session["content_type"],
+        total_bytes=session["total_bytes"],
+        committed_bytes=session["committed_bytes"],
+        complete=session["committed_bytes"] >= session["total_bytes"],
+        chunk_bytes=UPLOAD_SESSION_CHUNK_BYTES,
+        expires_at=session["expires_at"],
+    )
+
+def upload_session_http_error(e: UploadSessionError) -> HTTPException:
+    """HTTP error for a rejected chunk or finalize - with the offset to resume from when known."""
+    if e.session is None:
+        return HTTPException(status_code=e.status_code, detail=e.message)
+    return HTTPException(
+        status_code=e.status_code,
+        detail={"message": e.message, "committed_bytes": e.session["committed_bytes"]},
+    )
+
+@api_router.post("/uploads/sessions", response_model=UploadSessionResponse, dependencies=[Depends(rate_limited("upload_session", authenticated=True))])
+async def create_upload_session(data: UploadSessionRequest, user: dict = Depends(get_current_user)):
+    """
+    Open a resumable upload for a scan image.
+    
+    PUT the bytes to /uploads/sessions/{session_id} in chunks, each with a
+    Content-Range header. After a dropped connection, GET the session and
+    continue from committed_bytes. Once complete, call /analyze-deer with
+    upload_session_id.
+    """
+    if data.content_type not in UPLOAD_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported content type: {data.content_type}")
+    if not 0 < data.total_bytes <= R2_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"total_bytes must be between 1 and {R2_MAX_UPLOAD_BYTES}")
+    try:
+        session = await upload_sessions.create(user["id"], data.content_type, data.total_bytes, data.sha256)
+    except UploadSessionError as e:
+        raise upload_session_http_error(e)
+    return upload_session_response(session)
+
+@api_router.get("/uploads/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(session_id: str, user: dict = Depends(get_current_user)):
+    """Upload progress - resume by sending bytes from committed_bytes on."""
+    session = await upload_sessions.get(session_id, user["id"])
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found or expired")
+    return upload_session_response(session)
+
+@api_router.put("/uploads/sessions/{session_id}", response_model=UploadSessionResponse, dependencies=[Depends(rate_limited("upload_chunk", authenticated=True))])
+async def put_upload_chunk(session_id: str, request: Request, user: dict = Depends(get_current_user)):
+    """
+    Upload one chunk. Content-Range: bytes <start>-<end>/<total> (end inclusive).
+    
+    start must not be past committed_bytes (409 returns the offset to resume
+    from). Bytes below it are skipped, so resending a chunk is harmless. If
+    the connection drops mid-chunk, the bytes that arrived are kept.
+    """
+    try:
+        start, end, total = parse_content_range(request.headers.get("content-range"))
+    except UploadSessionError as e:
+        raise upload_session_http_error(e)
+    expected = end - start + 1
+    if expected > UPLOAD_SESSION_MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=413, detail=f"Chunks are limited to {UPLOAD_SESSION_MAX_CHUNK_BYTES} bytes")
+    
+    chunk = bytearray()
+    disconnected = False
+    try:
+        async for piece in request.stream():
+            chunk += piece
+            if len(chunk) > expected:
+                raise HTTPException(status_code=400, detail="Body is longer than its Content-Range")
+    except ClientDisconnect:
+        # Keep what made it - the client resumes from the committed offset
+        disconnected = True
+    if not disconnected and len(chunk) != expected:
+        raise HTTPException(status_code=400, detail="Body length doesn't match Content-Range")
+    
+    try:
+        session = await upload_sessions.append(session_id, user["id"], start, bytes(chunk), total)
+    except UploadSessionError as e:
+        raise upload_session_http_error(e)
+    return upload_session_response(session)
+
+@api_router.delete("/uploads/sessions/{session_id}")
+async def delete_upload_session(session_id: str, user: dict = Depends(get_current_user)):
+    """Abandon an upload and free its staged bytes."""
+    if not await upload_sessions.get(session_id, user["id"]):
+        raise HTTPException(status_code=404, detail="Upload session not found or expired")
+    await upload_sessions.delete(session_id)
+    return {"message": "Upload session deleted"}
+
+async def load_upload_session(user_id: str, session_id: str) -> Tuple[bytes, str]:
+    """Read a user's completed upload session for analysis, or raise the matching HTTP error."""
+    try:
+        return await upload_sessions.read_complete(session_id, user_id)
+    except UploadSessionError as e:
+        raise upload_session_http_error(e)
+
+async def load_scan_image(scan: dict) -> str:
+    """A scan's stored full image as a data URL for re-analysis, or raise the matching HTTP error."""
+    object_key = scan.get("object_key") or scan_image_key(scan.get("image_url"))
+    if not R2_ENABLED or not object_key:
+        raise HTTPException(status_code=409, detail="No stored image for this scan - send image_base64 to re-analyze")
+    try:
+        stored = await scan_image_cache.get(object_key)
+    except Exception as e:
+        logger.error(f"Failed to load stored image {object_key}: {e}")
+        raise HTTPException(status_code=503, detail="Stored image unavailable - send image_base64 to re-analyze")
+    if stored is None:
+        raise HTTPException(status_code=409, detail="No stored image for this scan - send image_base64 to re-analyze")
+
+    image_bytes, content_type = stored
+    if content_type not in UPLOAD_CONTENT_TYPES:
+        # e.g. AVIF, which the analysis model doesn't read
+        try:
+            image_bytes, content_type = await run_in_image_pool(to_jpeg, image_bytes), "image/jpeg"
+        except ImageWorkerError as e:
+            logger.error(f"Failed to convert stored image {object_key}: {e}")
+            raise HTTPException(status_code=422, detail="Stored image could not be decoded - send image_base64 to re-analyze")
+    return f"data:{content_type};base64,{base64.b64encode(image_bytes).decode()}"
+
 # ============ DEER ANALYSIS ============
 
-@api_router.post("/analyze-deer", response_model=DeerAnalysisResponse)
+@api_router.post("/analyze-deer", response_model=DeerAnalysisResponse, dependencies=[Depends(rate_limited("analyze", authenticated=True))])
 async def analyze_deer(data: DeerAnalysisRequest, user: dict = Depends(get_current_user)):
-    eligibility = await check_scan_eligibility(user)
-    if not eligibility["allowed"]:
+    sources = [data.image_base64, data.image_key, data.upload_session_id]
+    if sum(source is not None for source in sources) != 1:
+        raise HTTPException(status_code=400, detail="Send exactly one of image_base64, image_key or upload_session_id")
+    
+    # Direct or resumable upload - read it before reserving, so a bad key costs no scan
+    upload = None
+    if data.image_key:
+        upload = await load_upload(user["id"], data.image_key)
+    elif data.upload_session_id:
+        upload = await load_upload_session(user["id"], data.upload_session_id)
+    
+    # Reserve the scan up front; it is refunded below unless a scan is saved
+    reservation = await reserve_scan(user["id"])
+    if not reservation:
         raise HTTPException(
             status_code=403,
             detail={
                 "code": "FREE_LIMIT_REACHED",
-                "message": eligibility["message"],
+                "message": FREE_LIMIT_MESSAGE,
                 "scans_remaining": 0,
                 "upgrade_required": True
             }
         )
     
+    scan_saved = False
+    image_asset = None
     try:
-        image_data = data.image_base64
-        if not image_data.startswith("data:"):
-            image_data = f"data:image/jpeg;base64,{image_data}"
+        if upload:
+            image_bytes, content_type = upload
+            image_data = f"data:{content_type};base64,{base64.b64encode(image_bytes).decode()}"
+        else:
+            image_data = data.image_base64
+            if not image_data.startswith("data:"):
+                image_data = f"data:image/jpeg;base64,{image_data}"
         
         response = openai_client.chat.completions.create(
             model="gpt-4o",
@@ -1810,17 +2717,21 @@ async def analyze_deer(data: DeerAnalysisRequest, user: dict = Depends(get_curre
         
         scan_id = str(uuid.uuid4())
         
-        # Upload image to R2 cloud storage for cross-device access
-        image_url = None
+        # Store image and renditions in R2 for cross-device access - reused
+        # as-is if these exact bytes were uploaded before
+        image_urls = {column: None for column in SCAN_IMAGE_URL_COLUMNS}
         if R2_ENABLED:
             try:
-                image_url = upload_scan_image(scan_id, image_data)
-                if image_url:
-                    logger.info(f"Image uploaded to R2 for scan {scan_id}")
+                image_asset = await image_assets.acquire(*(upload or parse_base64_image(image_data)))
+                if image_asset:
+                    image_urls = asset_urls(image_asset)
+                    logger.info(f"Image asset {image_asset['id']} stored for scan {scan_id}")
             except Exception as e:
                 logger.warning(f"Failed to upload image to R2: {e}")
                 # Continue without cloud image - local image still works
         
+        now = datetime.utcnow()
+        seq, change_seq = next_change_seq(user["id"])
         query = scans_table.insert().values(
             id=scan_id,
             user_id=user["id"],
@@ -1837,7 +2748,9 @@ async def analyze_deer(data: DeerAnalysisRequest, user: dict = Depends(get_curre
             reasoning=calibrated_analysis.get("reasoning"),
             notes=data.notes,
             raw_response=analysis,  # Preserve original for debugging
-            created_at=datetime.utcnow(),
+            created_at=now,
+            updated_at=now,
+            change_seq=change_seq,
             # Calibration fields
             raw_confidence=calibrated_analysis.get("raw_confidence"),
             age_confidence=calibrated_analysis.get("age_confidence"),
@@ -1851,111 +2764,807 @@ async def analyze_deer(data: DeerAnalysisRequest, user: dict = Depends(get_curre
             calibration_strategy=calibrated_analysis.get("calibration_strategy"),
             calibration_fallback_reason=calibrated_analysis.get("calibration_fallback_reason"),
             # Cloud image storage (R2)
-            image_url=image_url,
+            **image_urls,
+            image_asset_id=image_asset["id"] if image_asset else None,
+            blurhash=image_asset["blurhash"] if image_asset else None,
+        ).add_cte(seq)
+        async with database.transaction():
+            await database.execute(query)
+            await apply_scan_stats_delta(user["id"], added=[calibrated_analysis])
+            if data.image_key:
+                # Stored as an image asset now - the staged upload goes with the next purge pass
+                await image_purger.enqueue([data.image_key])
+        scan_saved = True
+        if data.upload_session_id:
+            # Kept until now so a failed analysis could be retried without re-uploading
+            try:
+                await upload_sessions.delete(data.upload_session_id)
+            except Exception as e:
+                logger.warning(f"Failed to delete upload session {data.upload_session_id}: {e}")
+        
+        # Build response with feature-flagged fields
+        config = RegionCalibrationConfig
+        
+        return DeerAnalysisResponse(
+            id=scan_id,
+            user_id=user["id"],
+            local_image_id=data.local_image_id,
+            deer_age=calibrated_analysis.get("deer_age"),
+            deer_type=calibrated_analysis.get("deer_type"),
+            deer_sex=calibrated_analysis.get("deer_sex"),
+            antler_points=calibrated_analysis.get("antler_points"),
+            antler_points_left=calibrated_analysis.get("antler_points_left"),
+            antler_points_right=calibrated_analysis.get("antler_points_right"),
+            body_condition=calibrated_analysis.get("body_condition"),
+            confidence=calibrated_analysis.get("confidence"),  # Recommendation confidence for backward compat
+            recommendation=calibrated_analysis.get("recommendation"),
+            reasoning=calibrated_analysis.get("reasoning"),
+            notes=data.notes,
+            created_at=now,
+            updated_at=now,
+            # Calibration fields
+            age_uncertain=calibrated_analysis.get("age_uncertain"),
+            confidence_breakdown={
+                "age": calibrated_analysis.get("age_confidence", 0),
+                "recommendation": calibrated_analysis.get("recommendation_confidence", 0)
+            },
+            calibration_version=calibrated_analysis.get("calibration_version"),
+            # Region fields (feature-flagged)
+            region_key=calibrated_analysis.get("region_key") if config.CALIBRATION_SHOW_REGION else None,
+            calibration_strategy=calibrated_analysis.get("calibration_strategy") if config.CALIBRATION_SHOW_STRATEGY else None,
+            calibration_fallback_reason=calibrated_analysis.get("calibration_fallback_reason") if config.CALIBRATION_SHOW_STRATEGY else None,
+            # Cloud image storage (R2)
+            **scan_image_urls({"id": scan_id, **image_urls}),
+            blurhash=image_asset["blurhash"] if image_asset else None,
+        )
+        
+    except openai.OpenAIError as e:
+        logger.error(f"OpenAI error: {e}")
+        raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
+    finally:
+        # Inference failed or returned NOT_A_DEER - compensate the reservation
+        if not scan_saved:
+            try:
+                await refund_scan(user["id"])
+            except Exception as e:
+                logger.error(f"Failed to refund scan reservation for user {user['id']}: {e}")
+            if image_asset:
+                try:
+                    async with database.transaction():
+                        await image_assets.release([image_asset["id"]])
+                    image_purger.wake()
+                except Exception as e:
+                    logger.error(f"Failed to release image asset {image_asset['id']}: {e}")
+
+# ============ SCAN STATS ROLLUP ============
+
+# user_scan_stats holds running totals per user. Every route that inserts,
+# edits or deletes scans applies its delta inside the same transaction as the
+# scan write, so the summary endpoint is a single primary-key read.
+
+SCAN_STATS_COUNTERS = ["total_scans", "harvest_count", "pass_count", "favorite_count", "labeled_count"]
+
+def scan_stats_counts(scan: dict) -> Dict[str, int]:
+    """A single scan's contribution to its owner's rollup (labels tracked separately)."""
+    return {
+        "total_scans": 1,
+        "harvest_count": int(scan.get("recommendation") == "HARVEST"),
+        "pass_count": int(scan.get("recommendation") == "PASS"),
+        "favorite_count": int(bool(scan.get("is_favorite"))),
+    }
+
+async def apply_scan_stats_delta(
+    user_id: str,
+    removed: List[dict] = (),
+    added: List[dict] = (),
+    labeled_delta: int = 0
+):
+    """
+    Move a user's rollup from the `removed` scan states to the `added` ones.
+    An edit passes the old row as removed and the new row as added.
+    Must run inside the transaction that performs the scan write.
+    """
+    delta = {counter: 0 for counter in SCAN_STATS_COUNTERS}
+    delta["labeled_count"] = labeled_delta
+    for scan in added:
+        for counter, value in scan_stats_counts(scan).items():
+            delta[counter] += value
+    for scan in removed:
+        for counter, value in scan_stats_counts(scan).items():
+            delta[counter] -= value
+
+    if not any(delta.values()) and not added and not removed:
+        return
+
+    await database.execute(
+        """
+        INSERT INTO user_scan_stats AS s (
+            user_id, total_scans, harvest_count, pass_count,
+            favorite_count, labeled_count, last_scan_at, updated_at
+        ) VALUES (
+            :user_id,
+            GREATEST(:total_scans, 0), GREATEST(:harvest_count, 0), GREATEST(:pass_count, 0),
+            GREATEST(:favorite_count, 0), GREATEST(:labeled_count, 0),
+            (SELECT MAX(created_at) FROM scans WHERE user_id = CAST(:user_id AS VARCHAR)),
+            CURRENT_TIMESTAMP
+        )
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_scans = GREATEST(s.total_scans + :total_scans, 0),
+            harvest_count = GREATEST(s.harvest_count + :harvest_count, 0),
+            pass_count = GREATEST(s.pass_count + :pass_count, 0),
+            favorite_count = GREATEST(s.favorite_count + :favorite_count, 0),
+            labeled_count = GREATEST(s.labeled_count + :labeled_count, 0),
+            last_scan_at = EXCLUDED.last_scan_at,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        {"user_id": user_id, **delta}
+    )
+
+async def recompute_scan_stats(user_id: str):
+    """
+    Rebuild one user's rollup from their scans, correcting any drift.
+    
+    The rollup row is locked first, so a scan write racing with this either
+    committed before the recount (and is counted) or applies its delta after
+    it (on top of the recount) - never both, never neither.
+    """
+    async with database.transaction():
+        await database.execute(
+            "INSERT INTO user_scan_stats (user_id) VALUES (:user_id) ON CONFLICT (user_id) DO NOTHING",
+            {"user_id": user_id}
+        )
+        await database.execute(
+            "SELECT 1 FROM user_scan_stats WHERE user_id = :user_id FOR UPDATE",
+            {"user_id": user_id}
+        )
+        await database.execute(
+            """
+            UPDATE user_scan_stats AS st SET
+                total_scans = c.total_scans,
+                harvest_count = c.harvest_count,
+                pass_count = c.pass_count,
+                favorite_count = c.favorite_count,
+                labeled_count = c.labeled_count,
+                last_scan_at = c.last_scan_at,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT
+                    COUNT(*) AS total_scans,
+                    COUNT(*) FILTER (WHERE s.recommendation = 'HARVEST') AS harvest_count,
+                    COUNT(*) FILTER (WHERE s.recommendation = 'PASS') AS pass_count,
+                    COUNT(*) FILTER (WHERE s.is_favorite) AS favorite_count,
+                    COUNT(*) FILTER (WHERE EXISTS (
+                        SELECT 1 FROM scan_labels l WHERE l.scan_id = s.id
+                    )) AS labeled_count,
+                    MAX(s.created_at) AS last_scan_at
+                FROM scans s
+                WHERE s.user_id = :user_id
+            ) AS c
+            WHERE st.user_id = :user_id
+            """,
+            {"user_id": user_id}
+        )
+
+# Users recounted per /admin/scan-stats/reconcile call
+SCAN_STATS_RECONCILE_MAX_USERS = 1000
+
+class ScanStatsReconcileRequest(BaseModel):
+    user_id: Optional[str] = None  # Default: every user with scans or a rollup row, a page at a time
+    after_user_id: Optional[str] = None  # next_after_user_id from the previous page
+    limit: int = 200
+
+@api_router.post("/admin/scan-stats/reconcile")
+async def reconcile_scan_stats(data: ScanStatsReconcileRequest):
+    """
+    Recount user_scan_stats from the scans table.
+    
+    The rollup is maintained incrementally; this repairs drift (e.g. scans
+    written by a replica on older code during a rolling deploy). Safe to run
+    while traffic is live - each user is recounted in its own transaction.
+    
+    Without user_id, each call recounts up to `limit` users in user id
+    order. While has_more is true, call again with after_user_id set to the
+    returned next_after_user_id.
+    """
+    if data.user_id:
+        await recompute_scan_stats(data.user_id)
+        logger.info("Scan stats reconciled for 1 user(s)")
+        return {"success": True, "users_reconciled": 1, "next_after_user_id": None, "has_more": False}
+    
+    if not 1 <= data.limit <= SCAN_STATS_RECONCILE_MAX_USERS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {SCAN_STATS_RECONCILE_MAX_USERS}")
+    rows = await database.fetch_all(
+        """
+        -- Each side is limited on its own so neither is read past the page
+        (SELECT DISTINCT user_id FROM scans WHERE user_id > :after ORDER BY user_id LIMIT :limit)
+        UNION
+        (SELECT user_id FROM user_scan_stats WHERE user_id > :after ORDER BY user_id LIMIT :limit)
+        ORDER BY user_id
+        LIMIT :limit
+        """,
+        {"after": data.after_user_id or "", "limit": data.limit + 1}
+    )
+    user_ids = [row["user_id"] for row in rows]
+    has_more = len(user_ids) > data.limit
+    user_ids = user_ids[:data.limit]
+    
+    for user_id in user_ids:
+        await recompute_scan_stats(user_id)
+    logger.info(f"Scan stats reconciled for {len(user_ids)} user(s)")
+    return {
+        "success": True,
+        "users_reconciled": len(user_ids),
+        "next_after_user_id": user_ids[-1] if has_more else None,
+        "has_more": has_more,
+    }
+
+# ============ DELTA SYNC ============
+
+# Every scan write and every delete tombstone takes the next number from the
+# user's counter in scan_change_counters, so a device can ask for just what
+# changed since the last number it saw. Tombstones are pruned after this many
+# days; a cursor older than the newest pruned tombstone gets a full-resync
+# signal.
+SCAN_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("SCAN_TOMBSTONE_RETENTION_DAYS", "90"))
+
+# Numbers rows that have none yet - existing rows on first deploy, and rows
+# written by a replica still on older code - after the user's current counter.
+SCAN_CHANGE_SEQ_BACKFILL_SQL = """
+    WITH pending AS (
+        SELECT user_id, id, COALESCE(updated_at, created_at) AS changed_at, 'scan' AS kind
+        FROM scans WHERE change_seq IS NULL
+        UNION ALL
+        SELECT user_id, scan_id, deleted_at, 'tombstone' FROM scan_tombstones WHERE change_seq IS NULL
+    ),
+    counts AS (
+        SELECT user_id, COUNT(*) AS n FROM pending GROUP BY user_id
+    ),
+    bumped AS (
+        INSERT INTO scan_change_counters (user_id, last_seq, pruned_seq)
+        SELECT user_id, n, 0 FROM counts
+        ON CONFLICT (user_id) DO UPDATE SET last_seq = scan_change_counters.last_seq + EXCLUDED.last_seq
+        RETURNING user_id, last_seq
+    ),
+    numbered AS (
+        SELECT p.kind, p.id, b.last_seq - c.n
+            + ROW_NUMBER() OVER (PARTITION BY p.user_id ORDER BY p.changed_at, p.id) AS seq
+        FROM pending p
+        JOIN counts c ON c.user_id = p.user_id
+        JOIN bumped b ON b.user_id = p.user_id
+    ),
+    scans_numbered AS (
+        UPDATE scans SET change_seq = n.seq FROM numbered n WHERE n.kind = 'scan' AND scans.id = n.id
+    )
+    UPDATE scan_tombstones t SET change_seq = n.seq
+    FROM numbered n WHERE n.kind = 'tombstone' AND t.scan_id = n.id
+"""
+
+def next_change_seq(user_id: str, count=1):
+    """
+    Take the user's next `count` change numbers as part of a scan write.
+    Returns (cte, last): attach the CTE to the write with .add_cte(cte) and
+    use `last` (the highest number taken) for change_seq.
+
+    The counter row stays locked until the write's transaction commits, so
+    a user's changes become visible in number order: a reader that has seen
+    N has seen everything below N. Clock skew between replicas and slow
+    commits can't reorder them the way timestamps could.
+    """
+    counters = scan_change_counters_table
+    bump = pg_insert(counters).from_select(
+        ["user_id", "last_seq"],
+        sqlalchemy.select(sqlalchemy.literal(user_id, String), count)
+    )
+    bump = bump.on_conflict_do_update(
+        index_elements=["user_id"], set_={"last_seq": counters.c.last_seq + bump.excluded.last_seq}
+    ).returning(counters.c.last_seq).cte("next_change_seq")
+    return bump, sqlalchemy.select(bump.c.last_seq).scalar_subquery()
+
+async def mark_scan_changed(scan_id: str, user_id: str):
+    """Give a scan a new change number when a related row (its label) changes."""
+    seq, change_seq = next_change_seq(user_id)
+    await database.execute(
+        scans_table.update().where(
+            (scans_table.c.id == scan_id) & (scans_table.c.user_id == user_id)
+        ).values(updated_at=datetime.utcnow(), change_seq=change_seq).add_cte(seq)
+    )
+
+async def tombstone_scans(user_id: str, condition):
+    """
+    Record tombstones for the user's scans matching `condition`, each with its
+    own change number. Call just before deleting them, in the same transaction.
+    """
+    deleted_at = datetime.utcnow()
+    doomed = sqlalchemy.select(
+        scans_table.c.id,
+        scans_table.c.local_image_id,
+        sqlalchemy.func.row_number().over(order_by=scans_table.c.id).label("position"),
+    ).where((scans_table.c.user_id == user_id) & condition).cte("doomed")
+    total = sqlalchemy.select(sqlalchemy.func.count()).select_from(doomed).scalar_subquery()
+    seq, last_seq = next_change_seq(user_id, total)
+
+    source = sqlalchemy.select(
+        doomed.c.id,
+        sqlalchemy.literal(user_id, String),
+        doomed.c.local_image_id,
+        sqlalchemy.literal(deleted_at, DateTime),
+        last_seq - total + doomed.c.position,
+    )
+    query = pg_insert(scan_tombstones_table).from_select(
+        ["scan_id", "user_id", "local_image_id", "deleted_at", "change_seq"], source
+    )
+    query = query.on_conflict_do_update(
+        index_elements=["scan_id"],
+        set_={"deleted_at": query.excluded.deleted_at, "change_seq": query.excluded.change_seq}
+    ).add_cte(doomed).add_cte(seq)
+    await database.execute(query)
+
+async def prune_scan_tombstones():
+    """Drop tombstones past retention, raising each user's pruned_seq watermark."""
+    await database.execute(
+        """
+        WITH pruned AS (
+            DELETE FROM scan_tombstones
+            WHERE deleted_at < CURRENT_TIMESTAMP - make_interval(days => :days)
+            RETURNING user_id, change_seq
         )
-        await database.execute(query)
-        
-        await use_scan(user)
-        
-        # Build response with feature-flagged fields
-        config = RegionCalibrationConfig
-        
-        return DeerAnalysisResponse(
-            id=scan_id,
-            user_id=user["id"],
-            local_image_id=data.local_image_id,
-            deer_age=calibrated_analysis.get("deer_age"),
-            deer_type=calibrated_analysis.get("deer_type"),
-            deer_sex=calibrated_analysis.get("deer_sex"),
-            antler_points=calibrated_analysis.get("antler_points"),
-            antler_points_left=calibrated_analysis.get("antler_points_left"),
-            antler_points_right=calibrated_analysis.get("antler_points_right"),
-            body_condition=calibrated_analysis.get("body_condition"),
-            confidence=calibrated_analysis.get("confidence"),  # Recommendation confidence for backward compat
-            recommendation=calibrated_analysis.get("recommendation"),
-            reasoning=calibrated_analysis.get("reasoning"),
-            notes=data.notes,
-            created_at=datetime.utcnow(),
-            # Calibration fields
-            age_uncertain=calibrated_analysis.get("age_uncertain"),
-            confidence_breakdown={
-                "age": calibrated_analysis.get("age_confidence", 0),
-                "recommendation": calibrated_analysis.get("recommendation_confidence", 0)
-            },
-            calibration_version=calibrated_analysis.get("calibration_version"),
-            # Region fields (feature-flagged)
-            region_key=calibrated_analysis.get("region_key") if config.CALIBRATION_SHOW_REGION else None,
-            calibration_strategy=calibrated_analysis.get("calibration_strategy") if config.CALIBRATION_SHOW_STRATEGY else None,
-            calibration_fallback_reason=calibrated_analysis.get("calibration_fallback_reason") if config.CALIBRATION_SHOW_STRATEGY else None,
-            # Cloud image storage (R2)
-            image_url=image_url,
+        INSERT INTO scan_change_counters AS c (user_id, last_seq, pruned_seq)
+        SELECT user_id, MAX(change_seq), MAX(change_seq) FROM pruned
+        WHERE change_seq IS NOT NULL
+        GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET pruned_seq = GREATEST(c.pruned_seq, EXCLUDED.pruned_seq)
+        """,
+        {"days": SCAN_TOMBSTONE_RETENTION_DAYS}
+    )
+
+# ============ SCAN DELETION ============
+
+async def delete_user_scans(user_id: str, condition=None) -> List[dict]:
+    """
+    Delete a user's scans matching `condition` (all of them if None) with their
+    labels and tags. Leaves tombstones for delta sync, updates the stats rollup
+    and releases their images - unreferenced assets and legacy scans/ images
+    are queued for the purge worker.
+
+    Must run inside a transaction - call image_purger.wake() once it commits.
+    Returns the deleted scans' id, image URLs and rollup fields.
+    """
+    matching = scans_table.c.user_id == user_id
+    if condition is not None:
+        matching = matching & condition
+
+    await tombstone_scans(user_id, matching)
+    await database.execute(scan_tags_table.delete().where(
+        scan_tags_table.c.scan_id.in_(sqlalchemy.select(scans_table.c.id).where(matching))
+    ))
+
+    # One statement deletes the scans and their labels, returning only what
+    # the rollup and the purge queue need
+    deleted = scans_table.delete().where(matching).returning(
+        scans_table.c.id,
+        scans_table.c.image_asset_id,
+        *(scans_table.c[column] for column in SCAN_IMAGE_URL_COLUMNS),
+        scans_table.c.recommendation,
+        scans_table.c.is_favorite,
+    ).cte("deleted_scans")
+    labels = scan_labels_table.delete().where(
+        scan_labels_table.c.scan_id.in_(sqlalchemy.select(deleted.c.id))
+    ).returning(scan_labels_table.c.scan_id).cte("deleted_labels")
+    query = sqlalchemy.select(
+        deleted,
+        deleted.c.id.in_(sqlalchemy.select(labels.c.scan_id)).label("labeled"),
+    )
+    scans = [dict(row) for row in await database.fetch_all(query)]
+
+    if scans:
+        await apply_scan_stats_delta(
+            user_id, removed=scans, labeled_delta=-sum(scan["labeled"] for scan in scans)
         )
-        
-    except openai.OpenAIError as e:
-        logger.error(f"OpenAI error: {e}")
-        raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
+        await image_assets.release(scan["image_asset_id"] for scan in scans)
+        await image_purger.enqueue(
+            key for scan in scans if not scan["image_asset_id"] for key in scan_image_keys(scan)
+        )
+    return scans
+
+# ============ SCAN FILTERS & SEARCH ============
+
+# Full-text document over notes and reasoning. Queries must repeat this exact
+# expression for idx_scans_search_document to apply.
+SCAN_SEARCH_DOCUMENT = "to_tsvector('english', coalesce(notes, '') || ' ' || coalesce(reasoning, ''))"
+
+# Each tag filter is its own scan_tags lookup, so keep the list short
+MAX_SEARCH_TAGS = 10
+
+# Indexes behind /scans/search - also created by `python -m cli.benchmarks search`,
+# which checks that the planner keeps using them
+SCAN_SEARCH_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_scans_user_reco_created ON scans(user_id, recommendation, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_scans_user_region_created ON scans(user_id, region_key, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_scans_user_age ON scans(user_id, deer_age) WHERE deer_age IS NOT NULL",
+    f"CREATE INDEX IF NOT EXISTS idx_scans_search_document ON scans USING GIN ({SCAN_SEARCH_DOCUMENT})",
+]
+
+def scan_tag_condition(user_id: str, tag: str):
+    """Scans carrying `tag`, resolved through idx_scan_tags_user_tag."""
+    return scans_table.c.id.in_(
+        sqlalchemy.select(scan_tags_table.c.scan_id).where(
+            (scan_tags_table.c.user_id == user_id) & (scan_tags_table.c.tag == tag)
+        )
+    )
+
+def scan_filter_conditions(user_id: str, tag: Optional[str] = None, favorite: Optional[bool] = None) -> list:
+    """WHERE conditions for a user's scans, optionally narrowed by tag and favorite."""
+    conditions = [scans_table.c.user_id == user_id]
+    if tag:
+        conditions.append(scan_tag_condition(user_id, tag))
+    if favorite is True:
+        # Matches the idx_scans_user_favorite_created partial index predicate
+        conditions.append(scans_table.c.is_favorite.is_(sqlalchemy.true()))
+    elif favorite is False:
+        conditions.append(scans_table.c.is_favorite.isnot(sqlalchemy.true()))
+    return conditions
+
+def build_scan_search_query(
+    user_id: str,
+    deer_sex: Optional[str] = None,
+    deer_type: Optional[str] = None,
+    recommendation: Optional[str] = None,
+    min_age: Optional[float] = None,
+    max_age: Optional[float] = None,
+    min_points: Optional[int] = None,
+    max_points: Optional[int] = None,
+    region_key: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    favorite: Optional[bool] = None,
+    tags: Optional[List[str]] = None,
+    text: Optional[str] = None,
+    after: Optional[tuple] = None,
+    limit: int = 50
+):
+    """
+    Search query over a user's scans, newest first, keyset-paged by `after`
+    (created_at, id). A scan must carry every tag in `tags`. Fetches
+    limit + 1 rows so callers can detect more pages.
+    """
+    c = scans_table.c
+    conditions = scan_filter_conditions(user_id, favorite=favorite)
+
+    for tag in tags or []:
+        conditions.append(scan_tag_condition(user_id, tag))
+
+    if recommendation:
+        conditions.append(c.recommendation == recommendation.upper())
+    if region_key:
+        conditions.append(c.region_key == region_key.lower())
+    if deer_sex:
+        conditions.append(sqlalchemy.func.lower(c.deer_sex) == deer_sex.lower())
+    if deer_type:
+        conditions.append(sqlalchemy.func.lower(c.deer_type) == deer_type.lower())
+    if min_age is not None:
+        conditions.append(c.deer_age >= min_age)
+    if max_age is not None:
+        conditions.append(c.deer_age <= max_age)
+    if min_points is not None:
+        conditions.append(c.antler_points >= min_points)
+    if max_points is not None:
+        conditions.append(c.antler_points <= max_points)
+    if date_from is not None:
+        conditions.append(c.created_at >= date_from)
+    if date_to is not None:
+        conditions.append(c.created_at <= date_to)
+    if text:
+        conditions.append(sqlalchemy.literal_column(SCAN_SEARCH_DOCUMENT).op("@@")(
+            sqlalchemy.func.websearch_to_tsquery(sqlalchemy.literal_column("'english'"), text)
+        ))
+    if after:
+        conditions.append(sqlalchemy.tuple_(c.created_at, c.id) < after)
+
+    return select_scan_responses().where(*conditions).order_by(
+        c.created_at.desc(), c.id.desc()
+    ).limit(limit + 1)
 
 # ============ SCANS ROUTES ============
 
-@api_router.get("/scans", response_model=List[DeerAnalysisResponse])
+def encode_scan_cursor(timestamp: datetime, scan_id: str) -> str:
+    """Opaque keyset cursor for the position just after (timestamp, scan_id)."""
+    payload = json.dumps({"t": timestamp.isoformat(), "id": scan_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    A client-supplied time as naive UTC, to compare with the TIMESTAMP
+    columns (asyncpg rejects aware values there). Naive values are taken as
+    UTC already.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def decode_scan_cursor(cursor: str) -> tuple:
+    """Decode a cursor into (timestamp, id). Raises 400 if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return naive_utc(datetime.fromisoformat(payload["t"])), str(payload["id"])
+    except (ValueError, KeyError, TypeError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_change_cursor(change_seq: int) -> str:
+    """Opaque delta sync cursor: every change up to change_seq has been seen."""
+    payload = json.dumps({"seq": change_seq})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_change_cursor(cursor: str) -> Optional[int]:
+    """
+    Decode a delta sync cursor into its change_seq. Returns None for a cursor
+    from before change numbers (timestamp based) - those resync. Raises 400
+    if it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if "seq" not in payload:
+            decode_scan_cursor(cursor)
+            return None
+        return int(payload["seq"])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@api_router.get("/scans", response_model=List[ScanWithLabel])
 async def get_user_scans(
+    request: Request,
     user: dict = Depends(get_current_user),
     limit: int = 50,
-    skip: int = 0
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    tag: Optional[str] = None,
+    favorite: Optional[bool] = None,
+    include: Optional[str] = None
 ):
+    """
+    Scan history, newest first.
+
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next
+    page - this stays fast however deep the history goes. `skip` (offset
+    paging) is still honored when no cursor is given, for older app builds.
+    `tag` and `favorite` filter server-side. `include=label` embeds each
+    scan's label (or null) from the same query.
+    """
     # Enforce maximum limit to prevent performance issues
-    limit = min(limit, 100)
-    
-    query = scans_table.select().where(
-        scans_table.c.user_id == user["id"]
-    ).order_by(scans_table.c.created_at.desc()).limit(limit).offset(skip)
-    scans = await database.fetch_all(query)
-    
-    return [build_scan_response(dict(s)) for s in scans]
+    limit = max(1, min(limit, 100))
+    tag = tag.strip().lower() if tag else None
+    include_label = parse_scan_include(include)
+
+    # Answer revalidations from the history version alone, before reading the page.
+    # Label writes take a change number too, so labels are covered. The
+    # signing window turns the ETag over before signed image URLs expire.
+    etag = make_etag(
+        *await scan_history_version(user["id"]), limit, skip, cursor, tag, favorite, include_label,
+        signed_url_window(),
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Ordered to match idx_scans_user_created_id, with id as the tiebreaker
+    query = select_scan_responses().where(
+        *scan_filter_conditions(user["id"], tag=tag, favorite=favorite)
+    ).order_by(scans_table.c.created_at.desc(), scans_table.c.id.desc())
+
+    if cursor:
+        created_at, scan_id = decode_scan_cursor(cursor)
+        query = query.where(
+            sqlalchemy.tuple_(scans_table.c.created_at, scans_table.c.id) < (created_at, scan_id)
+        )
+    elif skip:
+        query = query.offset(skip)
+    if include_label:
+        query = with_scan_label(query)
+
+    # Fetch one extra row to learn whether another page exists
+    scans = [dict(s) for s in await database.fetch_all(query.limit(limit + 1))]
+    headers = cache_headers(etag)
+    if len(scans) > limit:
+        scans = scans[:limit]
+        headers["X-Next-Cursor"] = encode_scan_cursor(scans[-1]["created_at"], scans[-1]["id"])
+
+    return ScanJSONResponse([scan_payload(s, include_label) for s in scans], headers=headers)
+
+@api_router.get("/scans/search")
+async def search_scans(
+    user: dict = Depends(get_current_user),
+    deer_sex: Optional[str] = None,
+    deer_type: Optional[str] = None,
+    recommendation: Optional[str] = None,
+    min_age: Optional[float] = None,
+    max_age: Optional[float] = None,
+    min_points: Optional[int] = None,
+    max_points: Optional[int] = None,
+    region_key: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    favorite: Optional[bool] = None,
+    tag: Optional[List[str]] = Query(None),
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50
+):
+    """
+    Search scan history by attributes, tags and notes/reasoning text.
+    All filters are optional and combined with AND; repeat `tag` to require
+    several tags. Paged like /scans/changes: pass back `cursor` while
+    `has_more` is true.
+    """
+    limit = max(1, min(limit, 100))
+    if min_age is not None and max_age is not None and min_age > max_age:
+        raise HTTPException(status_code=400, detail="min_age cannot be greater than max_age")
+    if min_points is not None and max_points is not None and min_points > max_points:
+        raise HTTPException(status_code=400, detail="min_points cannot be greater than max_points")
+    tags = sorted({t.strip().lower() for t in tag or [] if t.strip()})
+    if len(tags) > MAX_SEARCH_TAGS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SEARCH_TAGS} tags per search")
+    try:
+        date_from, date_to = naive_utc(date_from), naive_utc(date_to)
+    except OverflowError:
+        raise HTTPException(status_code=400, detail="date_from/date_to out of range")
+
+    query = build_scan_search_query(
+        user["id"],
+        deer_sex=deer_sex,
+        deer_type=deer_type,
+        recommendation=recommendation,
+        min_age=min_age,
+        max_age=max_age,
+        min_points=min_points,
+        max_points=max_points,
+        region_key=region_key,
+        date_from=date_from,
+        date_to=date_to,
+        favorite=favorite,
+        tags=tags,
+        text=q.strip() if q and q.strip() else None,
+        after=decode_scan_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
+    scans = [dict(s) for s in await database.fetch_all(query)]
 
-@api_router.get("/scans/stats/summary")
-async def get_scan_stats(user: dict = Depends(get_current_user)):
-    query = scans_table.select().where(scans_table.c.user_id == user["id"])
-    scans = await database.fetch_all(query)
-    
-    total = len(scans)
-    harvest = sum(1 for s in scans if s["recommendation"] == "HARVEST")
-    pass_count = sum(1 for s in scans if s["recommendation"] == "PASS")
-    
-    return {"total_scans": total, "harvest_count": harvest, "pass_count": pass_count}
+    has_more = len(scans) > limit
+    scans = scans[:limit]
+    next_cursor = encode_scan_cursor(scans[-1]["created_at"], scans[-1]["id"]) if has_more else None
 
-@api_router.get("/scans/{scan_id}", response_model=DeerAnalysisResponse)
-async def get_scan(scan_id: str, user: dict = Depends(get_current_user)):
-    query = scans_table.select().where(
-        (scans_table.c.id == scan_id) & (scans_table.c.user_id == user["id"])
+    return ScanJSONResponse({
+        "scans": [scan_response_fields(s) for s in scans],
+        "cursor": next_cursor,
+        "has_more": has_more,
+    })
+
+@api_router.get("/scans/changes")
+async def get_scan_changes(
+    user: dict = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = 200
+):
+    """
+    Delta sync: scans created or updated, and scans deleted, since `cursor`.
+
+    Call without a cursor for the first sync, then pass back the returned
+    cursor. Keep calling while has_more is true. When reset is true, deletes
+    after the cursor have been pruned (tombstone retention) - drop local
+    state and sync again without a cursor.
+    """
+    limit = max(1, min(limit, 500))
+
+    since = decode_change_cursor(cursor) if cursor else 0
+    counter = await database.fetch_one(
+        sqlalchemy.select(scan_change_counters_table.c.last_seq, scan_change_counters_table.c.pruned_seq)
+        .where(scan_change_counters_table.c.user_id == user["id"])
     )
+    # Every change numbered up to last_seq has committed (see next_change_seq)
+    last_seq, pruned_seq = (counter["last_seq"], counter["pruned_seq"]) if counter else (0, 0)
+    if cursor and (since is None or since < pruned_seq):
+        return ScanJSONResponse({"changed": [], "deleted": [], "cursor": None, "has_more": False, "reset": True})
+
+    # Both reads stop at last_seq: anything numbered above it may still be
+    # uncommitted, and each query sees its own snapshot, so a higher number
+    # seen by one read doesn't mean the other saw everything below it
+    changed_query = select_scan_responses().add_columns(scans_table.c.change_seq).where(
+        (scans_table.c.user_id == user["id"]) & (scans_table.c.change_seq > since)
+        & (scans_table.c.change_seq <= last_seq)
+    ).order_by(scans_table.c.change_seq).limit(limit + 1)
+    changes = [
+        (row["change_seq"], "changed", dict(row))
+        for row in await database.fetch_all(changed_query)
+    ]
+
+    # A first sync has nothing local to delete
+    if cursor:
+        deleted_query = scan_tombstones_table.select().where(
+            (scan_tombstones_table.c.user_id == user["id"]) &
+            (scan_tombstones_table.c.change_seq > since) &
+            (scan_tombstones_table.c.change_seq <= last_seq)
+        ).order_by(scan_tombstones_table.c.change_seq).limit(limit + 1)
+        changes += [
+            (row["change_seq"], "deleted", dict(row))
+            for row in await database.fetch_all(deleted_query)
+        ]
+
+    # Merge both streams in change order so one cursor covers them
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    if has_more:
+        next_cursor = encode_change_cursor(changes[-1][0])
+    else:
+        # Caught up: everything up to last_seq was visible to the queries above
+        next_cursor = encode_change_cursor(max(since, last_seq))
+
+    return ScanJSONResponse({
+        "changed": [scan_response_fields(row) for _, kind, row in changes if kind == "changed"],
+        "deleted": [
+            {"id": row["scan_id"], "local_image_id": row["local_image_id"], "deleted_at": row["deleted_at"]}
+            for _, kind, row in changes if kind == "deleted"
+        ],
+        "cursor": next_cursor,
+        "has_more": has_more,
+        "reset": False,
+    })
+
+@api_router.get("/scans/stats/summary")
+async def get_scan_stats(request: Request, user: dict = Depends(get_current_user)):
+    query = user_scan_stats_table.select().where(user_scan_stats_table.c.user_id == user["id"])
+    stats = await database.fetch_one(query)
+
+    if not stats:
+        # No scans yet
+        summary = {**{counter: 0 for counter in SCAN_STATS_COUNTERS}, "last_scan_at": None}
+    else:
+        summary = {
+            **{counter: stats[counter] or 0 for counter in SCAN_STATS_COUNTERS},
+            "last_scan_at": stats["last_scan_at"],
+        }
+
+    etag = make_etag(*summary.values())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return ScanJSONResponse(summary, headers=cache_headers(etag))
+
+@api_router.get("/scans/{scan_id}", response_model=ScanWithLabel)
+async def get_scan(
+    scan_id: str,
+    request: Request,
+    user: dict = Depends(get_current_user),
+    include: Optional[str] = None
+):
+    """A single scan. `include=label` embeds its label (or null) from the same query."""
+    owned = (scans_table.c.id == scan_id) & (scans_table.c.user_id == user["id"])
+    include_label = parse_scan_include(include)
+
+    # Revalidation reads just the version column (label writes bump it too)
+    if request.headers.get("if-none-match"):
+        version = await database.fetch_one(sqlalchemy.select(scans_table.c.updated_at).where(owned))
+        if version:
+            etag = make_etag(scan_id, version["updated_at"], include_label, signed_url_window())
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+    query = select_scan_responses().where(owned)
+    if include_label:
+        query = with_scan_label(query)
     scan = await database.fetch_one(query)
     
     if not scan:
         raise HTTPException(status_code=404, detail="Scan not found")
     
-    return build_scan_response(dict(scan))
+    etag = make_etag(scan_id, scan["updated_at"], include_label, signed_url_window())
+    return ScanJSONResponse(scan_payload(dict(scan), include_label), headers=cache_headers(etag))
 
 @api_router.put("/scans/{scan_id}", response_model=DeerAnalysisResponse)
 async def update_scan(scan_id: str, data: ScanUpdate, user: dict = Depends(get_current_user)):
-    query = scans_table.select().where(
-        (scans_table.c.id == scan_id) & (scans_table.c.user_id == user["id"])
-    )
-    scan = await database.fetch_one(query)
-    
-    if not scan:
-        raise HTTPException(status_code=404, detail="Scan not found")
-    
-    if data.notes is not None:
-        query = scans_table.update().where(
-            scans_table.c.id == scan_id
-        ).values(notes=data.notes)
-        await database.execute(query)
-    
-    query = scans_table.select().where(scans_table.c.id == scan_id)
-    scan = await database.fetch_one(query)
+    values = {"notes": data.notes} if data.notes is not None else {}
+    scan = await update_owned_scan(scan_id, user["id"], values)
     
-    return build_scan_response(dict(scan))
+    return build_scan_response(scan)
 
 
 # ============ FAVORITES & TAGS ENDPOINTS ============
@@ -1975,24 +3584,19 @@ async def toggle_favorite(
     user: dict = Depends(get_current_user)
 ):
     """Toggle favorite status for a scan."""
-    # Verify scan ownership
-    query = scans_table.select().where(
-        (scans_table.c.id == scan_id) & (scans_table.c.user_id == user["id"])
-    )
-    scan = await database.fetch_one(query)
-    
-    if not scan:
-        raise HTTPException(status_code=404, detail="Scan not found")
-    
-    # Update favorite status
-    update_query = scans_table.update().where(
-        scans_table.c.id == scan_id
-    ).values(is_favorite=data.is_favorite)
-    await database.execute(update_query)
+    async with database.transaction():
+        scan = await update_owned_scan(scan_id, user["id"], {"is_favorite": data.is_favorite}, if_changed=True)
+        if scan is None:
+            # Already in that state (possibly set by a racing request) - no delta
+            scan = await update_owned_scan(scan_id, user["id"], {})
+        else:
+            await apply_scan_stats_delta(
+                user["id"],
+                removed=[{**scan, "is_favorite": not data.is_favorite}],
+                added=[scan]
+            )
     
-    # Return updated scan
-    scan = await database.fetch_one(query)
-    return build_scan_response(dict(scan))
+    return build_scan_response(scan)
 
 
 @api_router.post("/scans/{scan_id}/tags", response_model=DeerAnalysisResponse)
@@ -2002,15 +3606,6 @@ async def update_tags(
     user: dict = Depends(get_current_user)
 ):
     """Update tags for a scan."""
-    # Verify scan ownership
-    query = scans_table.select().where(
-        (scans_table.c.id == scan_id) & (scans_table.c.user_id == user["id"])
-    )
-    scan = await database.fetch_one(query)
-    
-    if not scan:
-        raise HTTPException(status_code=404, detail="Scan not found")
-    
     # Validate tags (max 10 tags, max 30 chars each)
     if len(data.tags) > 10:
         raise HTTPException(status_code=400, detail="Maximum 10 tags allowed")
@@ -2023,34 +3618,115 @@ async def update_tags(
     clean_tags = [tag.strip().lower() for tag in data.tags if tag.strip()]
     unique_tags = list(dict.fromkeys(clean_tags))  # Remove duplicates, preserve order
     
-    # Update tags
-    import json
-    update_query = scans_table.update().where(
-        scans_table.c.id == scan_id
-    ).values(tags=json.dumps(unique_tags))
-    await database.execute(update_query)
+    # Update tags - scans.tags feeds responses, scan_tags serves filters and counts
+    async with database.transaction():
+        scan = await update_owned_scan(scan_id, user["id"], {"tags": unique_tags})
+        await database.execute(scan_tags_table.delete().where(scan_tags_table.c.scan_id == scan_id))
+        if unique_tags:
+            await database.execute(scan_tags_table.insert().values([
+                {"scan_id": scan_id, "tag": tag, "user_id": user["id"]} for tag in unique_tags
+            ]))
     
-    # Return updated scan
-    scan = await database.fetch_one(query)
-    return build_scan_response(dict(scan))
+    return build_scan_response(scan)
 
 
 @api_router.get("/scans/tags/all")
 async def get_all_user_tags(user: dict = Depends(get_current_user)):
     """Get all unique tags used by the user across all scans."""
-    query = """
-        SELECT DISTINCT jsonb_array_elements_text(tags::jsonb) as tag
-        FROM scans
-        WHERE user_id = :user_id AND tags IS NOT NULL
-        ORDER BY tag
+    query = sqlalchemy.select(scan_tags_table.c.tag).where(
+        scan_tags_table.c.user_id == user["id"]
+    ).distinct().order_by(scan_tags_table.c.tag)
+    results = await database.fetch_all(query)
+    return {"tags": [r["tag"] for r in results]}
+
+
+# Normalized (scan_id, tag, user_id) rows derived from scans.tags. Tags
+# longer than the scan_tags column (only possible in legacy data) are left
+# out rather than failing the whole insert.
+SCAN_TAGS_SOURCE_SQL = """
+    SELECT DISTINCT s.id, lower(trim(t.tag)), s.user_id
+    FROM scans s
+    CROSS JOIN LATERAL json_array_elements_text(s.tags) AS t(tag)
+    WHERE json_typeof(s.tags) = 'array'
+      AND trim(t.tag) <> ''
+      AND length(trim(t.tag)) <= 30
+"""
+
+async def normalize_legacy_scan_tags(batch_size: int = 500) -> int:
     """
-    try:
-        results = await database.fetch_all(query, {"user_id": user["id"]})
-        tags = [r["tag"] for r in results]
-        return {"tags": tags}
-    except Exception:
-        # Fallback for older Postgres versions
-        return {"tags": []}
+    Rewrite scans.tags stored as a JSON string (tags used to be written with
+    json.dumps into the JSON column) as an array. A string holding a JSON
+    array is unwrapped; anything else - plain text, other JSON - becomes a
+    one-tag array, so no value can fail the migration. Returns rows fixed.
+    """
+    fixed = 0
+    while True:
+        rows = await database.fetch_all(
+            f"SELECT id, tags::jsonb #>> '{{}}' AS raw FROM scans WHERE json_typeof(tags) = 'string' LIMIT {batch_size}"
+        )
+        if not rows:
+            return fixed
+        for row in rows:
+            try:
+                tags = json.loads(row["raw"])
+            except ValueError:
+                tags = None
+            if not isinstance(tags, list):
+                tags = [row["raw"]]
+            await database.execute(
+                scans_table.update().where(scans_table.c.id == row["id"]).values(tags=tags)
+            )
+        fixed += len(rows)
+
+class ScanTagsReconcileRequest(BaseModel):
+    user_id: Optional[str] = None  # Default: every user
+
+@api_router.post("/admin/scan-tags/reconcile")
+async def reconcile_scan_tags(data: ScanTagsReconcileRequest):
+    """
+    Rebuild scan_tags from scans.tags - adds missing rows and drops stale
+    ones (e.g. tags edited by a replica on older code that only wrote
+    scans.tags). Idempotent.
+    """
+    user_filter = "AND s.user_id = :user_id" if data.user_id else ""
+    params = {"user_id": data.user_id} if data.user_id else {}
+    
+    async with database.transaction():
+        removed = await database.fetch_all(
+            f"""
+            DELETE FROM scan_tags st
+            WHERE {"st.user_id = :user_id AND" if data.user_id else ""} NOT EXISTS (
+                SELECT 1 FROM scans s
+                CROSS JOIN LATERAL json_array_elements_text(
+                    CASE WHEN json_typeof(s.tags) = 'array' THEN s.tags ELSE '[]'::json END
+                ) AS t(tag)
+                WHERE s.id = st.scan_id AND lower(trim(t.tag)) = st.tag
+            )
+            RETURNING st.scan_id
+            """,
+            params
+        )
+        added = await database.fetch_all(
+            f"""
+            INSERT INTO scan_tags (scan_id, tag, user_id)
+            {SCAN_TAGS_SOURCE_SQL} {user_filter}
+            ON CONFLICT DO NOTHING
+            RETURNING scan_id
+            """,
+            params
+        )
+    logger.info(f"Scan tags reconciled: {len(added)} added, {len(removed)} removed")
+    return {"success": True, "tags_added": len(added), "tags_removed": len(removed)}
+
+@api_router.get("/scans/tags/counts")
+async def get_user_tag_counts(user: dict = Depends(get_current_user)):
+    """Scans per tag for the current user, most used first."""
+    count = sqlalchemy.func.count().label("count")
+    query = sqlalchemy.select(scan_tags_table.c.tag, count).where(
+        scan_tags_table.c.user_id == user["id"]
+    ).group_by(scan_tags_table.c.tag).order_by(count.desc(), scan_tags_table.c.tag)
+    results = await database.fetch_all(query)
+    return {"tags": [{"tag": r["tag"], "count": r["count"]} for r in results]}
 
 
 # ============ SCAN LABEL ENDPOINTS (Phase 2 Empirical Calibration) ============
@@ -2235,46 +3911,51 @@ async def add_scan_label(
     label_id = str(uuid.uuid4())
     now = datetime.utcnow()
     
-    await database.execute(
-        """
-        INSERT INTO scan_labels (
-            id, scan_id, user_id, label_type, label_weight, reported_age, 
-            accuracy_category, prediction_error, error_bucket, harvest_confirmed,
-            credibility_factor, effective_weight, notes, created_at, labeled_at,
-            label_source, trust_source, trust_weight, label_version,
-            age_correct, recommendation_correct
-        ) VALUES (
-            :id, :scan_id, :user_id, :label_type, :label_weight, :reported_age,
-            :accuracy_category, :prediction_error, :error_bucket, :harvest_confirmed,
-            :credibility_factor, :effective_weight, :notes, :created_at, :labeled_at,
-            :label_source, :trust_source, :trust_weight, :label_version,
-            :age_correct, :recommendation_correct
+    async with database.transaction():
+        # The label is part of the scan's include=label view. Numbered first -
+        # the change counter is always locked before the stats rollup.
+        await mark_scan_changed(scan_id, user["id"])
+        await database.execute(
+            """
+            INSERT INTO scan_labels (
+                id, scan_id, user_id, label_type, label_weight, reported_age, 
+                accuracy_category, prediction_error, error_bucket, harvest_confirmed,
+                credibility_factor, effective_weight, notes, created_at, labeled_at,
+                label_source, trust_source, trust_weight, label_version,
+                age_correct, recommendation_correct
+            ) VALUES (
+                :id, :scan_id, :user_id, :label_type, :label_weight, :reported_age,
+                :accuracy_category, :prediction_error, :error_bucket, :harvest_confirmed,
+                :credibility_factor, :effective_weight, :notes, :created_at, :labeled_at,
+                :label_source, :trust_source, :trust_weight, :label_version,
+                :age_correct, :recommendation_correct
+            )
+            """,
+            {
+                "id": label_id,
+                "scan_id": scan_id,
+                "user_id": user["id"],
+                "label_type": label_type,
+                "label_weight": base_weight,
+                "reported_age": data.reported_age,
+                "accuracy_category": data.accuracy_category,
+                "prediction_error": prediction_error,
+                "error_bucket": error_bucket,
+                "harvest_confirmed": data.harvest_confirmed,
+                "credibility_factor": credibility,
+                "effective_weight": effective_weight,
+                "notes": data.notes,
+                "created_at": now,
+                "labeled_at": now,
+                "label_source": "user_self_report",
+                "trust_source": "self_reported",
+                "trust_weight": effective_weight,
+                "label_version": 1,  # Current weighting schema version
+                "age_correct": age_correct,
+                "recommendation_correct": recommendation_correct,
+            }
         )
-        """,
-        {
-            "id": label_id,
-            "scan_id": scan_id,
-            "user_id": user["id"],
-            "label_type": label_type,
-            "label_weight": base_weight,
-            "reported_age": data.reported_age,
-            "accuracy_category": data.accuracy_category,
-            "prediction_error": prediction_error,
-            "error_bucket": error_bucket,
-            "harvest_confirmed": data.harvest_confirmed,
-            "credibility_factor": credibility,
-            "effective_weight": effective_weight,
-            "notes": data.notes,
-            "created_at": now,
-            "labeled_at": now,
-            "label_source": "user_self_report",
-            "trust_source": "self_reported",
-            "trust_weight": effective_weight,
-            "label_version": 1,  # Current weighting schema version
-            "age_correct": age_correct,
-            "recommendation_correct": recommendation_correct,
-        }
-    )
+        await apply_scan_stats_delta(user["id"], labeled_delta=1)
     
     logger.info(
         f"Scan label created: scan={scan_id}, type={label_type}, "
@@ -2303,36 +3984,16 @@ async def get_scan_label(
     user: dict = Depends(get_current_user)
 ):
     """Get the label for a specific scan if it exists."""
-    # Verify scan ownership
-    scan = await database.fetch_one(
-        "SELECT id FROM scans WHERE id = :scan_id AND user_id = :user_id",
-        {"scan_id": scan_id, "user_id": user["id"]}
+    # Ownership check and label read in one query
+    query = with_scan_label(sqlalchemy.select(scans_table.c.id)).where(
+        (scans_table.c.id == scan_id) & (scans_table.c.user_id == user["id"])
     )
+    scan = await database.fetch_one(query)
     if not scan:
         raise HTTPException(status_code=404, detail="Scan not found")
     
-    # Get label
-    label = await database.fetch_one(
-        "SELECT * FROM scan_labels WHERE scan_id = :scan_id",
-        {"scan_id": scan_id}
-    )
-    
-    if not label:
-        return None
-    
-    return ScanLabelResponse(
-        id=label["id"],
-        scan_id=label["scan_id"],
-        label_type=label["label_type"] or "unknown",
-        label_weight=label["label_weight"] or 0,
-        effective_weight=label["effective_weight"] or 0,
-        reported_age=label["reported_age"],
-        accuracy_category=label["accuracy_category"],
-        error_bucket=label["error_bucket"],
-        prediction_error=label["prediction_error"],
-        harvest_confirmed=label["harvest_confirmed"] or False,
-        created_at=label["created_at"],
-    )
+    label = scan_label_fields(dict(scan))
+    return ScanLabelResponse(**label) if label else None
 
 
 @api_router.delete("/scans/{scan_id}/label")
@@ -2350,10 +4011,14 @@ async def delete_scan_label(
         raise HTTPException(status_code=404, detail="Scan not found")
     
     # Delete label
-    await database.execute(
-        "DELETE FROM scan_labels WHERE scan_id = :scan_id",
-        {"scan_id": scan_id}
-    )
+    async with database.transaction():
+        deleted = await database.fetch_all(
+            "DELETE FROM scan_labels WHERE scan_id = :scan_id RETURNING id",
+            {"scan_id": scan_id}
+        )
+        if deleted:
+            await mark_scan_changed(scan_id, user["id"])
+            await apply_scan_stats_delta(user["id"], labeled_delta=-1)
     
     return {"deleted": True, "scan_id": scan_id}
 
@@ -2524,21 +4189,31 @@ async def get_labels(
 async def edit_scan_with_reanalysis(
     scan_id: str, 
     data: ScanEditRequest, 
+    request: Request,
+    response: Response,
     user: dict = Depends(get_current_user)
 ):
     """
     Edit scan details and optionally re-analyze with LLM.
     User can correct deer_sex, deer_type, and antler_points.
-    If image_base64 is provided, the LLM will re-analyze with user corrections as hints.
+    If image_base64 is provided, or reanalyze is set, the LLM will re-analyze
+    with user corrections as hints. Without image_base64 the stored image is
+    used (served from the local image cache when recently read).
     """
-    # Get existing scan
-    query = scans_table.select().where(
+    # Get existing scan - its current analysis seeds the re-analysis hints
+    query = select_scan_responses().add_columns(
+        scans_table.c.region_state, image_assets_table.c.object_key
+    ).select_from(
+        scans_table.outerjoin(image_assets_table, image_assets_table.c.id == scans_table.c.image_asset_id)
+    ).where(
         (scans_table.c.id == scan_id) & (scans_table.c.user_id == user["id"])
     )
     scan = await database.fetch_one(query)
     
     if not scan:
         raise HTTPException(status_code=404, detail="Scan not found")
+    scan = dict(scan)
+    updated_scan = None
     
     # Calculate total antler points if left/right provided
     total_points = None
@@ -2547,12 +4222,13 @@ async def edit_scan_with_reanalysis(
         right = data.antler_points_right or 0
         total_points = left + right
     
-    # If image is provided, re-analyze with LLM
-    if data.image_base64:
+    # If image is provided (or the stored one requested), re-analyze with LLM
+    if data.image_base64 or data.reanalyze:
+        await enforce_rate_limit("reanalyze", request, response, user_id=user["id"])
+        image_data = data.image_base64 or await load_scan_image(scan)
         try:
             logger.info(f"Re-analyzing scan {scan_id} with user corrections")
             
-            image_data = data.image_base64
             if not image_data.startswith("data:"):
                 image_data = f"data:image/jpeg;base64,{image_data}"
             
@@ -2699,9 +4375,7 @@ Provide your complete REVISED analysis in JSON format."""
                 )
                 
                 # Update the scan with new calibrated analysis
-                update_query = scans_table.update().where(
-                    scans_table.c.id == scan_id
-                ).values(
+                update_values = dict(
                     deer_age=calibrated_analysis.get("deer_age"),
                     deer_type=calibrated_analysis.get("deer_type"),
                     deer_sex=calibrated_analysis.get("deer_sex"),
@@ -2722,9 +4396,11 @@ Provide your complete REVISED analysis in JSON format."""
                     region_source=calibrated_analysis.get("region_source"),
                     region_state=calibrated_analysis.get("region_state"),
                     calibration_strategy=calibrated_analysis.get("calibration_strategy"),
-                    calibration_fallback_reason=calibrated_analysis.get("calibration_fallback_reason")
+                    calibration_fallback_reason=calibrated_analysis.get("calibration_fallback_reason"),
                 )
-                await database.execute(update_query)
+                async with database.transaction():
+                    updated_scan = await update_owned_scan(scan_id, user["id"], update_values)
+                    await apply_scan_stats_delta(user["id"], removed=[scan], added=[updated_scan])
         except Exception as e:
             logger.error(f"Re-analysis failed: {e}")
             # Fall through to simple update
@@ -2743,37 +4419,36 @@ Provide your complete REVISED analysis in JSON format."""
             update_values["antler_points"] = total_points
         
         if update_values:
-            update_query = scans_table.update().where(
-                scans_table.c.id == scan_id
-            ).values(**update_values)
-            await database.execute(update_query)
-    
-    # Fetch updated scan
-    query = scans_table.select().where(scans_table.c.id == scan_id)
-    updated_scan = await database.fetch_one(query)
+            updated_scan = await update_owned_scan(scan_id, user["id"], update_values)
     
-    return build_scan_response(dict(updated_scan))
+    return build_scan_response(updated_scan or scan)
 
-@api_router.delete("/scans/{scan_id}")
-async def delete_scan(scan_id: str, user: dict = Depends(get_current_user)):
-    query = scans_table.select().where(
-        (scans_table.c.id == scan_id) & (scans_table.c.user_id == user["id"])
-    )
-    scan = await database.fetch_one(query)
+# DELETE /scans/all must be registered before DELETE /scans/{scan_id}
+@api_router.delete("/scans/all")
+async def delete_all_scans(user: dict = Depends(get_current_user)):
+    """
+    Delete ALL scans for the current user.
+    Used when user wants to clear all scan history.
+    """
+    async with database.transaction():
+        deleted = await delete_user_scans(user["id"])
     
-    if not scan:
-        raise HTTPException(status_code=404, detail="Scan not found")
+    if not deleted:
+        return {"deleted_count": 0, "message": "No scans to delete"}
+    image_purger.wake()
     
-    # Delete image from R2 cloud storage
-    if R2_ENABLED:
-        try:
-            delete_scan_image(scan_id)
-        except Exception as e:
-            logger.warning(f"Failed to delete R2 image for scan {scan_id}: {e}")
-            # Continue with DB deletion even if R2 fails
+    deleted_count = len(deleted)
+    logger.info(f"Deleted ALL {deleted_count} scans for user {user['id']}")
     
-    query = scans_table.delete().where(scans_table.c.id == scan_id)
-    await database.execute(query)
+    return {"deleted_count": deleted_count, "message": f"Deleted all {deleted_count} scan(s)"}
+
+@api_router.delete("/scans/{scan_id}")
+async def delete_scan(scan_id: str, user: dict = Depends(get_current_user)):
+    async with database.transaction():
+        deleted = await delete_user_scans(user["id"], scans_table.c.id == scan_id)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Scan not found")
+    image_purger.wake()
     
     return {"message": "Scan deleted"}
 
@@ -2792,66 +4467,20 @@ async def delete_scans_by_local_image_ids(
     if not request.local_image_ids:
         return {"deleted_count": 0, "message": "No local image IDs provided"}
     
-    # Find all scans with matching local_image_ids for this user
-    query = scans_table.select().where(
-        (scans_table.c.user_id == user["id"]) & 
-        (scans_table.c.local_image_id.in_(request.local_image_ids))
-    )
-    scans_to_delete = await database.fetch_all(query)
+    async with database.transaction():
+        deleted = await delete_user_scans(
+            user["id"], scans_table.c.local_image_id.in_(request.local_image_ids)
+        )
     
-    if not scans_to_delete:
+    if not deleted:
         return {"deleted_count": 0, "message": "No matching scans found"}
+    image_purger.wake()
     
-    # Delete images from R2 cloud storage
-    if R2_ENABLED:
-        for scan in scans_to_delete:
-            try:
-                delete_scan_image(scan["id"])
-            except Exception as e:
-                logger.warning(f"Failed to delete R2 image for scan {scan['id']}: {e}")
-    
-    # Delete all matching scans
-    delete_query = scans_table.delete().where(
-        (scans_table.c.user_id == user["id"]) & 
-        (scans_table.c.local_image_id.in_(request.local_image_ids))
-    )
-    await database.execute(delete_query)
-    
-    deleted_count = len(scans_to_delete)
+    deleted_count = len(deleted)
     logger.info(f"Deleted {deleted_count} scans for user {user['id']} by local_image_ids")
     
     return {"deleted_count": deleted_count, "message": f"Deleted {deleted_count} scan(s)"}
 
-@api_router.delete("/scans/all")
-async def delete_all_scans(user: dict = Depends(get_current_user)):
-    """
-    Delete ALL scans for the current user.
-    Used when user wants to clear all scan history.
-    """
-    # Count scans before deletion
-    count_query = scans_table.select().where(scans_table.c.user_id == user["id"])
-    scans_to_delete = await database.fetch_all(count_query)
-    
-    if not scans_to_delete:
-        return {"deleted_count": 0, "message": "No scans to delete"}
-    
-    # Delete images from R2 cloud storage
-    if R2_ENABLED:
-        for scan in scans_to_delete:
-            try:
-                delete_scan_image(scan["id"])
-            except Exception as e:
-                logger.warning(f"Failed to delete R2 image for scan {scan['id']}: {e}")
-    
-    # Delete all scans for this user
-    delete_query = scans_table.delete().where(scans_table.c.user_id == user["id"])
-    await database.execute(delete_query)
-    
-    deleted_count = len(scans_to_delete)
-    logger.info(f"Deleted ALL {deleted_count} scans for user {user['id']}")
-    
-    return {"deleted_count": deleted_count, "message": f"Deleted all {deleted_count} scan(s)"}
-
 # ============ LEARN CONTENT ============
 
 @api_router.get("/learn/content")
@@ -3239,7 +4868,8 @@ async def recalibrate_scans_endpoint(data: RecalibrateScansRequest):
             curve_version=data.curve_version,
             since=data.since,
             region=data.region,
-            dry_run=data.dry_run
+            dry_run=data.dry_run,
+            next_change_seq=next_change_seq
         )
         
         return {
@@ -3557,6 +5187,38 @@ class BreadcrumbRequest(BaseModel):
     app_version: str
     data: dict = {}
 
+CRASH_REPORTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crash_reports (
+    id TEXT PRIMARY KEY,
+    timestamp TIMESTAMP NOT NULL,
+    error_message TEXT NOT NULL,
+    error_stack TEXT,
+    component_stack TEXT,
+    screen TEXT,
+    user_id TEXT,
+    platform TEXT NOT NULL,
+    app_version TEXT NOT NULL,
+    build_number TEXT,
+    device_info JSONB,
+    extra_data JSONB,
+    created_at TIMESTAMP DEFAULT NOW()
+)
+"""
+
+DEBUG_BREADCRUMBS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS debug_breadcrumbs (
+    id SERIAL PRIMARY KEY,
+    timestamp TIMESTAMP NOT NULL,
+    message TEXT NOT NULL,
+    screen TEXT,
+    user_id TEXT,
+    platform TEXT NOT NULL,
+    app_version TEXT NOT NULL,
+    data JSONB,
+    created_at TIMESTAMP DEFAULT NOW()
+)
+"""
+
 @api_router.get("/debug/status")
 async def get_debug_status():
     """Get debug mode status - controls whether crash reporting is enabled"""
@@ -3565,7 +5227,7 @@ async def get_debug_status():
         "environment": os.getenv("ENVIRONMENT", "development"),
     }
 
-@api_router.post("/debug/crash-report")
+@api_router.post("/debug/crash-report", dependencies=[Depends(rate_limited("debug_ingest"))])
 async def submit_crash_report(report: CrashReportRequest):
     """
     Receive and store crash reports from mobile apps.
@@ -3576,24 +5238,7 @@ async def submit_crash_report(report: CrashReportRequest):
     
     try:
         # Create crash_reports table if it doesn't exist
-        create_query = """
-        CREATE TABLE IF NOT EXISTS crash_reports (
-            id TEXT PRIMARY KEY,
-            timestamp TIMESTAMP NOT NULL,
-            error_message TEXT NOT NULL,
-            error_stack TEXT,
-            component_stack TEXT,
-            screen TEXT,
-            user_id TEXT,
-            platform TEXT NOT NULL,
-            app_version TEXT NOT NULL,
-            build_number TEXT,
-            device_info JSONB,
-            extra_data JSONB,
-            created_at TIMESTAMP DEFAULT NOW()
-        )
-        """
-        await database.execute(create_query)
+        await database.execute(CRASH_REPORTS_TABLE_SQL)
         
         # Insert crash report
         insert_query = """
@@ -3630,7 +5275,7 @@ async def submit_crash_report(report: CrashReportRequest):
         logger.error(f"Failed to store crash report: {e}")
         return {"status": "error", "message": str(e)}
 
-@api_router.post("/debug/breadcrumb")
+@api_router.post("/debug/breadcrumb", dependencies=[Depends(rate_limited("debug_ingest"))])
 async def submit_breadcrumb(breadcrumb: BreadcrumbRequest):
     """
     Receive breadcrumb/event data for debugging.
@@ -3641,20 +5286,7 @@ async def submit_breadcrumb(breadcrumb: BreadcrumbRequest):
     
     try:
         # Create breadcrumbs table if it doesn't exist
-        create_query = """
-        CREATE TABLE IF NOT EXISTS debug_breadcrumbs (
-            id SERIAL PRIMARY KEY,
-            timestamp TIMESTAMP NOT NULL,
-            message TEXT NOT NULL,
-            screen TEXT,
-            user_id TEXT,
-            platform TEXT NOT NULL,
-            app_version TEXT NOT NULL,
-            data JSONB,
-            created_at TIMESTAMP DEFAULT NOW()
-        )
-        """
-        await database.execute(create_query)
+        await database.execute(DEBUG_BREADCRUMBS_TABLE_SQL)
         
         # Insert breadcrumb
         insert_query = """
@@ -3744,6 +5376,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+"""
+Orphaned R2 Object Collection
+
+Objects can outlive the rows that pointed at them: uploads that failed
+halfway, images from delete paths that predate the purge queue, staged
+direct uploads that were never analyzed. This job walks the bucket and
+deletes objects no row references.
+
+Features:
+- Streams the bucket one ListObjectsV2 page (up to 1000 keys) at a time, and
+  diffs each page against the database in bounded queries - memory use
+  doesn't grow with the bucket
+- scans/<scan_id>... kept while the scan exists; images/<asset_id>... while
+  an image_assets row records the key; uploads/... (staged direct uploads)
+  are never referenced once analyzed
+- Grace period: newer objects are never touched (an upload in flight has
+  its objects before its row)
+- Keys already in image_purge_queue are left to the image purge worker
+- Orphans deleted with DeleteObjects
+- Dry run by default - reports what would be deleted
+- Resumable: progress is saved in storage_gc_runs after every page, and a
+  run stopped by its page budget (or a failure) continues from its last key
+- Counts and bytes (scanned, orphaned, deleted) per run
+
+Configuration:
+    STORAGE_GC_GRACE_HOURS - Minimum object age before it may be deleted (default: 24)
+    STORAGE_GC_MAX_PAGES   - Listing pages per call before pausing (default: 50)
+    STORAGE_GC_ADMIN_TOKEN - Shared secret required for a run that deletes
+                             (dry_run=false); without it only dry runs are allowed
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from r2_storage import UPLOAD_PREFIX, delete_image_objects_async, list_objects_page_async
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+STORAGE_GC_GRACE_HOURS = float(os.getenv("STORAGE_GC_GRACE_HOURS", "24"))
+STORAGE_GC_MAX_PAGES = int(os.getenv("STORAGE_GC_MAX_PAGES", "50"))
+STORAGE_GC_ADMIN_TOKEN = os.getenv("STORAGE_GC_ADMIN_TOKEN", "")
+
+# Upper bound on max_pages per call - keeps one request from listing the
+# whole bucket
+STORAGE_GC_MAX_PAGES_LIMIT = 1000
+
+# Run states
+STATUS_RUNNING = "running"
+STATUS_PAUSED = "paused"  # Page budget used up - resume to continue
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+# Counters saved on the run row after every page
+RUN_COUNTERS = (
+    "objects_scanned", "bytes_scanned",
+    "orphans_found", "orphan_bytes",
+    "objects_deleted", "bytes_deleted", "delete_failures",
+)
+
+
+def key_owner(object_key: str) -> Optional[tuple]:
+    """
+    What an object key belongs to: ("scan", scan_id), ("asset", asset_id) or
+    ("upload", None). None for keys outside the prefixes we manage.
+    """
+    prefix, _, name = object_key.partition("/")
+    if prefix == UPLOAD_PREFIX:
+        return ("upload", None)
+    if prefix not in ("scans", "images") or not name or "/" in name:
+        return None
+    # <id>.<ext> or <id>_<rendition>.<ext>
+    owner_id = name.split(".", 1)[0].split("_", 1)[0]
+    return ("scan" if prefix == "scans" else "asset", owner_id)
+
+
+# ============================================================================
+# COLLECTOR
+# ============================================================================
+
+class StorageCollector:
+    """Finds and deletes R2 objects that no database row references."""
+
+    def __init__(self, database, runs_table):
+        self.database = database
+        self.runs_table = runs_table
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._lock.locked()
+
+    async def run(
+        self,
+        dry_run: bool = True,
+        grace_hours: Optional[float] = None,
+        resume: bool = True,
+        max_pages: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Collect orphans for up to max_pages listing pages.
+
+        With resume, continues the latest paused or failed run of the same
+        mode (dry run or not), keeping its grace cutoff; otherwise starts a
+        new run from the beginning of the bucket.
+
+        Returns:
+            The run row (status "paused" if there is more to do)
+        """
+        async with self._lock:
+            run = await self._resumable_run(dry_run) if resume else None
+            if run is None:
+                run = await self._start_run(dry_run, STORAGE_GC_GRACE_HOURS if grace_hours is None else grace_hours)
+            else:
+                logger.info(f"Storage GC: resuming run {run['id']} after {run['start_after']!r}")
+            return await self._run_pages(run, max_pages or STORAGE_GC_MAX_PAGES)
+
+    async def _resumable_run(self, dry_run: bool) -> Optional[Dict[str, Any]]:
+        table = self.runs_table
+        row = await self.database.fetch_one(
+            table.select().where(table.c.dry_run == dry_run)
+            .order_by(table.c.started_at.desc()).limit(1)
+        )
+        if row and row["status"] in (STATUS_PAUSED, STATUS_FAILED, STATUS_RUNNING):
+            # "running" here means the process died mid-run - the lock says no run is live
+            return dict(row)
+        return None
+
+    async def _start_run(self, dry_run: bool, grace_hours: float) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        run = {
+            "id": str(uuid.uuid4()),
+            "dry_run": dry_run,
+            "status": STATUS_RUNNING,
+            "cutoff": now - timedelta(hours=grace_hours),
+            "start_after": "",
+            "pages": 0,
+            **{counter: 0 for counter in RUN_COUNTERS},
+            "started_at": now,
+            "updated_at": now,
+            "finished_at": None,
+            "error": None,
+        }
+        await self.database.execute(self.runs_table.insert().values(**run))
+        logger.info(f"Storage GC: run {run['id']} started (dry_run={dry_run}, cutoff {run['cutoff']})")
+        return run
+
+    async def _save(self, run: Dict[str, Any]):
+        run["updated_at"] = datetime.utcnow()
+        table = self.runs_table
+        await self.database.execute(
+            table.update().where(table.c.id == run["id"]).values(
+                status=run["status"],
+                start_after=run["start_after"],
+                pages=run["pages"],
+                updated_at=run["updated_at"],
+                finished_at=run["finished_at"],
+                error=run["error"],
+                **{counter: run[counter] for counter in RUN_COUNTERS},
+            )
+        )
+
+    async def _run_pages(self, run: Dict[str, Any], max_pages: int) -> Dict[str, Any]:
+        run["status"], run["error"] = STATUS_RUNNING, None
+        progress = ("start_after", "pages") + RUN_COUNTERS
+        checkpoint = {name: run[name] for name in progress}
+        try:
+            for _ in range(max_pages):
+                objects, more = await list_objects_page_async(run["start_after"])
+                if objects:
+                    await self._collect_page(run, objects)
+                    run["start_after"] = objects[-1]["Key"]
+                run["pages"] += 1
+                if not more:
+                    run["status"] = STATUS_COMPLETED
+                    run["finished_at"] = datetime.utcnow()
+                    break
+                await self._save(run)
+                checkpoint = {name: run[name] for name in progress}
+            else:
+                run["status"] = STATUS_PAUSED
+        except Exception as e:
+            # Keep progress up to the last saved page - resuming redoes the rest
+            logger.error(f"Storage GC run {run['id']} failed: {e}")
+            run.update(checkpoint)
+            run["status"], run["error"] = STATUS_FAILED, str(e)[:500]
+
+        await self._save(run)
+        logger.info(
+            f"Storage GC run {run['id']} {run['status']}: {run['objects_scanned']} scanned, "
+            f"{run['orphans_found']} orphaned ({run['orphan_bytes']} bytes), {run['objects_deleted']} deleted"
+        )
+        return run
+
+    async def _collect_page(self, run: Dict[str, Any], objects: List[Dict[str, Any]]):
+        """Find the orphans among one listing page and delete them (unless a dry run)."""
+        run["objects_scanned"] += len(objects)
+        run["bytes_scanned"] += sum(obj["Size"] for obj in objects)
+
+        candidates = {}
+        for obj in objects:
+            owner = key_owner(obj["Key"])
+            # LastModified is timezone-aware UTC; cutoff is naive UTC like every other timestamp here
+            if owner and obj["LastModified"].replace(tzinfo=None) < run["cutoff"]:
+                candidates[obj["Key"]] = (owner, obj["Size"])
+        if not candidates:
+            return
+
+        referenced = await self._referenced_keys(candidates)
+        orphans = {key: size for key, (_, size) in candidates.items() if key not in referenced}
+        if not orphans:
+            return
+
+        run["orphans_found"] += len(orphans)
+        run["orphan_bytes"] += sum(orphans.values())
+        if run["dry_run"]:
+            return
+
+        deleted, failed = await delete_image_objects_async(list(orphans))
+        run["objects_deleted"] += len(deleted)
+        run["bytes_deleted"] += sum(orphans[key] for key in deleted)
+        run["delete_failures"] += len(failed)
+
+    async def _referenced_keys(self, candidates: Dict[str, tuple]) -> set:
+        """The candidate keys still referenced by a row (or owned by the purge queue)."""
+        scan_ids = sorted({owner_id for (kind, owner_id), _ in candidates.values() if kind == "scan"})
+        asset_ids = sorted({owner_id for (kind, owner_id), _ in candidates.values() if kind == "asset"})
+        referenced = set()
+
+        if scan_ids:
+            rows = await self.database.fetch_all(
+                "SELECT id FROM scans WHERE id = ANY(:ids)", {"ids": scan_ids}
+            )
+            live = {row["id"] for row in rows}
+            referenced.update(
+                key for key, ((kind, owner_id), _) in candidates.items() if kind == "scan" and owner_id in live
+            )
+
+        if asset_ids:
+            rows = await self.database.fetch_all(
+                "SELECT object_key, thumbnail_key, preview_key FROM image_assets WHERE id = ANY(:ids)",
+                {"ids": asset_ids},
+            )
+            referenced.update(key for row in rows for key in dict(row).values() if key)
+
+        rows = await self.database.fetch_all(
+            "SELECT object_key FROM image_purge_queue WHERE object_key = ANY(:keys)",
+            {"keys": list(candidates)},
+        )
+        referenced.update(row["object_key"] for row in rows)
+        return referenced
+
+    async def get_runs(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most recent runs, newest first."""
+        table = self.runs_table
+        rows = await self.database.fetch_all(
+            table.select().order_by(table.c.started_at.desc()).limit(limit)
+        )
+        return [dict(row) for row in rows]
@@ -0,0 +1,323 @@
+"""
+Resumable Chunked Uploads
+
+Hunters often scan from a stand with one bar of signal, where a single large
+/analyze-deer POST that drops at 90% starts over from zero. Instead, the app
+can open an upload session, send the image in ranged chunks, ask for the
+committed offset after a failure and continue from there - then analyze the
+finished upload.
+
+Features:
+- Sessions in upload_sessions (owner, content type, size, committed offset,
+  expiry); bytes staged in one file per session under UPLOAD_SESSION_DIR
+- The committed offset only moves after the bytes are flushed and fsync'd
+- A chunk cut off mid-transfer still commits the bytes that arrived
+- Retransmitted or overlapping chunks are fine: bytes below the committed
+  offset are skipped
+- Optional SHA-256 of the whole image, checked before analysis
+- Kept until a scan is saved, so a failed analysis is retried without
+  re-sending a byte
+- Expired sessions and their files are swept in the background
+- Per-user caps on open sessions and on bytes reserved across them, so one
+  account can't fill the staging disk
+
+Staging is local disk: every request of a session must reach the same
+instance (one replica, or workers sharing the directory). R2 multipart
+uploads were not used - parts must be at least 5MB, far larger than a
+chunk that gets through on a poor link.
+
+Configuration:
+    UPLOAD_SESSION_DIR         - Staging directory
+    UPLOAD_SESSION_TTL_HOURS   - Session lifetime (default: 24)
+    UPLOAD_SESSION_CHUNK_BYTES - Chunk size suggested to clients (default: 256KB)
+    UPLOAD_SESSION_MAX_OPEN    - Unexpired sessions per user (default: 5)
+    UPLOAD_SESSION_MAX_STAGED_BYTES - total_bytes reserved across a user's
+                                 unexpired sessions (default: 75MB)
+"""
+
+import os
+import re
+import uuid
+import asyncio
+import hashlib
+import logging
+import tempfile
+import weakref
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import sqlalchemy
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+UPLOAD_SESSION_DIR = os.getenv(
+    "UPLOAD_SESSION_DIR",
+    os.path.join(tempfile.gettempdir(), "iron_stag_upload_sessions")
+)
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+UPLOAD_SESSION_CHUNK_BYTES = int(os.getenv("UPLOAD_SESSION_CHUNK_BYTES", str(256 * 1024)))
+UPLOAD_SESSION_MAX_OPEN = int(os.getenv("UPLOAD_SESSION_MAX_OPEN", "5"))
+UPLOAD_SESSION_MAX_STAGED_BYTES = int(os.getenv("UPLOAD_SESSION_MAX_STAGED_BYTES", str(75 * 1024 * 1024)))
+
+# Largest single PUT accepted - chunks are held in memory until written
+UPLOAD_SESSION_MAX_CHUNK_BYTES = 8 * 1024 * 1024
+
+# How often expired sessions are swept
+UPLOAD_SESSION_SWEEP_SECONDS = 3600
+
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+class UploadSessionError(Exception):
+    """A chunk or finalize request that can't be applied. Carries the HTTP status."""
+
+    def __init__(self, status_code: int, message: str, session: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.session = session
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, Optional[int]]:
+    """
+    Parse "bytes <start>-<end>/<total>" (end inclusive, total may be *).
+
+    Raises:
+        UploadSessionError: 400 if the header is missing or malformed
+    """
+    match = CONTENT_RANGE.match((header or "").strip())
+    if not match or int(match.group(2)) < int(match.group(1)):
+        raise UploadSessionError(400, "Content-Range must be 'bytes <start>-<end>/<total>'")
+    total = None if match.group(3) == "*" else int(match.group(3))
+    return int(match.group(1)), int(match.group(2)), total
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class UploadSessionStore:
+    """Upload sessions: rows in the database, bytes in a local staging file."""
+
+    def __init__(self, database, table, directory: str = UPLOAD_SESSION_DIR):
+        self.database = database
+        self.table = table
+        self.directory = directory
+        # One writer per session at a time (sessions live on this instance's disk)
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.part")
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+    async def create(
+        self, user_id: str, content_type: str, total_bytes: int, sha256: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Open a session for an upload of total_bytes.
+
+        A session reserves its whole total_bytes up front - chunks can't run
+        past it - so the byte cap holds before anything is staged.
+
+        Raises:
+            UploadSessionError: 429 if the user already has
+            UPLOAD_SESSION_MAX_OPEN sessions open, or this one would take
+            them past UPLOAD_SESSION_MAX_STAGED_BYTES
+        """
+        now = datetime.utcnow()
+        session = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "content_type": content_type,
+            "total_bytes": total_bytes,
+            "committed_bytes": 0,
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + timedelta(hours=UPLOAD_SESSION_TTL_HOURS),
+        }
+        await asyncio.to_thread(os.makedirs, self.directory, exist_ok=True)
+
+        table = self.table
+        async with self.database.transaction():
+            # Serialize this user's creates so concurrent ones can't both pass the caps
+            await self.database.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(:key))", {"key": f"upload_sessions:{user_id}"}
+            )
+            usage = await self.database.fetch_one(
+                sqlalchemy.select(
+                    sqlalchemy.func.count().label("open"),
+                    sqlalchemy.func.coalesce(sqlalchemy.func.sum(table.c.total_bytes), 0).label("reserved"),
+                ).where((table.c.user_id == user_id) & (table.c.expires_at > now))
+            )
+            if usage["open"] >= UPLOAD_SESSION_MAX_OPEN:
+                raise UploadSessionError(
+                    429, f"Too many open uploads ({UPLOAD_SESSION_MAX_OPEN}) - finish or delete one first"
+                )
+            if usage["reserved"] + total_bytes > UPLOAD_SESSION_MAX_STAGED_BYTES:
+                raise UploadSessionError(
+                    429, f"Open uploads would exceed {UPLOAD_SESSION_MAX_STAGED_BYTES} bytes - finish or delete one first"
+                )
+            await self.database.execute(table.insert().values(**session))
+        return session
+
+    async def get(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The user's session, or None if it doesn't exist or has expired.
+
+        If the staging file lost bytes (e.g. the disk was reset by a redeploy)
+        the committed offset is moved back to what's actually on disk.
+        """
+        table = self.table
+        row = await self.database.fetch_one(
+            table.select().where(
+                (table.c.id == session_id) & (table.c.user_id == user_id)
+                & (table.c.expires_at > datetime.utcnow())
+            )
+        )
+        if not row:
+            return None
+        session = dict(row)
+
+        on_disk = await asyncio.to_thread(self._staged_size, session["id"])
+        if on_disk < session["committed_bytes"]:
+            logger.warning(
+                f"Upload session {session['id']}: {session['committed_bytes']} bytes committed "
+                f"but {on_disk} staged - resuming from {on_disk}"
+            )
+            session["committed_bytes"] = on_disk
+            await self.database.execute(
+                table.update().where(table.c.id == session["id"]).values(committed_bytes=on_disk)
+            )
+        return session
+
+    def _staged_size(self, session_id: str) -> int:
+        try:
+            return os.path.getsize(self._path(session_id))
+        except FileNotFoundError:
+            return 0
+
+    def _write(self, session_id: str, offset: int, data: bytes):
+        """Write at offset, drop anything past it, and make it durable (runs in a thread)."""
+        path = self._path(session_id)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(offset)
+            f.write(data)
+            f.truncate()  # Bytes written past the offset but never committed
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def append(
+        self, session_id: str, user_id: str, start: int, chunk: bytes, total: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply a chunk that starts at byte `start`.
+
+        Bytes below the committed offset are skipped (retransmissions). A
+        chunk may be short - whatever arrived before a disconnect commits.
+        total is the size the client claims (Content-Range), if it sent one.
+
+        Raises:
+            UploadSessionError: 409 if the chunk starts past the committed
+            offset, 400 if it runs past total_bytes or total disagrees, 404 if the session is
+            missing or expired
+        """
+        async with self._lock(session_id):
+            # Read under the lock - another request may have moved the offset
+            session = await self.get(session_id, user_id)
+            if session is None:
+                raise UploadSessionError(404, "Upload session not found or expired")
+
+            if total is not None and total != session["total_bytes"]:
+                raise UploadSessionError(400, f"Content-Range total is {total}, session is {session['total_bytes']} bytes", session)
+            committed = session["committed_bytes"]
+            if start > committed:
+                raise UploadSessionError(409, f"Chunk starts at {start}, expected {committed}", session)
+            if start + len(chunk) > session["total_bytes"]:
+                raise UploadSessionError(400, f"Chunk runs past the upload size ({session['total_bytes']} bytes)", session)
+
+            new_bytes = chunk[committed - start:]
+            if not new_bytes:
+                return session
+
+            await asyncio.to_thread(self._write, session["id"], committed, new_bytes)
+            session["committed_bytes"] = committed + len(new_bytes)
+            session["updated_at"] = datetime.utcnow()
+            table = self.table
+            await self.database.execute(
+                table.update().where(table.c.id == session["id"]).values(
+                    committed_bytes=session["committed_bytes"], updated_at=session["updated_at"]
+                )
+            )
+            return session
+
+    async def read_complete(self, session_id: str, user_id: str) -> Tuple[bytes, str]:
+        """
+        The finished upload, for analysis.
+
+        Raises:
+            UploadSessionError: 404 if missing or expired, 409 if incomplete,
+            400 if the bytes don't match the declared SHA-256
+        """
+        session = await self.get(session_id, user_id)
+        if session is None:
+            raise UploadSessionError(404, "Upload session not found or expired")
+        if session["committed_bytes"] < session["total_bytes"]:
+            raise UploadSessionError(
+                409, f"Upload incomplete: {session['committed_bytes']} of {session['total_bytes']} bytes", session
+            )
+
+        image_bytes = await asyncio.to_thread(self._read, session_id)
+        if session["sha256"] and await asyncio.to_thread(_sha256, image_bytes) != session["sha256"]:
+            raise UploadSessionError(400, "Upload doesn't match its sha256 - start a new session", session)
+        return image_bytes, session["content_type"]
+
+    def _read(self, session_id: str) -> bytes:
+        with open(self._path(session_id), "rb") as f:
+            return f.read()
+
+    async def delete(self, session_id: str):
+        """Drop a session and its staged bytes (after its scan is saved)."""
+        await self.database.execute(self.table.delete().where(self.table.c.id == session_id))
+        await asyncio.to_thread(self._remove_file, session_id)
+
+    def _remove_file(self, session_id: str):
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    async def purge_expired(self) -> int:
+        """Delete expired sessions and their files. Returns how many were removed."""
+        rows = await self.database.fetch_all(
+            self.table.delete().where(self.table.c.expires_at <= datetime.utcnow()).returning(self.table.c.id)
+        )
+        for row in rows:
+            await asyncio.to_thread(self._remove_file, row["id"])
+        if rows:
+            logger.info(f"Upload sessions: purged {len(rows)} expired session(s)")
+        return len(rows)
+
+    async def run_forever(self):
+        """Background task: purge expired sessions every UPLOAD_SESSION_SWEEP_SECONDS."""
+        while True:
+            try:
+                await self.purge_expired()
+            except Exception as e:
+                logger.warning(f"Upload session purge failed: {e}")
+            await asyncio.sleep(UPLOAD_SESSION_SWEEP_SECONDS)
+
@@ -6,11 +6,11 @@ import {
   FlatList,
   TouchableOpacity,
   RefreshControl,
-  Image,
   TextInput,
   ScrollView,
 } from 'react-native';
 import { router } from 'expo-router';
+import { Image } from 'expo-image';
 import { useSafeAreaInsets } from 'react-native-safe-area-context';
 import { useFocusEffect } from '@react-navigation/native';
 import { Search, Filter, X, Camera, Crown, Target, AlertCircle, MessageSquare, Heart } from 'lucide-react-native';
@@ -45,6 +45,8 @@ interface Scan {
   created_at: string;
   // Cloud image storage (R2) - for cross-device access
   image_url?: string | null;
+  thumbnail_url?: string | null;  // Small rendition - full image only on the detail screen
+  blurhash?: string | null;  // Placeholder painted until the image loads
   // Favorites and Tags
   is_favorite?: boolean;
   tags?: string[];
@@ -90,7 +92,11 @@ function getAgeDisplayText(age: number | null): string {
 }
 
 // Component to handle async image loading
-function ScanImage({ localImageId, imageUrl }: { localImageId: string; imageUrl?: string | null }) {
+function ScanImage({ localImageId, imageUrl, blurhash }: {
+  localImageId: string;
+  imageUrl?: string | null;
+  blurhash?: string | null;
+}) {
   const [imageUri, setImageUri] = useState<string | null>(null);
   const { getImage } = useImageStore();
 
@@ -129,7 +135,13 @@ function ScanImage({ localImageId, imageUrl }: { localImageId: string; imageUrl?
     };
   }, [localImageId, imageUrl]);
 
+  const placeholder = blurhash ? { blurhash } : undefined;
+
   if (!imageUri) {
+    if (placeholder) {
+      // Still resolving the local image - paint the blurred preview meanwhile
+      return <Image placeholder={placeholder} style={styles.thumbnail} />;
+    }
     return (
       <View style={styles.scanIconBox}>
         <Target size={28} color={colors.textPrimary} />
@@ -137,7 +149,7 @@ function ScanImage({ localImageId, imageUrl }: { localImageId: string; imageUrl?
     );
   }
 
-  return <Image source={{ uri: imageUri }} style={styles.thumbnail} />;
+  return <Image source={{ uri: imageUri }} placeholder={placeholder} transition={150} style={styles.thumbnail} />;
 }
 
 export default function HistoryScreen() {
@@ -318,7 +330,11 @@ export default function HistoryScreen() {
           
           <View style={styles.scanRow}>
             {/* Left side - Icon or Image */}
-            <ScanImage localImageId={item.local_image_id} imageUrl={item.image_url} />
+            <ScanImage
+              localImageId={item.local_image_id}
+              imageUrl={item.thumbnail_url ?? item.image_url}
+              blurhash={item.blurhash}
+            />
             
             {/* Middle - Info */}
             <View style={styles.scanInfo}>
@@ -253,32 +253,16 @@ export default function ScanResultScreen() {
       }
       
       // Include image for re-analysis if available
-      if (imageUri) {
+      if (imageUri && (imageUri.startsWith('http://') || imageUri.startsWith('https://'))) {
+        // Cloud URL (R2) - the server re-analyzes its stored copy, nothing to upload
+        editData.reanalyze = true;
+      } else if (imageUri) {
         try {
-          let base64Image: string;
-          
-          // Check if it's a cloud URL (R2) or local file
-          if (imageUri.startsWith('http://') || imageUri.startsWith('https://')) {
-            // Cloud URL - fetch and convert to base64
-            const response = await fetch(imageUri);
-            const blob = await response.blob();
-            const reader = new FileReader();
-            base64Image = await new Promise<string>((resolve, reject) => {
-              reader.onloadend = () => {
-                const result = reader.result as string;
-                // Extract just the base64 part if it includes the data URI prefix
-                resolve(result);
-              };
-              reader.onerror = reject;
-              reader.readAsDataURL(blob);
-            });
-          } else {
-            // Local file URI - use FileSystem to read
-            const base64Data = await FileSystem.readAsStringAsync(imageUri, {
-              encoding: 'base64' as FileSystem.EncodingType,
-            });
-            base64Image = `data:image/jpeg;base64,${base64Data}`;
-          }
+          // Local file URI - use FileSystem to read
+          const base64Data = await FileSystem.readAsStringAsync(imageUri, {
+            encoding: 'base64' as FileSystem.EncodingType,
+          });
+          const base64Image = `data:image/jpeg;base64,${base64Data}`;
           
           editData.image_base64 = base64Image;
           console.log('Image included for re-analysis, length:', base64Image.length);
@@ -295,7 +279,7 @@ export default function ScanResultScreen() {
       }
       
       // Show loading indicator for re-analysis
-      if (editData.image_base64) {
+      if (editData.image_base64 || editData.reanalyze) {
         Alert.alert('Re-analyzing', 'Sending image to AI for new analysis...');
       }
       
@@ -303,7 +287,7 @@ export default function ScanResultScreen() {
       setScan(response.data);
       setShowEditModal(false);
       
-      if (editData.image_base64) {
+      if (editData.image_base64 || editData.reanalyze) {
         Alert.alert('Success', 'Scan re-analyzed with your corrections!');
       } else {
         Alert.alert('Success', 'Scan details updated');
@@ -102,6 +102,7 @@ export const scanAPI = {
     antler_points_left?: number;
     antler_points_right?: number;
     image_base64?: string;
+    reanalyze?: boolean;
   }) => api.post(`/scans/${id}/edit`, data),
 
   deleteScan: (id: string) => api.delete(`/scans/${id}`),
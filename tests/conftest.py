@@ -0,0 +1,23 @@
+"""
+Shared test setup.
+
+The backend is a flat set of modules run from backend/, so put it on the
+import path. server.py reads its settings at import time; tests that import
+it only exercise pure helpers and never connect.
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/iron_stag_test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
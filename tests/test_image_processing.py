@@ -0,0 +1,102 @@
+import math
+
+import pytest
+
+from image_processing import BASE83_CHARS, BLURHASH_COMPONENTS, blurhash
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def decode83(text):
+    value = 0
+    for char in text:
+        value = value * 83 + BASE83_CHARS.index(char)
+    return value
+
+
+def srgb_to_linear(value):
+    value = value / 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(value):
+    value = min(1.0, max(0.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def encode83(value, length):
+    return "".join(BASE83_CHARS[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def reference_blurhash(img, x_components, y_components):
+    """Straight per-pixel transcription of the BlurHash reference encoder."""
+    width, height = img.size
+    pixels = img.load()
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                for x in range(width):
+                    basis = normalisation * math.cos(math.pi * i * x / width) * math.cos(math.pi * j * y / height)
+                    pr, pg, pb = pixels[x, y][:3]
+                    r += basis * srgb_to_linear(pr)
+                    g += basis * srgb_to_linear(pg)
+                    b += basis * srgb_to_linear(pb)
+            scale = 1 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = encode83((x_components - 1) + (y_components - 1) * 9, 1)
+    quantised_max = int(max(0, min(82, math.floor(max(abs(c) for f in ac for c in f) * 166 - 0.5))))
+    max_value = (quantised_max + 1) / 166
+    result += encode83(quantised_max, 1)
+    result += encode83((linear_to_srgb(dc[0]) << 16) + (linear_to_srgb(dc[1]) << 8) + linear_to_srgb(dc[2]), 4)
+    for component in ac:
+        r, g, b = (
+            int(max(0, min(18, math.floor(math.copysign(abs(c / max_value) ** 0.5, c) * 9 + 9.5))))
+            for c in component
+        )
+        result += encode83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def gradient(width, height):
+    img = Image.new("RGB", (width, height))
+    img.putdata([
+        (x * 255 // width, y * 255 // height, (x + y) * 127 // (width + height))
+        for y in range(height) for x in range(width)
+    ])
+    return img
+
+
+def test_blurhash_solid_color():
+    x_components, y_components = BLURHASH_COMPONENTS
+    img = Image.new("RGB", (32, 24), (200, 120, 40))
+    result = blurhash(img)
+
+    assert len(result) == 6 + 2 * (x_components * y_components - 1)
+    assert decode83(result[0]) == (x_components - 1) + (y_components - 1) * 9
+    # The DC component is the average color, exactly
+    assert decode83(result[2:6]) == (200 << 16) + (120 << 8) + 40
+    assert result == reference_blurhash(img, x_components, y_components)
+
+
+def test_blurhash_matches_reference_landscape():
+    img = gradient(32, 20)
+    assert blurhash(img) == reference_blurhash(img, *BLURHASH_COMPONENTS)
+
+
+def test_blurhash_matches_reference_portrait():
+    img = gradient(18, 32)
+    assert blurhash(img) == reference_blurhash(img, *BLURHASH_COMPONENTS[::-1])
+
+
+def test_blurhash_downscales_large_images():
+    big = gradient(640, 400)
+    small = big.copy()
+    small.thumbnail((32, 32), Image.Resampling.BILINEAR)
+    assert blurhash(big) == reference_blurhash(small, *BLURHASH_COMPONENTS)
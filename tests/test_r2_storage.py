@@ -0,0 +1,47 @@
+import datetime
+
+import botocore.auth
+import pytest
+
+import r2_storage
+
+
+@pytest.fixture
+def r2(monkeypatch):
+    """r2_storage configured for a fake bucket, with a fresh client and signing key."""
+    monkeypatch.setattr(r2_storage, "R2_ENDPOINT_URL", "https://account123.r2.cloudflarestorage.com")
+    monkeypatch.setattr(r2_storage, "R2_ACCESS_KEY_ID", "AKIDEXAMPLE")
+    monkeypatch.setattr(r2_storage, "R2_SECRET_ACCESS_KEY", "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY")
+    monkeypatch.setattr(r2_storage, "R2_BUCKET_NAME", "ironstag-images")
+    monkeypatch.setattr(r2_storage, "R2_ENABLED", True)
+    monkeypatch.setattr(r2_storage, "_client", None)
+    r2_storage._signing_key.cache_clear()
+    yield r2_storage
+    r2_storage._signing_key.cache_clear()
+
+
+def botocore_url(r2, monkeypatch, object_key, window):
+    """What the real client's generate_presigned_url returns at the window start."""
+    signed_at = datetime.datetime.utcfromtimestamp(window * r2.SIGNED_URL_WINDOW_SECONDS)
+    monkeypatch.setattr(botocore.auth, "get_current_datetime", lambda remove_tzinfo=True: signed_at)
+    return r2.get_r2_client().generate_presigned_url(
+        "get_object",
+        Params={"Bucket": r2.R2_BUCKET_NAME, "Key": object_key},
+        ExpiresIn=r2.R2_READ_URL_EXPIRES_SECONDS,
+    )
+
+
+@pytest.mark.parametrize("object_key", [
+    "scans/3f2a.jpg",
+    "images/9b1c_thumb.avif",
+    "uploads/user-1/photo with spaces+plus~tilde.jpg",
+    "scans/ünïcödé.jpg",
+])
+def test_signed_object_url_matches_botocore(r2, monkeypatch, object_key):
+    window = 20000
+    assert r2.signed_object_url(object_key, window) == botocore_url(r2, monkeypatch, object_key, window)
+
+
+def test_signed_object_url_is_stable_within_a_window(r2):
+    assert r2.signed_object_url("scans/a.jpg", 7) == r2.signed_object_url("scans/a.jpg", 7)
+    assert r2.signed_object_url("scans/a.jpg", 7) != r2.signed_object_url("scans/a.jpg", 8)
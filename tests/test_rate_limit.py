@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limit
+from rate_limit import (
+    BUCKET_KEY_MAX_IDENTITY, InMemoryBackend, RateLimiter, RateLimitRule, _parse_rule, bucket_key,
+)
+
+RULE = RateLimitRule(capacity=3, period_seconds=60)  # One token every 20s
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock for rate_limit only - the event loop keeps the real one."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "true")
+    monkeypatch.setitem(rate_limit.RateLimitConfig.DEFAULT_RULES, "test", RULE)
+    monkeypatch.delenv("RATE_LIMIT_TEST", raising=False)
+    return RateLimiter(InMemoryBackend())
+
+
+# ============================================================================
+# RULES
+# ============================================================================
+
+def test_parse_rule():
+    default = RateLimitRule(capacity=1, period_seconds=1)
+    assert _parse_rule("10/60", default) == RateLimitRule(capacity=10, period_seconds=60)
+    assert _parse_rule("5/0.5", default) == RateLimitRule(capacity=5, period_seconds=0.5)
+
+
+@pytest.mark.parametrize("value", ["", "10", "x/60", "10/x", "0/60", "10/0", "-1/60"])
+def test_parse_rule_falls_back_to_default(value):
+    default = RateLimitRule(capacity=1, period_seconds=1)
+    assert _parse_rule(value, default) is default
+
+
+# ============================================================================
+# TOKEN BUCKET
+# ============================================================================
+
+@pytest.mark.anyio
+async def test_bucket_allows_capacity_then_denies(clock):
+    backend = InMemoryBackend()
+    results = [(await backend.take(["k"], RULE))[0] for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results] == [2, 1, 0, 0]
+    assert results[-1].retry_after_seconds == 20
+    assert results[-1].reset_seconds == 60
+
+
+@pytest.mark.anyio
+async def test_bucket_refills_at_capacity_per_period(clock):
+    backend = InMemoryBackend()
+    for _ in range(3):
+        await backend.take(["k"], RULE)
+
+    clock.value += 19
+    denied = (await backend.take(["k"], RULE))[0]
+    assert not denied.allowed
+    assert denied.retry_after_seconds == 1
+
+    clock.value += 1
+    assert (await backend.take(["k"], RULE))[0].allowed
+
+
+@pytest.mark.anyio
+async def test_bucket_never_exceeds_capacity(clock):
+    backend = InMemoryBackend()
+    await backend.take(["k"], RULE)
+    clock.value += 3600
+    result = (await backend.take(["k"], RULE))[0]
+    assert result.remaining == RULE.capacity - 1
+
+
+@pytest.mark.anyio
+async def test_denied_request_charges_no_bucket(clock):
+    backend = InMemoryBackend()
+    for _ in range(3):
+        await backend.take(["shared"], RULE)
+
+    results = await backend.take(["fresh", "shared"], RULE)
+    assert not any(r.allowed for r in results)
+    # "fresh" was not charged for the denied request
+    assert (await backend.take(["fresh"], RULE))[0].remaining == 2
+
+
+@pytest.mark.anyio
+async def test_cost_above_one(clock):
+    backend = InMemoryBackend()
+    assert (await backend.take(["k"], RULE, cost=2))[0].remaining == 1
+    denied = (await backend.take(["k"], RULE, cost=2))[0]
+    assert not denied.allowed
+    assert denied.retry_after_seconds == 20
+
+
+# ============================================================================
+# LIMITER
+# ============================================================================
+
+@pytest.mark.anyio
+async def test_hit_returns_most_restrictive_result(clock, limiter):
+    await limiter.hit("test", ["user:1"])
+    result = await limiter.hit("test", ["user:1", "ip:1.2.3.4"])
+    assert result.allowed
+    assert result.remaining == 1
+
+
+@pytest.mark.anyio
+async def test_hit_dedupes_identities(clock, limiter):
+    result = await limiter.hit("test", ["user:1", "user:1"])
+    assert result.remaining == 2
+
+
+@pytest.mark.anyio
+async def test_hit_disabled(monkeypatch, limiter):
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "false")
+    assert await limiter.hit("test", ["user:1"]) is None
+
+
+@pytest.mark.anyio
+async def test_hit_long_identity_is_limited(clock, limiter):
+    email = "email:" + "a" * 64 + "@" + "b" * 180 + ".com"
+    results = [await limiter.hit("test", ["ip:1.2.3.4", email]) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+
+
+def test_bucket_key():
+    assert bucket_key("analyze", "user:1") == "analyze:user:1"
+    long_identity = "email:" + "x" * BUCKET_KEY_MAX_IDENTITY
+    key = bucket_key("password_reset", long_identity)
+    assert key.startswith("password_reset:sha256:")
+    assert len(key) < len("password_reset:") + BUCKET_KEY_MAX_IDENTITY
+    assert key == bucket_key("password_reset", long_identity)
+    assert key != bucket_key("password_reset", long_identity + "y")
@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from server import (
+    decode_change_cursor, decode_scan_cursor, encode_change_cursor, encode_scan_cursor, naive_utc,
+)
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+# ============================================================================
+# KEYSET CURSORS (/scans, /scans/search)
+# ============================================================================
+
+@pytest.mark.parametrize("timestamp", [
+    datetime(2026, 1, 15, 10, 30),
+    datetime(2026, 1, 15, 10, 30, 0, 123456),
+    datetime(1999, 12, 31, 23, 59, 59),
+])
+@pytest.mark.parametrize("scan_id", ["0b6e2d52-1c1f-4b0a-9c55-3f8f2f1e9a10", "x", "ü-id"])
+def test_scan_cursor_round_trip(timestamp, scan_id):
+    cursor = encode_scan_cursor(timestamp, scan_id)
+    assert "=" not in cursor
+    assert decode_scan_cursor(cursor) == (timestamp, scan_id)
+
+
+def test_scan_cursor_aware_timestamp_becomes_naive_utc():
+    cursor = raw_cursor({"t": "2026-01-15T12:30:00+02:00", "id": "a"})
+    assert decode_scan_cursor(cursor) == (datetime(2026, 1, 15, 10, 30), "a")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor({"id": "a"}),
+    raw_cursor({"t": "yesterday", "id": "a"}),
+    raw_cursor(["2026-01-15T10:30:00", "a"]),
+    raw_cursor({"t": "0001-01-01T00:00:00+05:00", "id": "a"}),
+])
+def test_scan_cursor_rejects_malformed(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_scan_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+# ============================================================================
+# DELTA SYNC CURSORS (/scans/changes)
+# ============================================================================
+
+@pytest.mark.parametrize("seq", [0, 1, 2 ** 40])
+def test_change_cursor_round_trip(seq):
+    assert decode_change_cursor(encode_change_cursor(seq)) == seq
+
+
+def test_change_cursor_legacy_timestamp_cursor_resyncs():
+    assert decode_change_cursor(encode_scan_cursor(datetime(2026, 1, 15), "a")) is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor({"seq": "many"}),
+    raw_cursor(7),
+    raw_cursor({"t": "yesterday", "id": "a"}),
+])
+def test_change_cursor_rejects_malformed(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_change_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+# ============================================================================
+# naive_utc
+# ============================================================================
+
+def test_naive_utc():
+    assert naive_utc(None) is None
+    assert naive_utc(datetime(2026, 1, 15, 10, 30)) == datetime(2026, 1, 15, 10, 30)
+    aware = datetime(2026, 1, 15, 5, 30, tzinfo=timezone(timedelta(hours=-5)))
+    assert naive_utc(aware) == datetime(2026, 1, 15, 10, 30)
+    assert naive_utc(aware).tzinfo is None
@@ -0,0 +1,27 @@
+import pytest
+
+from storage_gc import key_owner
+
+
+@pytest.mark.parametrize("key, owner", [
+    ("scans/3f2a.jpg", ("scan", "3f2a")),
+    ("scans/3f2a_thumb.webp", ("scan", "3f2a")),
+    ("scans/3f2a.preview.jpg", ("scan", "3f2a")),
+    ("images/9b1c.avif", ("asset", "9b1c")),
+    ("images/9b1c_preview.avif", ("asset", "9b1c")),
+    ("uploads/user-1/abc.jpg", ("upload", None)),
+])
+def test_key_owner(key, owner):
+    assert key_owner(key) == owner
+
+
+@pytest.mark.parametrize("key", [
+    "scans/",            # no name
+    "scans/a/b.jpg",     # nested below a managed prefix
+    "images/x/y.avif",
+    "backups/db.sql",    # unmanaged prefix
+    "scans",
+    "",
+])
+def test_key_owner_ignores_unmanaged_keys(key):
+    assert key_owner(key) is None
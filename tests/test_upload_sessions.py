@@ -0,0 +1,148 @@
+import pytest
+
+from server import upload_sessions_table
+from upload_sessions import UploadSessionError, UploadSessionStore, parse_content_range
+
+
+# ============================================================================
+# parse_content_range
+# ============================================================================
+
+def test_parse_content_range():
+    assert parse_content_range("bytes 0-99/1000") == (0, 99, 1000)
+    assert parse_content_range(" bytes 100-100/1000 ") == (100, 100, 1000)
+
+
+def test_parse_content_range_unknown_total():
+    assert parse_content_range("bytes 0-99/*") == (0, 99, None)
+
+
+@pytest.mark.parametrize("header", [
+    None, "", "bytes=0-99/1000", "bytes 0-99", "bytes 99-0/1000", "bytes -1-5/10", "items 0-9/10",
+])
+def test_parse_content_range_rejects_malformed(header):
+    with pytest.raises(UploadSessionError) as exc:
+        parse_content_range(header)
+    assert exc.value.status_code == 400
+
+
+# ============================================================================
+# UploadSessionStore.append
+# ============================================================================
+
+class RecordingDatabase:
+    """Accepts the store's UPDATE statements - MemoryStore keeps the session row."""
+
+    async def execute(self, query, values=None):
+        return None
+
+
+class MemoryStore(UploadSessionStore):
+    """The real append/staging logic, with the session row kept in memory."""
+
+    def __init__(self, directory, total_bytes):
+        super().__init__(RecordingDatabase(), upload_sessions_table, directory=str(directory))
+        self.session = {"id": "session-1", "user_id": "user-1", "total_bytes": total_bytes, "committed_bytes": 0}
+
+    async def get(self, session_id, user_id):
+        if session_id != self.session["id"] or user_id != self.session["user_id"]:
+            return None
+        self.session["committed_bytes"] = min(self.session["committed_bytes"], self._staged_size(session_id))
+        return dict(self.session)
+
+    async def append(self, *args, **kwargs):
+        session = await super().append(*args, **kwargs)
+        self.session["committed_bytes"] = session["committed_bytes"]
+        return session
+
+
+DATA = bytes(range(256)) * 4  # 1024 bytes
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MemoryStore(tmp_path, len(DATA))
+
+
+def staged(store):
+    with open(store._path("session-1"), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.anyio
+async def test_append_in_order(store):
+    await store.append("session-1", "user-1", 0, DATA[:400], len(DATA))
+    session = await store.append("session-1", "user-1", 400, DATA[400:], len(DATA))
+    assert session["committed_bytes"] == len(DATA)
+    assert staged(store) == DATA
+
+
+@pytest.mark.anyio
+async def test_append_skips_bytes_below_committed_offset(store):
+    await store.append("session-1", "user-1", 0, DATA[:400])
+    # Overlaps 300-399, which are already committed
+    session = await store.append("session-1", "user-1", 300, DATA[300:700])
+    assert session["committed_bytes"] == 700
+    assert staged(store) == DATA[:700]
+
+
+@pytest.mark.anyio
+async def test_append_retransmission_is_a_no_op(store):
+    await store.append("session-1", "user-1", 0, DATA[:400])
+    session = await store.append("session-1", "user-1", 0, DATA[:100])
+    assert session["committed_bytes"] == 400
+    assert staged(store) == DATA[:400]
+
+
+@pytest.mark.anyio
+async def test_append_short_chunk_commits_what_arrived(store):
+    # A chunk for 0-499 cut off after 250 bytes
+    session = await store.append("session-1", "user-1", 0, DATA[:250])
+    assert session["committed_bytes"] == 250
+    session = await store.append("session-1", "user-1", 250, DATA[250:])
+    assert session["committed_bytes"] == len(DATA)
+    assert staged(store) == DATA
+
+
+@pytest.mark.anyio
+async def test_append_rejects_gap_with_resume_offset(store):
+    await store.append("session-1", "user-1", 0, DATA[:400])
+    with pytest.raises(UploadSessionError) as exc:
+        await store.append("session-1", "user-1", 500, DATA[500:600])
+    assert exc.value.status_code == 409
+    assert exc.value.session["committed_bytes"] == 400
+
+
+@pytest.mark.anyio
+async def test_append_rejects_bytes_past_total(store):
+    with pytest.raises(UploadSessionError) as exc:
+        await store.append("session-1", "user-1", 0, DATA + b"x")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_append_rejects_mismatched_total(store):
+    with pytest.raises(UploadSessionError) as exc:
+        await store.append("session-1", "user-1", 0, DATA[:10], len(DATA) + 1)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_append_unknown_session(store):
+    with pytest.raises(UploadSessionError) as exc:
+        await store.append("session-1", "user-2", 0, DATA[:10])
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_append_resumes_from_bytes_actually_staged(store):
+    await store.append("session-1", "user-1", 0, DATA[:400])
+    # The staging file lost its tail (e.g. a redeploy reset the disk)
+    with open(store._path("session-1"), "r+b") as f:
+        f.truncate(100)
+    with pytest.raises(UploadSessionError) as exc:
+        await store.append("session-1", "user-1", 400, DATA[400:])
+    assert exc.value.session["committed_bytes"] == 100
+    session = await store.append("session-1", "user-1", 100, DATA[100:])
+    assert session["committed_bytes"] == len(DATA)
+    assert staged(store) == DATA